@@ -0,0 +1,32 @@
+"""add_account_grid_spacing
+
+Revision ID: 8b41d07e6c52
+Revises: 5f2c8a1d9e3b
+Create Date: 2025-04-03 16:40:51.902144
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b41d07e6c52'
+down_revision: Union[str, None] = '5f2c8a1d9e3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+grid_spacing = sa.Enum('arithmetic', 'geometric', name='gridspacing')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    grid_spacing.create(op.get_bind(), checkfirst=True)
+    op.add_column('account', sa.Column('grid_spacing', grid_spacing, nullable=False, server_default='arithmetic'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('account', 'grid_spacing')
+    grid_spacing.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,32 @@
+"""add_account_exchange
+
+Revision ID: b6d2e8f41a73
+Revises: a9c3e5b7d214
+Create Date: 2025-04-14 11:02:37.518904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d2e8f41a73'
+down_revision: Union[str, None] = 'a9c3e5b7d214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+exchange = sa.Enum('bybit_v2', 'bybit_v5', 'simulated', name='exchange')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    exchange.create(op.get_bind(), checkfirst=True)
+    op.add_column('account', sa.Column('exchange', exchange, nullable=False, server_default='bybit_v2'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('account', 'exchange')
+    exchange.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,32 @@
+"""add_account_category
+
+Revision ID: d2b8f6c4a190
+Revises: b6d2e8f41a73
+Create Date: 2025-04-21 10:14:52.208317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b8f6c4a190'
+down_revision: Union[str, None] = 'b6d2e8f41a73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+category = sa.Enum('inverse', 'linear', 'spot', name='category')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    category.create(op.get_bind(), checkfirst=True)
+    op.add_column('account', sa.Column('category', category, nullable=False, server_default='inverse'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('account', 'category')
+    category.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,28 @@
+"""add_account_stats_fees
+
+Revision ID: e8c4a2f7b915
+Revises: d2b8f6c4a190
+Create Date: 2025-04-23 12:37:05.114802
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c4a2f7b915'
+down_revision: Union[str, None] = 'd2b8f6c4a190'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('account_stats', sa.Column('fees', sa.Float(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('account_stats', 'fees')
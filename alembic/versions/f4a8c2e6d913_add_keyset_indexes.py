@@ -0,0 +1,33 @@
+"""add_keyset_indexes
+
+Revision ID: f4a8c2e6d913
+Revises: e3d1f6a92c47
+Create Date: 2025-04-11 10:05:31.204817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a8c2e6d913'
+down_revision: Union[str, None] = 'e3d1f6a92c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # trades содержит миллионы строк: индексы строятся CONCURRENTLY, без блокировки записи
+    with op.get_context().autocommit_block():
+        op.create_index('ix_trades_account_id_created_at', 'trades', ['account_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_account_user_id_id', 'account', ['user_id', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_account_user_id_id', table_name='account', postgresql_concurrently=True)
+        op.drop_index('ix_trades_account_id_created_at', table_name='trades', postgresql_concurrently=True)
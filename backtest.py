@@ -0,0 +1,55 @@
+import argparse
+from src.backtest.data import load_candles
+from src.backtest.engine import GridConfig, run_backtest
+from src.backtest.sweep import grid_configs, run_sweep
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Backtest grid configurations over historical candles")
+    parser.add_argument("path", help="CSV or Parquet file with OHLCV candles or trades")
+    parser.add_argument("--start-price", type=float, nargs="+", required=True)
+    parser.add_argument("--end-price", type=float, nargs="+", required=True)
+    parser.add_argument("--grid-count", type=int, nargs="+", required=True)
+    parser.add_argument("--stop-loss", type=float, nargs="+", required=True)
+    parser.add_argument("--deposit", type=float, default=1000)
+    parser.add_argument("--grid-spacing", nargs="+", default=["arithmetic"], choices=["arithmetic", "geometric"])
+    parser.add_argument("--fee-rate", type=float, default=0.001)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    base = GridConfig(
+        start_price=args.start_price[0],
+        end_price=args.end_price[0],
+        grid_count=args.grid_count[0],
+        stop_loss=args.stop_loss[0],
+        deposit=args.deposit,
+        grid_spacing=args.grid_spacing[0],
+        fee_rate=args.fee_rate,
+    )
+    configs = grid_configs(
+        base,
+        start_price=args.start_price,
+        end_price=args.end_price,
+        grid_count=args.grid_count,
+        stop_loss=args.stop_loss,
+        grid_spacing=args.grid_spacing,
+    )
+    if len(configs) == 1:
+        results = [run_backtest(load_candles(args.path), base, keep_equity=False)]
+    else:
+        results = run_sweep(args.path, configs, args.workers)
+
+    print(f"{'start':>10} {'end':>10} {'grids':>6} {'stop':>10} {'spacing':>10} {'pnl':>12} {'realized':>12} {'drawdown':>10} {'buys':>6} {'sells':>6} {'stopped':>8} {'stops':>6}")
+    for r in results[:args.top]:
+        c = r.config
+        print(f"{c.start_price:>10} {c.end_price:>10} {c.grid_count:>6} {c.stop_loss:>10} {c.grid_spacing:>10} "
+              f"{r.pnl:>12.2f} {r.realized_pnl:>12.2f} {r.max_drawdown:>10.2f} {r.buy_fills:>6} {r.sell_fills:>6} "
+              f"{'-' if r.stopped_at is None else r.stopped_at:>8} {r.stops:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load benchmark of grid workers against the local exchange simulator")
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--levels", type=int, default=20)
+    parser.add_argument("--symbols", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--price", type=float, default=100.0)
+    parser.add_argument("--volatility", type=float, default=0.001, help="price volatility per simulator tick")
+    parser.add_argument("--tick-interval", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds of injected latency per request")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=None, help="requests per second per API key")
+    parser.add_argument("--db", action="store_true", help="write trades to DATABASE_URL instead of counting them")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--exchange", choices=["bybit_v2", "bybit_v5", "simulated"], default="bybit_v2",
+                        help="connector of the benchmark accounts; simulated runs in memory without the HTTP simulator")
+    return parser.parse_args()
+
+
+def percentiles(values, points=(50, 90, 99)):
+    if not values:
+        return {f"p{p}": None for p in points}
+    values = sorted(values)
+    return {f"p{p}": round(values[min(len(values) - 1, int(len(values) * p / 100))] * 1000, 2) for p in points}
+
+
+async def monitor_loop_lag(samples, interval=0.05):
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - started - interval)
+
+
+async def run(args):
+    # Импорты после настройки окружения: Config читает эндпоинты биржи при импорте
+    from src.manage_accounts.models import Category, Exchange, GridSpacing
+    from src.service import grid_worker
+    from src.service.connectors.simulated import SimulatedVenue
+    from src.service.executions import ExecutionStream
+    from src.service.trade_writer import trade_writer
+    from src.service.grid_state import grid_state
+    from src.service.pnl import PositionStats, pnl_aggregator
+    from src.service.market_data import market_data_hub
+    from src.service.client_registry import client_registry
+    from src.simulator.matching import MatchingEngine
+    from src.simulator.server import SimulatedExchange
+
+    symbols = [f"SIM{i}USD" for i in range(args.symbols)]
+    engine = MatchingEngine({symbol: args.price for symbol in symbols}, volatility=args.volatility, seed=args.seed)
+    exchange = SimulatedExchange(
+        engine, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, tick_interval=args.tick_interval, seed=args.seed,
+    )
+    if args.exchange == "simulated":
+        # Тот же движок, но в памяти процесса: цену двигает SimulatedVenue, HTTP-сервер не запускается
+        client_registry.simulated = SimulatedVenue(engine, tick_interval=args.tick_interval)
+    else:
+        await exchange.start(port=args.port)
+
+    fill_latencies = []
+    wait_fills = ExecutionStream.wait_fills
+
+    # Задержка обнаружения: от исполнения на симуляторе до получения order_id воркером (для потоков всех коннекторов)
+    async def timed_wait_fills(self, timeout):
+        filled = await wait_fills(self, timeout)
+        now = time.time()
+        for order_id in filled:
+            order = engine.orders.get(order_id)
+            if order is not None and order.filled_at is not None:
+                fill_latencies.append(now - order.filled_at)
+        return filled
+
+    ExecutionStream.wait_fills = timed_wait_fills
+
+    if not args.db:
+        async def count_only(batch):
+            trade_writer.written += len(batch)
+        trade_writer._flush = count_only
+
+        # Без базы состояние сетки не сохраняется: каждый аккаунт стартует с пустой сетки
+        async def no_state(account_id, grid=None):
+            if grid is not None:
+                grid.take_dirty()
+            return []
+        grid_state.load = grid_state.save = no_state
+
+        async def fresh_stats(account):
+            return pnl_aggregator._stats.setdefault(account.id, PositionStats(deposit=account.deposit))
+        pnl_aggregator.load = fresh_stats
+
+    accounts = [
+        SimpleNamespace(
+            id=i, name=f"bench{i}", api_key=f"key{i}", secret_key=f"secret{i}", symbol=symbols[i % len(symbols)],
+            deposit=1000.0, grid_count=args.levels, start_price=args.price * 0.9, end_price=args.price * 1.1,
+            stop_loss=args.price * 0.5, grid_spacing=GridSpacing.arithmetic, exchange=Exchange(args.exchange),
+            category=Category.inverse,
+        )
+        for i in range(args.accounts)
+    ]
+
+    lag = []
+    lag_task = asyncio.create_task(monitor_loop_lag(lag))
+    trade_writer.start()
+    started = time.monotonic()
+    tasks = [asyncio.create_task(grid_worker.run_grid_bot_for_account(account)) for account in accounts]
+    await asyncio.sleep(args.duration)
+    elapsed = time.monotonic() - started
+
+    for task in tasks + [lag_task]:
+        task.cancel()
+    await asyncio.gather(*tasks, lag_task, return_exceptions=True)
+    await trade_writer.close()
+    await market_data_hub.close()
+    await client_registry.close()
+    await exchange.stop()
+
+    stats = exchange.stats()
+    print(f"exchange={args.exchange} accounts={args.accounts} levels={args.levels} symbols={args.symbols} duration={elapsed:.1f}s")
+    print(f"exchange: {stats}")
+    print(f"orders/sec: {stats['placed'] / elapsed:.1f}  requests/sec: {stats['requests'] / elapsed:.1f}")
+    print(f"fill detection latency ms ({len(fill_latencies)} fills): {percentiles(fill_latencies)}")
+    print(f"event loop lag ms: {percentiles(lag)} max={max(lag) * 1000 if lag else 0:.2f}")
+    print(f"trade writes/sec: {trade_writer.written / elapsed:.1f} ({trade_writer.stats()})")
+    stats = [pnl_aggregator.get(account.id) for account in accounts]
+    stats = [s for s in stats if s is not None]
+    print(f"realized pnl: {sum(s.realized_pnl for s in stats):.4f}  fills: {sum(s.buy_fills + s.sell_fills for s in stats)}")
+
+
+def main():
+    args = parse_args()
+    os.environ["EXCHANGE_ENDPOINT"] = f"http://127.0.0.1:{args.port}"
+    os.environ["EXCHANGE_WS_ENDPOINT"] = f"ws://127.0.0.1:{args.port}/realtime"
+    os.environ["EXCHANGE_WS_V5_ENDPOINT"] = f"ws://127.0.0.1:{args.port}/v5/private"
+    if args.exchange == "simulated":
+        os.environ["ALLOW_SIMULATED_EXCHANGE"] = "true"
+    if not args.db:
+        os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/benchmark")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,27 @@
+import argparse
 import asyncio
+import multiprocessing
 import uvicorn
 from types import CoroutineType
 from typing import List
 from fastapi import FastAPI
 from src.config import Config
+from fastapi.responses import PlainTextResponse
 from src.middlewares import SQLAlchemySessionMiddleware
 from src.admin.middlewares import AdminMiddleware
 from src.auth.middlewares import AuthMiddleware
-from src.admin.routes import admin_router
+from src.admin.routes import admin_router, stats_router
 from src.auth.routes import auth_router
 from src.manage_accounts.routes import accounts_router
 
 from src.service.manager import AccountManager
+from src.service.metrics import MetricsMiddleware, monitor_loop_lag, registry, serve_metrics
+from src.service.events import account_events, fill_events, status_events, forward_to_postgres, listen_postgres, FILLS_CHANNEL, STATUS_CHANNEL
 
 protected_app = FastAPI()
 protected_app.add_middleware(AdminMiddleware)
 protected_app.include_router(admin_router)
+protected_app.include_router(stats_router)
 
 client_app = FastAPI()
 client_app.add_middleware(AuthMiddleware)
@@ -27,13 +33,19 @@ not_protected_app.include_router(auth_router)
 
 app = FastAPI()
 app.add_middleware(SQLAlchemySessionMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.mount("/protected", protected_app)
 app.mount("/auth", not_protected_app)
 app.mount("/client", client_app)
 
 
-async def run_account_manager():
-    manager = AccountManager()
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+async def run_account_manager(shard_id=0, shard_count=1):
+    manager = AccountManager(shard_id=shard_id, shard_count=shard_count)
     await manager.run()
     
 async def run_server():
@@ -43,11 +55,35 @@ async def run_server():
     
 
 
-async def main():
-    callable_tasks: List[CoroutineType] = [
-        run_account_manager(),
-        run_server()
-    ]
+async def main(mode="all", shard_id=0, shard_count=1):
+    # all — API и менеджер в одном event loop; api — только HTTP-сервер, события уходят в PostgreSQL NOTIFY;
+    # worker — только менеджер своего шарда, события приходят через LISTEN, исполнения и статусы, выставленные воркером,
+    # уходят в API через NOTIFY. API пересылает такой статус обратно воркерам; владелец сверит аккаунт с БД, это безвредно
+    if mode == "api":
+        callable_tasks: List[CoroutineType] = [
+            run_server(),
+            forward_to_postgres(account_events),
+            listen_postgres(fill_events, FILLS_CHANNEL),
+            listen_postgres(account_events, STATUS_CHANNEL),
+            monitor_loop_lag()
+        ]
+    elif mode == "worker":
+        callable_tasks: List[CoroutineType] = [
+            run_account_manager(shard_id, shard_count),
+            listen_postgres(account_events),
+            forward_to_postgres(fill_events, FILLS_CHANNEL),
+            forward_to_postgres(status_events, STATUS_CHANNEL),
+            monitor_loop_lag()
+        ]
+        # У воркера нет HTTP-сервера API: метрики шарда отдаются на отдельном порту
+        if Config.metrics_port:
+            callable_tasks.append(serve_metrics(Config.metrics_port + shard_id))
+    else:
+        callable_tasks: List[CoroutineType] = [
+            run_account_manager(),
+            run_server(),
+            monitor_loop_lag()
+        ]
     
     tasks = []
     for callable_task in callable_tasks:
@@ -58,5 +94,29 @@ async def main():
     await asyncio.gather(*tasks)
 
 
+def run_worker_process(shard_id, shard_count):
+    asyncio.run(main("worker", shard_id, shard_count))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Volume trading bot backend")
+    parser.add_argument("mode", nargs="?", default="all", choices=["all", "api", "worker", "workers"],
+                        help="workers starts one worker process per shard")
+    parser.add_argument("--shard", type=int, default=0)
+    parser.add_argument("--shards", type=int, default=1)
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    if args.mode == "workers":
+        processes = [
+            multiprocessing.Process(target=run_worker_process, args=(shard_id, args.shards), name=f"shard-{shard_id}")
+            for shard_id in range(args.shards)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    else:
+        asyncio.run(main(args.mode, args.shard, args.shards))
\ No newline at end of file
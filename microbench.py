@@ -0,0 +1,77 @@
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import timeit
+from urllib.parse import urlencode
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Micro-benchmark of request signing and response decoding in AsyncBybitClient")
+    parser.add_argument("--number", type=int, default=20000, help="calls per measurement")
+    parser.add_argument("--orders", type=int, default=50, help="orders in the decoded order list response")
+    return parser.parse_args()
+
+
+def sample_params():
+    return {
+        "symbol": "BTCUSD", "side": "Buy", "order_type": "Limit", "qty": 0.0123, "price": 64250.5,
+        "time_in_force": "GoodTillCancel", "api_key": "XXXXXXXXXXXXXXXXXX", "timestamp": 1712345678901, "recv_window": 5000,
+    }
+
+
+def sample_body(orders):
+    result = [
+        {"order_id": f"{i:08d}-aaaa-bbbb-cccc-dddddddddddd", "symbol": "BTCUSD", "side": "Buy", "order_type": "Limit",
+         "price": "64250.5", "qty": 0.0123, "order_status": "New", "created_at": "2025-04-01T12:00:00Z"}
+        for i in range(orders)
+    ]
+    return json.dumps({"ret_code": 0, "ret_msg": "OK", "result": result, "time_now": "1712345678.901",
+                       "rate_limit_status": 99, "rate_limit_reset_ms": 1712345678901, "rate_limit": 100}).encode()
+
+
+def run(args):
+    from src.service.bybit_client import AsyncBybitClient
+    from src.service.json_backend import BACKEND, LazyResponse, loads
+
+    secret = b"YYYYYYYYYYYYYYYYYYYYYYYYYYYYYYYYYYYY"
+    client = AsyncBybitClient.__new__(AsyncBybitClient)
+    client.api_secret = secret
+    client._mac = hmac.new(secret, digestmod=hashlib.sha256)
+    params = sample_params()
+    body = sample_body(args.orders)
+
+    def legacy_sign():
+        # Прежний путь: urlencode отсортированных параметров и новый HMAC на каждый вызов
+        return hmac.new(secret, urlencode(sorted(params.items())).encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def fast_sign():
+        return client._sign(params)
+
+    assert legacy_sign() == fast_sign(), "signatures differ"
+
+    cases = [
+        ("sign: urlencode + hmac.new", legacy_sign),
+        ("sign: join + hmac copy", fast_sign),
+        ("decode: json.loads(str)", lambda: json.loads(body.decode('utf-8'))),
+        (f"decode: {BACKEND}.loads(bytes)", lambda: loads(body)),
+        ("decode: LazyResponse, not read", lambda: LazyResponse(body)),
+        ("decode: LazyResponse, ret_code read", lambda: LazyResponse(body)["ret_code"]),
+        ("sign + decode: legacy", lambda: (legacy_sign(), json.loads(body.decode('utf-8')))),
+        ("sign + decode: fast path", lambda: (fast_sign(), LazyResponse(body)["ret_code"])),
+    ]
+    print(f"json backend: {BACKEND}, response size: {len(body)} bytes, {args.number} calls per case")
+    for name, func in cases:
+        seconds = min(timeit.repeat(func, number=args.number, repeat=3))
+        print(f"{name:<40} {seconds / args.number * 1e6:8.2f} us/call")
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/benchmark")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,40 @@
 from fastapi import APIRouter, Request, HTTPException
-from src.admin.schemas import UserData, CreateUserRequest, UserId
+from src.admin.schemas import UserData, CreateUserRequest, UserId, FleetStats
+from src.manage_accounts.models import Account, AccountStats, AccountStatus
 from src.auth.models import User
-from sqlalchemy import select
+from src.auth.principals import principal_cache
+from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
-from typing import List
+from src.pagination import Page, paginate, project
+from typing import Optional
 
 
 
 admin_router = APIRouter(prefix="/users")
+stats_router = APIRouter(prefix="/stats")
+
+USER_COLUMNS = {name: getattr(User, name) for name in UserData.model_fields}
+
 
 @admin_router.get("/")
-async def get_users(request: Request) -> List[UserData]:
+async def get_users(
+    request: Request,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    username: Optional[str] = None,
+    deleted: Optional[bool] = None,
+) -> Page:
     db: AsyncSession = request.state.db
     
-    users_data = (await db.execute(select(User))).scalars().all()
+    query = select(User)
+    if username:
+        query = query.where(User.username == username)
+    if deleted is not None:
+        query = query.where(User.deleted == deleted)
     
-    return [UserData(**user.__dict__) for user in users_data]
+    return await paginate(db, query, project(USER_COLUMNS, fields), [User.id], cursor, limit)
 
 @admin_router.post("/new")
 async def create_user(payload: CreateUserRequest, request: Request) -> UserData:
@@ -44,8 +62,9 @@ async def delete_user(id: int, request: Request):
         raise HTTPException(status_code=404, detail="User not found")
     
     user.deleted = True
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.invalidate_user(user.id)
     
     return UserId(id=id)
 
@@ -62,7 +81,34 @@ async def update_user(payload: UserData, request: Request) -> UserData:
     user.max_accounts_count = payload.max_accounts_count
     user.key = payload.key
     user.expired_at = payload.expired_at
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.invalidate_user(user.id)
+    
+    return UserData(**user.__dict__)
+
+
+@stats_router.get("/")
+async def get_fleet_stats(request: Request) -> FleetStats:
+    """
+    Сводка по всем аккаунтам одним агрегирующим запросом по снимкам account_stats.
+    """
+    db: AsyncSession = request.state.db
+    
+    row = (await db.execute(
+        select(
+            func.count(Account.id),
+            func.count(case((Account.status == AccountStatus.running, 1))),
+            func.coalesce(func.sum(AccountStats.position * AccountStats.last_price), 0.0),
+            func.coalesce(func.sum(AccountStats.realized_pnl), 0.0),
+            func.coalesce(func.sum(AccountStats.unrealized_pnl), 0.0),
+            func.coalesce(func.sum(AccountStats.buy_fills), 0),
+            func.coalesce(func.sum(AccountStats.sell_fills), 0),
+            func.coalesce(func.sum(AccountStats.volume), 0.0),
+        )
+        .select_from(Account)
+        .outerjoin(AccountStats, AccountStats.account_id == Account.id)
+        .where(Account.status != AccountStatus.deleted)
+    )).one()
     
-    return UserData(**user.__dict__)
\ No newline at end of file
+    return FleetStats(**dict(zip(FleetStats.model_fields, row)))
@@ -14,4 +14,16 @@ class CreateUserRequest(BaseModel):
     max_accounts_count: int
     
 class UserId(BaseModel):
-    id: int
\ No newline at end of file
+    id: int
+
+
+class FleetStats(BaseModel):
+    accounts: int
+    running: int
+    position_value: float
+    realized_pnl: float
+    unrealized_pnl: float
+    buy_fills: int
+    sell_fills: int
+    volume: float
+
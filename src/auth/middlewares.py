@@ -1,34 +1,70 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request
 from fastapi.responses import JSONResponse
+from starlette import status
+from starlette.datastructures import Headers, QueryParams
+from starlette.websockets import WebSocketClose
 from src.config import Config
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.auth.models import User
+from src.auth.principals import Principal, principal_cache
 import jwt
 import datetime
 
-async def decode_token(token):
+def decode_token(token):
     try:
         payload = jwt.decode(token, Config.jwt_secret, algorithms=["HS256"])
         return payload
     except:
         return {}
-        
-    
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        token = request.headers.get("Authorization")
+
+async def authenticate(token, db: AsyncSession):
+    """
+    Возвращает Principal по токену или None. В установившемся режиме пользователь берётся из кэша без обращения к БД.
+    """
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+    payload = decode_token(token)
+    if not (payload.get("username") and payload.get("id") and payload.get("exp")):
+        return None
+    user = (await db.execute(select(User).where(User.id == payload.get("id"), User.username == payload.get("username")))).scalar()
+    if user is None or user.deleted or user.expired_at <= datetime.datetime.now():
+        return None
+    principal = Principal.from_user(user)
+    principal_cache.put(token, principal, payload["exp"])
+    return principal
+
+
+class AuthMiddleware:
+    """
+    ASGI-слой авторизации по Bearer-токену: кладёт Principal в request.state.user.
+    WebSocket-клиенты из браузера могут передать токен параметром ?token=.
+    """
+    admin_only = False
+    denied = JSONResponse(status_code=401, content={"detail": "Unauthorized"})
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        token = Headers(scope=scope).get("Authorization")
         if token and token.startswith("Bearer "):
-            token = token.replace("Bearer ", "")
-            payload = await decode_token(token)
-            if payload.get("username") and payload.get("id") and payload.get("exp"):
-                db: AsyncSession = request.state.db
-                user = (await db.execute(select(User).where(User.id == payload.get("id"), User.username == payload.get("username")))).scalar()
-                if user and user.expired_at > datetime.datetime.now() and payload.get("exp") > int(datetime.datetime.now().timestamp()):
-                    request.state.user = user
-                    return await call_next(request)
-                    
+            token = token[len("Bearer "):]
+        elif scope["type"] == "websocket":
+            token = QueryParams(scope["query_string"]).get("token")
+        else:
+            token = None
+        if token:
+            state = scope.setdefault("state", {})
+            principal = await authenticate(token, state["db"])
+            if principal is not None and (principal.is_admin or not self.admin_only):
+                state["user"] = principal
+                return await self.app(scope, receive, send)
+
         # → токен отсутствует или невалиден
-        return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
\ No newline at end of file
+        if scope["type"] == "websocket":
+            return await WebSocketClose(code=status.WS_1008_POLICY_VIOLATION)(scope, receive, send)
+        await self.denied(scope, receive, send)
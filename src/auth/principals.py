@@ -0,0 +1,94 @@
+# principals.py
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from src.auth.models import UserType
+from src.config import Config
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    Проверенный пользователь запроса: снимок полей User, не привязанный к сессии БД.
+    """
+    id: int
+    username: str
+    type: UserType
+    max_accounts_count: int
+    expired_at: datetime
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.type, user.max_accounts_count, user.expired_at)
+
+    @property
+    def is_admin(self):
+        return self.type == UserType.admin
+
+
+class PrincipalCache:
+    """
+    LRU-кэш проверенных пользователей по токену. Запись живёт не дольше ttl секунд, срока действия токена
+    и срока действия пользователя; после изменения пользователя в админке записи сбрасываются через invalidate_user.
+    """
+
+    def __init__(self, ttl=60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # token: (Principal, monotonic-время истечения)
+        self._tokens = {}  # user_id: set(token)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        principal, expires = entry
+        if expires <= time.monotonic():
+            self._drop(token)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return principal
+
+    def put(self, token, principal, token_exp):
+        now = time.time()
+        lifetime = min(self.ttl, token_exp - now, principal.expired_at.timestamp() - now)
+        if lifetime <= 0:
+            return
+        self._drop(token)
+        self._entries[token] = (principal, time.monotonic() + lifetime)
+        self._tokens.setdefault(principal.id, set()).add(token)
+        while len(self._entries) > self.max_size:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, token):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens.get(entry[0].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens[entry[0].id]
+
+    def invalidate_user(self, user_id):
+        """
+        Сбрасывает все закэшированные токены пользователя (смена ключа, срока действия, удаление).
+        """
+        for token in list(self._tokens.get(user_id, ())):
+            self._drop(token)
+
+    def clear(self):
+        self._entries.clear()
+        self._tokens.clear()
+
+    def stats(self):
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache(ttl=Config.auth_cache_ttl, max_size=Config.auth_cache_size)
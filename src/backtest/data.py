@@ -0,0 +1,54 @@
+# data.py
+from dataclasses import dataclass
+import numpy as np
+
+
+@dataclass(slots=True)
+class Candles:
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self):
+        return len(self.close)
+
+
+def _from_columns(columns):
+    # Лента сделок (timestamp, price, qty) превращается в «свечи» из одной цены
+    if "high" not in columns and "price" in columns:
+        price = columns["price"]
+        return Candles(
+            timestamp=columns["timestamp"], open=price, high=price, low=price, close=price,
+            volume=columns.get("qty", columns.get("volume", np.zeros_like(price))),
+        )
+    return Candles(
+        timestamp=columns["timestamp"], open=columns["open"], high=columns["high"], low=columns["low"],
+        close=columns["close"], volume=columns.get("volume", np.zeros_like(columns["close"])),
+    )
+
+
+def _read_csv(path):
+    data = np.genfromtxt(path, delimiter=",", names=True, dtype=np.float64)
+    return {name.lower(): np.ascontiguousarray(data[name]) for name in data.dtype.names}
+
+
+def _read_parquet(path):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet files requires pyarrow: pip install pyarrow") from e
+    table = pq.read_table(path)
+    return {name.lower(): table.column(name).to_numpy().astype(np.float64) for name in table.column_names}
+
+
+def load_candles(path):
+    """
+    Загружает OHLCV-свечи или ленту сделок из CSV/Parquet. Колонки: timestamp, open, high, low, close[, volume]
+    или timestamp, price[, qty]. Строки сортируются по времени.
+    """
+    columns = _read_parquet(path) if str(path).endswith(".parquet") else _read_csv(path)
+    order = np.argsort(columns["timestamp"], kind="stable")
+    return _from_columns({name: values[order] for name, values in columns.items()})
@@ -0,0 +1,179 @@
+# engine.py
+from dataclasses import dataclass, field
+import numpy as np
+from src.service.grid_engine import BUY, GridEngine
+
+
+@dataclass(frozen=True, slots=True)
+class GridConfig:
+    """
+    Параметры сетки, как у Account: используются и для построения GridEngine.
+    """
+    start_price: float
+    end_price: float
+    grid_count: int
+    stop_loss: float
+    deposit: float
+    grid_spacing: str = "arithmetic"
+    fee_rate: float = 0.001
+
+
+@dataclass(slots=True)
+class BacktestResult:
+    config: GridConfig
+    pnl: float
+    realized_pnl: float
+    unrealized_pnl: float
+    fees: float
+    buy_fills: int
+    sell_fills: int
+    max_drawdown: float
+    stopped_at: int | None  # индекс свечи, на которой стоплосс сработал впервые
+    stops: int = 0  # сколько раз срабатывал стоплосс
+    equity: np.ndarray | None = field(default=None, repr=False)
+
+
+def _cell_fills(first_hits, second_hits):
+    """
+    Чередует исполнения ячейки: ордер исходной стороны исполняется на первой свече из first_hits,
+    ордер противоположной стороны — на первой более поздней свече из second_hits, и так далее.
+    """
+    first, second = [], []
+    t = -1
+    while True:
+        i = np.searchsorted(first_hits, t, side="right")
+        if i == len(first_hits):
+            break
+        t = first_hits[i]
+        first.append(t)
+        j = np.searchsorted(second_hits, t, side="right")
+        if j == len(second_hits):
+            break
+        t = second_hits[j]
+        second.append(t)
+    return np.array(first, dtype=np.intp), np.array(second, dtype=np.intp)
+
+
+def _segments(close, stop_loss):
+    """
+    Отрезки торговли (start, end, stop) как у check_stop_loss воркера: сетка торгует на свечах [start, end),
+    на закрытии свечи stop ниже стоплосса останавливается и снова выставляется после закрытия первой свечи
+    не ниже порога. stop None — сетка доторговала до конца данных.
+    """
+    below = close < stop_loss
+    segments = []
+    start = 0
+    while start < len(close):
+        stops = np.flatnonzero(below[start:])
+        if not len(stops):
+            segments.append((start, len(close), None))
+            break
+        stop = start + int(stops[0])
+        segments.append((start, stop, stop))
+        recovered = np.flatnonzero(~below[stop + 1:])
+        if not len(recovered):
+            break
+        start = stop + int(recovered[0]) + 2
+    return segments
+
+
+def run_backtest(candles, config, spec=None, keep_equity=True):
+    """
+    Прогоняет логику сетки run_grid_bot_for_account по историческим свечам: в каждой ячейке исполненный ордер
+    сменяется ордером противоположной стороны на той же цене. Стоплосс — как check_stop_loss: на закрытии свечи
+    ниже stop_loss ордера снимаются, объём ячеек, ждущих продажу, продаётся по close (в том числе исходные продажи
+    за счёт имевшейся позиции), и сетка стоит, пока close не вернётся к порогу; затем ячейки начинают с исходной стороны.
+    Сетка считается выставленной до первой свечи. pnl равен equity[-1] - deposit.
+    """
+    engine = GridEngine.from_account(config, config.grid_spacing, spec)
+    size = len(candles)
+    if not size:
+        return BacktestResult(config, 0.0, 0.0, 0.0, 0.0, 0, 0, 0.0, None)
+
+    times, cash, position = [], [], []
+    fees = realized = open_cost = 0.0
+    buy_fills = sell_fills = stops = 0
+    stopped_at = None
+    cells = np.flatnonzero(engine.enabled)
+    for start, end, stop in _segments(candles.close, config.stop_loss):
+        low, high, open_ = candles.low[start:end], candles.high[start:end], candles.open[start:end]
+        selling, held_costs = [], []  # ячейки, ждущие продажу, и стоимость купленного ими (0 — исходная продажа)
+        for cell in cells:
+            price, qty = engine.price[cell], engine.quantity[cell]
+            low_hits, high_hits = np.flatnonzero(low <= price), np.flatnonzero(high >= price)
+            if engine.initial_side[cell] == BUY:
+                buys, sells = _cell_fills(low_hits, high_hits)
+            else:
+                sells, buys = _cell_fills(high_hits, low_hits)
+            # Ордер, оказавшийся по ту сторону рынка, исполняется по цене открытия
+            buy_prices = np.minimum(price, open_[buys])
+            sell_prices = np.maximum(price, open_[sells])
+            buy_fees = buy_prices * qty * config.fee_rate
+            sell_fees = sell_prices * qty * config.fee_rate
+            times += [buys + start, sells + start]
+            cash += [-buy_prices * qty - buy_fees, sell_prices * qty - sell_fees]
+            position += [np.full(len(buys), qty), np.full(len(sells), -qty)]
+            fees += float(buy_fees.sum() + sell_fees.sum())
+            # Закрытые круги — пары покупка/продажа; незакрытый ордер ячейки (покупка или продажа) остаётся в open_cost
+            closed = min(len(buys), len(sells))
+            buy_costs = buy_prices * qty + buy_fees
+            sell_proceeds = sell_prices * qty - sell_fees
+            realized += float(sell_proceeds[:closed].sum() - buy_costs[:closed].sum())
+            open_cost += float(buy_costs[closed:].sum() - sell_proceeds[closed:].sum())
+            buy_fills += len(buys)
+            sell_fills += len(sells)
+            if len(buys) > len(sells):
+                selling.append(cell)
+                held_costs.append(float(buy_costs[-1]))
+            elif len(buys) == len(sells) and engine.initial_side[cell] != BUY:
+                selling.append(cell)
+                held_costs.append(None)
+        if stop is None:
+            continue
+
+        # Стоплосс: объём ячеек, ждущих продажу, одним рыночным ордером по close, как total_quantity воркера
+        stops += 1
+        if stopped_at is None:
+            stopped_at = stop
+        quantity = engine.total_quantity(np.array(selling, dtype=np.intp)) if selling else 0.0
+        if quantity <= 0:
+            continue
+        proceeds = quantity * candles.close[stop]
+        stop_fee = proceeds * config.fee_rate
+        fees += float(stop_fee)
+        sell_fills += 1
+        times.append(np.array([stop], dtype=np.intp))
+        cash.append(np.array([proceeds - stop_fee]))
+        position.append(np.array([-quantity]))
+        # Выручка делится по ячейкам пропорционально их количеству: купленное ячейкой закрывается, исходная продажа открывает
+        shares = engine.quantity[selling] / engine.quantity[selling].sum() * float(proceeds - stop_fee)
+        for share, cost in zip(shares.tolist(), held_costs):
+            if cost is None:
+                open_cost -= share
+            else:
+                realized += share - cost
+                open_cost -= cost
+
+    times = np.concatenate(times) if times else np.zeros(0, dtype=np.intp)
+    cash = np.concatenate(cash) if cash else np.zeros(0)
+    position = np.concatenate(position) if position else np.zeros(0)
+
+    cash_curve = np.cumsum(np.bincount(times, weights=cash, minlength=size))
+    position_curve = np.cumsum(np.bincount(times, weights=position, minlength=size))
+
+    equity = config.deposit + cash_curve + position_curve * candles.close
+    drawdown = np.maximum.accumulate(equity) - equity
+    unrealized = float(position_curve[-1] * candles.close[-1]) - open_cost
+    return BacktestResult(
+        config=config,
+        pnl=realized + unrealized,
+        realized_pnl=realized,
+        unrealized_pnl=unrealized,
+        fees=fees,
+        buy_fills=buy_fills,
+        sell_fills=sell_fills,
+        max_drawdown=float(drawdown.max()),
+        stopped_at=stopped_at,
+        stops=stops,
+        equity=equity if keep_equity else None,
+    )
@@ -0,0 +1,35 @@
+# sweep.py
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from itertools import product
+from src.backtest.data import load_candles
+from src.backtest.engine import run_backtest
+
+_candles = None  # свечи, загруженные один раз в каждом процессе пула
+
+
+def _init_worker(path):
+    global _candles
+    _candles = load_candles(path)
+
+
+def _run(config):
+    return run_backtest(_candles, config, keep_equity=False)
+
+
+def grid_configs(base, **ranges):
+    """
+    Все комбинации параметров: grid_configs(base, grid_count=[10, 20], stop_loss=[90, 95]).
+    """
+    names = list(ranges)
+    return [replace(base, **dict(zip(names, values))) for values in product(*ranges.values())]
+
+
+def run_sweep(path, configs, workers=None):
+    """
+    Прогоняет конфигурации в пуле процессов; каждый процесс читает файл со свечами один раз.
+    Результаты отсортированы по убыванию PnL.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path,)) as pool:
+        results = list(pool.map(_run, configs, chunksize=max(1, len(configs) // (4 * (workers or 4)))))
+    return sorted(results, key=lambda result: result.pnl, reverse=True)
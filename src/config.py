@@ -7,6 +7,27 @@ class ConfigData:
     database_url: str
     jwt_secret: str
     port: int
+    exchange_pool_limit: int
+    exchange_pool_limit_per_host: int
+    market_data_interval: float
+    exchange_rate_limit: int
+    exchange_max_concurrency: int
+    exchange_endpoint: str
+    exchange_ws_endpoint: str
+    exchange_ws_v5_endpoint: str
+    allow_simulated_exchange: bool
+    auth_cache_ttl: float
+    auth_cache_size: int
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_pre_ping: bool
+    db_pool_recycle: int
+    db_statement_cache_size: int
+    metrics_port: int
+    log_level: str
+    log_format: str
+    log_levels: str
+    trade_fee_rate: float
     
     
 def load_config() -> ConfigData:
@@ -17,7 +38,28 @@ def load_config() -> ConfigData:
     return ConfigData(
         database_url=os.getenv("DATABASE_URL"),
         jwt_secret=os.getenv("JWT_SECRET"),
-        port=int(os.getenv("PORT", 8000))
+        port=int(os.getenv("PORT", 8000)),
+        exchange_pool_limit=int(os.getenv("EXCHANGE_POOL_LIMIT", 100)),
+        exchange_pool_limit_per_host=int(os.getenv("EXCHANGE_POOL_LIMIT_PER_HOST", 50)),
+        market_data_interval=float(os.getenv("MARKET_DATA_INTERVAL", 1.0)),
+        exchange_rate_limit=int(os.getenv("EXCHANGE_RATE_LIMIT", 10)),
+        exchange_max_concurrency=int(os.getenv("EXCHANGE_MAX_CONCURRENCY", 5)),
+        exchange_endpoint=os.getenv("EXCHANGE_ENDPOINT", "https://api.bybit.com"),
+        exchange_ws_endpoint=os.getenv("EXCHANGE_WS_ENDPOINT", "wss://stream.bybit.com/realtime"),
+        exchange_ws_v5_endpoint=os.getenv("EXCHANGE_WS_V5_ENDPOINT", "wss://stream.bybit.com/v5/private"),
+        allow_simulated_exchange=os.getenv("ALLOW_SIMULATED_EXCHANGE", "false").lower() in ("1", "true", "yes"),
+        auth_cache_ttl=float(os.getenv("AUTH_CACHE_TTL", 60)),
+        auth_cache_size=int(os.getenv("AUTH_CACHE_SIZE", 10000)),
+        db_pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+        db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        db_pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+        db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        db_statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", 500)),
+        metrics_port=int(os.getenv("METRICS_PORT", 9100)),
+        log_level=os.getenv("LOG_LEVEL", "INFO"),
+        log_format=os.getenv("LOG_FORMAT", "text"),
+        log_levels=os.getenv("LOG_LEVELS", ""),
+        trade_fee_rate=float(os.getenv("TRADE_FEE_RATE", 0.0)),
     )
     
 Config = load_config()
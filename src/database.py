@@ -2,8 +2,16 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import declarative_base
 from src.config import Config
 
-# Создаём движок (один на всё приложение)
-engine = create_async_engine(Config.database_url, echo=False)
+# Создаём движок (один на всё приложение); размеры пула настраиваются в Config
+engine = create_async_engine(
+    Config.database_url,
+    echo=False,
+    pool_size=Config.db_pool_size,
+    max_overflow=Config.db_max_overflow,
+    pool_pre_ping=Config.db_pool_pre_ping,
+    pool_recycle=Config.db_pool_recycle,
+    connect_args={"prepared_statement_cache_size": Config.db_statement_cache_size},
+)
 
 # Базовый класс для моделей
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
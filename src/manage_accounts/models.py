@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Enum, Index
 from sqlalchemy.orm import relationship
 from src.database import Base
 import enum
@@ -12,6 +12,24 @@ class AccountStatus(enum.Enum):
     error = "error"
 
 
+class GridSpacing(enum.Enum):
+    arithmetic = "arithmetic"
+    geometric = "geometric"
+
+
+class Exchange(enum.Enum):
+    bybit_v2 = "bybit_v2"
+    bybit_v5 = "bybit_v5"
+    simulated = "simulated"
+
+
+class Category(enum.Enum):
+    # Категория инструментов Bybit v5: один и тот же символ (BTCUSDT) есть и на споте, и в линейных контрактах
+    inverse = "inverse"
+    linear = "linear"
+    spot = "spot"
+
+
 class Account(Base):
     __tablename__ = "account"
 
@@ -28,10 +46,14 @@ class Account(Base):
     start_price = Column(Float, nullable=False)
     end_price = Column(Float, nullable=False)
     stop_loss = Column(Float, nullable=False)
+    grid_spacing = Column(Enum(GridSpacing), default=GridSpacing.arithmetic, nullable=False)
+    exchange = Column(Enum(Exchange), default=Exchange.bybit_v2, nullable=False)
+    category = Column(Enum(Category), default=Category.inverse, nullable=False)
     
     status = Column(Enum(AccountStatus), default=AccountStatus.stopped, nullable=False)
     
     created_at = Column(DateTime, default=datetime.now(), nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False, index=True)
     
     def __repr__(self):
         return f"Account(id={self.id}, name={self.name})"
@@ -60,6 +82,61 @@ class Trade(Base):
     created_at = Column(DateTime, default=datetime.now(), nullable=False)
     
 
+class GridOrderStatus(str, enum.Enum):
+    open = "open"  # в ячейке стоит живой ордер
+    idle = "idle"  # ордер ячейки исполнен или отменён, новый ещё не выставлен
+
+
+class GridOrder(Base):
+    """
+    Сохранённое состояние ячейки сетки: по нему бот после перезапуска продолжает работу без повторного выставления ордеров.
+    """
+    __tablename__ = "grid_orders"
+
+    account_id = Column(Integer, ForeignKey(Account.id), primary_key=True)
+    cell = Column(Integer, primary_key=True)  # индекс ячейки (уровня) сетки
+
+    side = Column(Enum(TradeSide), nullable=False)  # сторона текущего/следующего ордера ячейки
+    price = Column(Float, nullable=False)
+    quantity = Column(Float, nullable=False)
+    order_id = Column(String, nullable=True)
+    status = Column(Enum(GridOrderStatus), nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+
+
+class AccountStats(Base):
+    """
+    Последний снимок позиции и PnL аккаунта, который периодически сохраняет агрегатор исполнений.
+    """
+    __tablename__ = "account_stats"
+
+    account_id = Column(Integer, ForeignKey(Account.id), primary_key=True)
+
+    position = Column(Float, nullable=False, default=0.0)
+    avg_entry = Column(Float, nullable=False, default=0.0)
+    realized_pnl = Column(Float, nullable=False, default=0.0)
+    unrealized_pnl = Column(Float, nullable=False, default=0.0)
+    buy_fills = Column(Integer, nullable=False, default=0)
+    sell_fills = Column(Integer, nullable=False, default=0)
+    volume = Column(Float, nullable=False, default=0.0)
+    last_price = Column(Float, nullable=False, default=0.0)
+    fees = Column(Float, nullable=False, default=0.0)
+
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+
+
+class AccountLease(Base):
+    """
+    Аренда аккаунта процессом-шардом: пока аренда не истекла, бота аккаунта запускает только её владелец.
+    """
+    __tablename__ = "account_lease"
+
+    account_id = Column(Integer, ForeignKey(Account.id), primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
 Trade.account_id = Column(Integer, ForeignKey(Account.id), nullable=False)
 Trade.account = relationship(Account, back_populates="trades")    
     
@@ -68,4 +145,8 @@ from src.auth.models import User
 Account.user_id = Column(Integer, ForeignKey(User.id), nullable=False)
 Account.user = relationship(User, back_populates="accounts")
 Account.trades = relationship(Trade, back_populates="account")
+
+# Индексы под keyset-пагинацию: сделки аккаунта от новых к старым, аккаунты пользователя по id
+Index("ix_trades_account_id_created_at", Trade.account_id, Trade.created_at, Trade.id)
+Index("ix_account_user_id_id", Account.user_id, Account.id)
     
\ No newline at end of file
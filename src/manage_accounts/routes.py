@@ -1,27 +1,152 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, WebSocket
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.auth.models import User
-from src.manage_accounts.models import Account, AccountStatus
-from src.manage_accounts.schemas import AccountData, AccountCreate, AccountId
-from typing import List
+from src.auth.principals import Principal
+from src.manage_accounts.models import Account, AccountStats, AccountStatus, Category, Exchange, Trade, TradeSide, TradeStatus
+from src.manage_accounts.schemas import AccountData, AccountCreate, AccountId, AccountStatsData
+from src.service.pnl import PositionStats, pnl_aggregator
+from src.service.stream import stream_hub
+from src.service.events import account_events, AccountEvent
+from src.pagination import Page, paginate, project
+from src.config import Config
+from datetime import datetime
+from typing import Optional
 
 accounts_router = APIRouter(prefix="/accounts")
 
+ACCOUNT_COLUMNS = {name: getattr(Account, name) for name in AccountData.model_fields}
+TRADE_COLUMNS = {name: getattr(Trade, name) for name in ("id", "symbol", "side", "price", "quantity", "status", "created_at")}
+
+
 @accounts_router.get("/")
-async def get_accounts(request: Request) -> List[AccountData]:
+async def get_accounts(
+    request: Request,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    symbol: Optional[str] = None,
+    status: Optional[AccountStatus] = None,
+    exchange: Optional[Exchange] = None,
+) -> Page:
     db: AsyncSession = request.state.db
-    user: User = request.state.user
+    user: Principal = request.state.user
     
-    accounts: List[Account] = (await db.execute(select(Account).where(Account.user_id == user.id))).scalars().all()
+    query = select(Account).where(Account.user_id == user.id)
+    if symbol:
+        query = query.where(Account.symbol == symbol)
+    if status:
+        query = query.where(Account.status == status)
+    if exchange:
+        query = query.where(Account.exchange == exchange)
     
-    return [AccountData(**account.__dict__) for account in accounts]
+    return await paginate(db, query, project(ACCOUNT_COLUMNS, fields), [Account.id], cursor, limit)
+
+
+@accounts_router.get("/{id}/trades")
+async def get_trades(
+    id: int,
+    request: Request,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    symbol: Optional[str] = None,
+    side: Optional[TradeSide] = None,
+    status: Optional[TradeStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Page:
+    db: AsyncSession = request.state.db
+    user: Principal = request.state.user
+    
+    # Принадлежность аккаунта проверяется join'ом в том же запросе; чужой аккаунт даёт пустую страницу
+    query = select(Trade).join(Account, Trade.account_id == Account.id).where(Account.id == id, Account.user_id == user.id)
+    if symbol:
+        query = query.where(Trade.symbol == symbol)
+    if side:
+        query = query.where(Trade.side == side)
+    if status:
+        query = query.where(Trade.status == status)
+    if since:
+        query = query.where(Trade.created_at >= since)
+    if until:
+        query = query.where(Trade.created_at < until)
+    
+    return await paginate(db, query, project(TRADE_COLUMNS, fields), [Trade.created_at, Trade.id], cursor, limit, descending=True)
+
+
+@accounts_router.websocket("/stream")
+async def stream_accounts(websocket: WebSocket):
+    """
+    Поток статусов, исполнений и цен по аккаунтам пользователя. Сообщения приходят пачками (JSON-массивами).
+    """
+    db: AsyncSession = websocket.state.db
+    user: Principal = websocket.state.user
+    
+    rows = (await db.execute(
+        select(Account.id, Account.exchange, Account.symbol, Account.category, Account.status).where(Account.user_id == user.id, Account.status != AccountStatus.deleted)
+    )).all()
+    # Соединение с БД не держим на всё время подключения
+    await db.close()
+    
+    await websocket.accept()
+    accounts = {account_id: (exchange, symbol, category) for account_id, exchange, symbol, category, _ in rows}
+    outbox = stream_hub.connect(accounts)
+    for account_id, _, _, _, status in rows:
+        outbox.put(("status", account_id), {"type": "status", "account_id": account_id, "status": status.value})
+    try:
+        await stream_hub.serve(websocket, outbox)
+    finally:
+        stream_hub.disconnect(outbox, accounts)
+
+
+@accounts_router.get("/{id}/stats")
+async def get_account_stats(id: int, request: Request) -> AccountStatsData:
+    db: AsyncSession = request.state.db
+    user: Principal = request.state.user
+    
+    row = (await db.execute(
+        select(Account.deposit, AccountStats).outerjoin(AccountStats, AccountStats.account_id == Account.id)
+        .where(Account.id == id, Account.user_id == user.id)
+    )).first()
+    
+    if row is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    
+    # В процессе, где работает бот аккаунта, отдаём значения из памяти агрегатора
+    stats = pnl_aggregator.get(id)
+    if stats is not None:
+        return AccountStatsData(account_id=id, **stats.as_dict(), live=True)
+    
+    deposit, snapshot = row
+    if snapshot is None:
+        return AccountStatsData(account_id=id, **PositionStats(deposit=deposit).as_dict(), live=False)
+    return AccountStatsData(
+        account_id=id,
+        position=snapshot.position,
+        avg_entry=snapshot.avg_entry,
+        realized_pnl=snapshot.realized_pnl,
+        unrealized_pnl=snapshot.unrealized_pnl,
+        buy_fills=snapshot.buy_fills,
+        sell_fills=snapshot.sell_fills,
+        volume=snapshot.volume,
+        last_price=snapshot.last_price,
+        fees=snapshot.fees,
+        balance=deposit + snapshot.realized_pnl + snapshot.unrealized_pnl,
+        live=False,
+    )
 
 
 @accounts_router.post("/new")
 async def create_account(payload: AccountCreate, request: Request) -> AccountData:
     db: AsyncSession = request.state.db
-    user: User = request.state.user
+    user: Principal = request.state.user
+    
+    # Симулированная биржа — для бумажной торговли и тестов; в боевой конфигурации она выключена
+    if payload.exchange == Exchange.simulated and not Config.allow_simulated_exchange:
+        raise HTTPException(status_code=400, detail="Simulated exchange is disabled")
+    # Эндпоинты v2 обслуживают только инверсные контракты
+    if payload.exchange == Exchange.bybit_v2 and payload.category != Category.inverse:
+        raise HTTPException(status_code=400, detail="Bybit v2 supports only the inverse category")
     
     account = Account(**payload.model_dump(), current_balance_usd=payload.deposit, user_id=user.id)
     db.add(account)
@@ -33,7 +158,7 @@ async def create_account(payload: AccountCreate, request: Request) -> AccountDat
 @accounts_router.delete("/{id}")
 async def delete_account(id: int, request: Request) -> AccountId:
     db: AsyncSession = request.state.db
-    user: User = request.state.user
+    user: Principal = request.state.user
     
     account = (await db.execute(select(Account).where(Account.id == id, Account.user_id == user.id))).scalar()
     
@@ -43,13 +168,14 @@ async def delete_account(id: int, request: Request) -> AccountId:
     account.status = AccountStatus.deleted
     await db.commit()
     await db.refresh(account)
+    account_events.publish(AccountEvent(account_id=account.id, status=account.status))
     
     return AccountId(id=id)
 
 @accounts_router.post("/{id}/start")
 async def start_account(id: int, request: Request) -> AccountId:
     db: AsyncSession = request.state.db
-    user: User = request.state.user
+    user: Principal = request.state.user
     
     account = (await db.execute(select(Account).where(Account.id == id, Account.user_id == user.id))).scalar()
     
@@ -59,13 +185,14 @@ async def start_account(id: int, request: Request) -> AccountId:
     account.status = AccountStatus.running
     await db.commit()
     await db.refresh(account)
+    account_events.publish(AccountEvent(account_id=account.id, status=account.status))
     
     return AccountId(id=id)
 
 @accounts_router.post("/{id}/stop")
 async def stop_account(id: int, request: Request) -> AccountId:
     db: AsyncSession = request.state.db
-    user: User = request.state.user
+    user: Principal = request.state.user
     
     account = (await db.execute(select(Account).where(Account.id == id, Account.user_id == user.id))).scalar()
     
@@ -75,5 +202,6 @@ async def stop_account(id: int, request: Request) -> AccountId:
     account.status = AccountStatus.stopped
     await db.commit()
     await db.refresh(account)
+    account_events.publish(AccountEvent(account_id=account.id, status=account.status))
     
     return AccountId(id=id)
@@ -1,5 +1,6 @@
 from datetime import datetime
 from pydantic import BaseModel
+from src.manage_accounts.models import Category, Exchange, GridSpacing
 
 class AccountData(BaseModel):
     id: int
@@ -13,6 +14,9 @@ class AccountData(BaseModel):
     start_price: float
     end_price: float
     stop_loss: float
+    grid_spacing: str
+    exchange: str
+    category: str
     status: str
     created_at: datetime
 
@@ -26,8 +30,26 @@ class AccountCreate(BaseModel):
     grid_count: int
     end_price: float
     stop_loss: float
+    grid_spacing: GridSpacing = GridSpacing.arithmetic
+    exchange: Exchange = Exchange.bybit_v2
+    category: Category = Category.inverse
     
     
 class AccountId(BaseModel):
-    id: int    
-    
\ No newline at end of file
+    id: int
+
+
+class AccountStatsData(BaseModel):
+    account_id: int
+    position: float
+    avg_entry: float
+    realized_pnl: float
+    unrealized_pnl: float
+    buy_fills: int
+    sell_fills: int
+    volume: float
+    last_price: float
+    fees: float
+    balance: float
+    live: bool  # True — значения из памяти работающего бота, False — последний снимок из БД
+
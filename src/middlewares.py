@@ -1,15 +1,47 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
-from fastapi import Request
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from src.database import engine
 
 # Создаём глобальный async session factory
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
-class SQLAlchemySessionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        async with async_session() as session:
-            request.state.db = session
-            response = await call_next(request)
-            return response
\ No newline at end of file
+
+class LazySession:
+    """
+    Прокси AsyncSession: сессия создаётся при первом обращении, так что запросы без работы с БД
+    (401, кэшированная авторизация, статические ответы) не трогают пул соединений.
+    """
+
+    __slots__ = ("_session",)
+
+    def __init__(self):
+        self._session = None
+
+    def __getattr__(self, name):
+        if self._session is None:
+            self._session = async_session()
+        return getattr(self._session, name)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class SQLAlchemySessionMiddleware:
+    """
+    ASGI-слой, кладущий ленивую сессию в request.state.db и закрывающий её после ответа.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        session = LazySession()
+        scope.setdefault("state", {})["db"] = session
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await session.close()
@@ -0,0 +1,70 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import DateTime, tuple_
+
+MAX_PAGE_SIZE = 500
+
+
+class Page(BaseModel):
+    items: List[dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(values):
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, key_columns):
+    # Курсор приходит от клиента: любая ошибка формы — 400, а не 500
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(key_columns):
+            raise ValueError(cursor)
+        if not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(key_columns, values)
+        ]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def project(columns, fields):
+    """
+    Выбирает колонки по параметру fields ("id,name,..."); без него — все разрешённые колонки.
+    """
+    if not fields:
+        return dict(columns)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return {name: columns[name] for name in names}
+
+
+async def paginate(db, query, columns, key_columns, cursor=None, limit=50, descending=False):
+    """
+    Keyset-пагинация: строки упорядочены по key_columns, страница начинается строго после курсора.
+    Выбираются только колонки columns ({имя: колонка}), ответ собирается из кортежей строк без ORM-объектов.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    names = list(columns)
+    query = query.with_only_columns(*columns.values(), *key_columns)
+    if cursor:
+        key = tuple_(*key_columns)
+        values = tuple_(*decode_cursor(cursor, key_columns))
+        query = query.where(key < values if descending else key > values)
+    order = [column.desc() if descending else column.asc() for column in key_columns]
+    rows = (await db.execute(query.order_by(*order).limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][len(names):])
+    return Page(items=[dict(zip(names, row)) for row in rows], next_cursor=next_cursor)
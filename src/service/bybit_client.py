@@ -1,45 +1,272 @@
 # bybit_client.py
 import aiohttp
+import asyncio
 import time
 import hmac
 import hashlib
+from contextlib import asynccontextmanager
+from functools import partial
 from urllib.parse import urlencode
+from yarl import URL
+from src.service.json_backend import LazyResponse, dumps, loads
+from src.service.metrics import exchange_request_errors, exchange_request_seconds, exchange_scheduler_wait_seconds
+from src.service.rate_limit import Priority, RequestScheduler
+from src.service.resilience import (
+    OK_PREFIX, REJECTED_ERRORS, AuthError, CircuitBreaker, CircuitOpenError, ExchangeError, RateLimitError, TransientError,
+    backoff_delay, classify, classify_http, endpoint_breakers,
+)
+
+# Максимальное число ордеров в одном batch-запросе v5 по категориям
+BATCH_LIMITS = {"spot": 10, "linear": 20, "inverse": 20, "option": 20}
+FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+REQUEST_RETRIES = 2  # повторов запроса внутри клиента; дальше ошибку обрабатывает вызывающий код
+REQUEST_BACKOFF = 0.2  # секунд — база экспоненциальной паузы между повторами
+REQUEST_BACKOFF_CAP = 2
 
 class AsyncBybitClient:
-    def __init__(self, api_key, api_secret, endpoint="https://api.bybit.com"):
+    def __init__(self, api_key, api_secret, endpoint="https://api.bybit.com", session=None, category="inverse", scheduler=None):
         self.api_key = api_key
         self.api_secret = api_secret.encode('utf-8')
+        # HMAC с уже обработанным ключом: на каждый запрос копируется, а не создаётся заново
+        self._mac = hmac.new(self.api_secret, digestmod=hashlib.sha256)
         self.endpoint = endpoint
-        self.session = aiohttp.ClientSession()
+        self.category = category
+        # Приватные запросы проходят через планировщик квоты аккаунта
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler()
+        # Предохранитель аккаунта: ошибки ключа и сбои подряд временно прекращают его запросы
+        self.breaker = CircuitBreaker("account", failure_threshold=5, reset_timeout=60)
+        # Если сессия передана снаружи (общий пул соединений), клиент ей не владеет и не закрывает её
+        self._owns_session = session is None
+        self.session = session if session is not None else aiohttp.ClientSession()
 
     async def close(self):
-        await self.session.close()
+        if self._owns_session and not self.session.closed:
+            await self.session.close()
+
+    def _hmac(self, message):
+        mac = self._mac.copy()
+        mac.update(message.encode('utf-8'))
+        return mac.hexdigest()
+
+    @staticmethod
+    def _query_string(params):
+        # Та же строка подписывается и уходит в запрос как есть, поэтому значения экранируются здесь
+        return urlencode(sorted(params.items()))
 
     def _sign(self, params):
-        # Сортируем параметры и формируем query string для подписи
-        query_string = urlencode(sorted(params.items()))
-        signature = hmac.new(self.api_secret, query_string.encode('utf-8'), hashlib.sha256).hexdigest()
-        return signature
+        return self._hmac(self._query_string(params))
+
+    def _update_rate_limit(self, path, headers, data):
+        # v5 сообщает квоту в заголовках, v2 — в теле ответа; в обоих случаях это квота эндпоинта path
+        if "X-Bapi-Limit-Status" in headers:
+            self.scheduler.update_from_headers(headers, group=path)
+        elif isinstance(data, dict) and "rate_limit_status" in data:
+            self.scheduler.update(
+                path,
+                remaining=data.get("rate_limit_status"),
+                reset_ms=data.get("rate_limit_reset_ms"),
+                limit=data.get("rate_limit"),
+            )
+
+    @asynccontextmanager
+    async def _slot(self, path, priority):
+        # Ожидание слота планировщика пишется отдельно: задержку биржи замеряем только после его получения
+        started = time.perf_counter()
+        async with self.scheduler.slot(priority, group=path):
+            exchange_scheduler_wait_seconds.observe(path, value=time.perf_counter() - started)
+            yield
+
+    def _check(self, path, status, headers, body):
+        """
+        Возвращает классифицированную ошибку ответа или None. Успешный ответ распознаётся по началу тела
+        и не декодируется; тело с ошибкой декодируется, чтобы достать код и учесть квоту.
+        """
+        if status >= 400:
+            return classify_http(status)(path, status, f"HTTP {status}")
+        if OK_PREFIX.match(body):
+            return None
+        try:
+            data = loads(body)
+        except ValueError:
+            return TransientError(path, None, "malformed response")
+        self._update_rate_limit(path, headers, data)
+        code = data.get("ret_code", data.get("retCode", 0))
+        if not code:
+            return None
+        return classify(code)(path, code, data.get("ret_msg", data.get("retMsg", "")))
 
-    async def _request(self, method, path, params=None):
+    def _record(self, path, error, private):
+        endpoint = endpoint_breakers.get(path)
+        if error is None:
+            endpoint.record_success()
+            if private:
+                self.breaker.record_success()
+            return
+        exchange_request_errors.inc(path, error.kind)
+        # Сбой сервиса — проблема эндпоинта, ключ и квота — проблема аккаунта; ошибки параметров не размыкают ничего
+        if isinstance(error, TransientError):
+            endpoint.record_failure()
+        if private and isinstance(error, (AuthError, TransientError)):
+            self.breaker.record_failure()
+
+    def _allow(self, path, private):
+        endpoint = endpoint_breakers.get(path)
+        if not endpoint.allow():
+            exchange_request_errors.inc(path, CircuitOpenError.kind)
+            raise CircuitOpenError(path, endpoint.retry_after(), "endpoint circuit is open")
+        if private and not self.breaker.allow():
+            exchange_request_errors.inc(path, CircuitOpenError.kind)
+            raise CircuitOpenError(path, self.breaker.retry_after(), "account circuit is open")
+
+    async def _call(self, path, send, idempotent, private=True):
+        """
+        Отправляет запрос через предохранители и повторяет его при временных ошибках с экспоненциальной паузой.
+        Лимит запросов повторяется всегда (биржа его не исполняла), сбой — только для идемпотентных запросов:
+        повтор выставления ордера после таймаута может выставить его дважды.
+        """
+        for attempt in range(REQUEST_RETRIES + 1):
+            self._allow(path, private)
+            try:
+                status, headers, body = await send()
+                error = self._check(path, status, headers, body)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = TransientError(path, None, str(e) or type(e).__name__)
+            self._record(path, error, private)
+            if error is None:
+                return status, headers, body
+            retryable = isinstance(error, RateLimitError) or (idempotent and isinstance(error, TransientError))
+            if not retryable or attempt == REQUEST_RETRIES:
+                raise error
+            await asyncio.sleep(backoff_delay(attempt, REQUEST_BACKOFF, REQUEST_BACKOFF_CAP))
+
+    def _on_decode(self, path, headers, data):
+        # Квота v2 учитывается в момент декодирования тела. Непрочитанный ответ квоту не обновит,
+        # но темп всё равно ограничивает собственное ведро токенов планировщика
+        self._update_rate_limit(path, headers, data)
+
+    async def _request(self, method, path, params=None, priority=Priority.normal, idempotent=None):
+        method = method.upper()
+        if method not in ("GET", "POST"):
+            raise ValueError("Unsupported HTTP method")
         if params is None:
             params = {}
-        # Добавляем параметры аутентификации
-        params["api_key"] = self.api_key
-        params["timestamp"] = int(time.time() * 1000)
-        params["recv_window"] = 5000
-        params["sign"] = self._sign(params)
-
-        url = self.endpoint + path
-
-        if method.upper() == "GET":
-            async with self.session.get(url, params=params) as response:
-                return await response.json()
-        elif method.upper() == "POST":
-            async with self.session.post(url, data=params) as response:
-                return await response.json()
+
+        async def send():
+            async with self._slot(path, priority):
+                # Подписываем после получения слота, чтобы timestamp уложился в recv_window; повтор подписывается заново
+                params["api_key"] = self.api_key
+                params["timestamp"] = int(time.time() * 1000)
+                params["recv_window"] = 5000
+                params.pop("sign", None)
+                query_string = self._query_string(params)
+                query_string += "&sign=" + self._hmac(query_string)
+
+                if method == "GET":
+                    request = self.session.get(URL(f"{self.endpoint}{path}?{query_string}", encoded=True))
+                else:
+                    request = self.session.post(self.endpoint + path, data=query_string, headers=FORM_HEADERS)
+                with exchange_request_seconds.time(path):
+                    async with request as response:
+                        return response.status, response.headers, await response.read()
+
+        _, headers, body = await self._call(path, send, method == "GET" if idempotent is None else idempotent)
+        return LazyResponse(body, partial(self._on_decode, path, headers))
+
+    async def _request_v5(self, path, body, priority=Priority.normal, idempotent=False, method="POST"):
+        # GET передаёт body параметрами запроса и подписывает строку запроса, POST — JSON-тело
+        if method == "GET":
+            payload = self._query_string(body)
+            url = URL(f"{self.endpoint}{path}?{payload}", encoded=True)
         else:
-            raise ValueError("Unsupported HTTP method")
+            payload = dumps(body)
+            url = self.endpoint + path
+
+        async def send():
+            async with self._slot(path, priority):
+                # v5 подписывает timestamp + api_key + recv_window + тело (строку запроса) и передаёт подпись в заголовках
+                timestamp = str(int(time.time() * 1000))
+                recv_window = "5000"
+                signature = self._hmac(timestamp + self.api_key + recv_window + payload)
+                headers = {
+                    "X-BAPI-API-KEY": self.api_key,
+                    "X-BAPI-SIGN": signature,
+                    "X-BAPI-SIGN-TYPE": "2",
+                    "X-BAPI-TIMESTAMP": timestamp,
+                    "X-BAPI-RECV-WINDOW": recv_window,
+                    "Content-Type": "application/json",
+                }
+                if method == "GET":
+                    request = self.session.get(url, headers=headers)
+                else:
+                    request = self.session.post(url, data=payload, headers=headers)
+                with exchange_request_seconds.time(path):
+                    async with request as response:
+                        result = response.status, response.headers, await response.read()
+                # v5 сообщает квоту в заголовках — её можно учесть, не декодируя тело
+                self._update_rate_limit(path, response.headers, None)
+                return result
+
+        _, _, body = await self._call(path, send, idempotent)
+        return LazyResponse(body)
+
+    def _chunks(self, items):
+        limit = BATCH_LIMITS.get(self.category, 10)
+        return [items[i:i + limit] for i in range(0, len(items), limit)]
+
+    @staticmethod
+    def _batch_results(response, size):
+        # Результаты batch-ответа в порядке запроса: {"order_id", "order_link_id", "code", "msg"}
+        if response.get("retCode") != 0:
+            return [{"order_id": None, "order_link_id": None, "code": response.get("retCode"), "msg": response.get("retMsg")}] * size
+        items = response.get("result", {}).get("list", [])
+        statuses = response.get("retExtInfo", {}).get("list", [])
+        results = []
+        for i in range(size):
+            item = items[i] if i < len(items) else {}
+            status = statuses[i] if i < len(statuses) else {}
+            results.append({
+                "order_id": item.get("orderId") or None,
+                "order_link_id": item.get("orderLinkId") or None,
+                "code": status.get("code", 0),
+                "msg": status.get("msg", ""),
+            })
+        return results
+
+    async def _batch(self, path, symbol, requests, priority, idempotent=False):
+        chunks = self._chunks([{"symbol": symbol, **request} for request in requests])
+        responses = await asyncio.gather(*(
+            self._request_v5(path, {"category": self.category, "request": chunk}, priority, idempotent) for chunk in chunks
+        ), return_exceptions=True)
+        # Ошибка одной пачки не должна терять результаты остальных. Если биржа пачку отвергла, её ордера точно
+        # не выставлены и возвращаются отклонёнными; при сбое исход неизвестен, и ордера помечаются unknown —
+        # вызывающий код сверяет их с открытыми ордерами, а не считает свободными.
+        # Если биржа отвергла все пачки, ошибка пробрасывается, чтобы вызывающий код учёл её класс
+        errors = [response for response in responses if isinstance(response, BaseException)]
+        for error in errors:
+            if not isinstance(error, ExchangeError):
+                raise error
+        if errors and len(errors) == len(responses) and all(isinstance(error, REJECTED_ERRORS) for error in errors):
+            raise errors[0]
+        results = []
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, ExchangeError):
+                results.extend([{
+                    "order_id": None, "order_link_id": None, "code": response.code, "msg": response.message,
+                    "unknown": not isinstance(response, REJECTED_ERRORS),
+                }] * len(chunk))
+            else:
+                results.extend(self._batch_results(response, len(chunk)))
+        return results
+
+    async def _public_request(self, path, params=None):
+        # Публичные эндпоинты не требуют подписи
+        async def send():
+            with exchange_request_seconds.time(path):
+                async with self.session.get(self.endpoint + path, params=params or {}) as response:
+                    return response.status, response.headers, await response.read()
+
+        _, _, body = await self._call(path, send, idempotent=True, private=False)
+        return LazyResponse(body)
 
     async def latest_information_for_symbol(self, symbol):
         """
@@ -47,9 +274,16 @@ class AsyncBybitClient:
         """
         path = "/v2/public/tickers"
         params = {"symbol": symbol}
-        return await self._request("GET", path, params)
+        return await self._public_request(path, params)
+
+    async def query_symbols(self):
+        """
+        Получает спецификации всех инструментов (шаг цены, шаг и минимум количества).
+        """
+        path = "/v2/public/symbols"
+        return await self._public_request(path)
 
-    async def place_active_order(self, symbol, side, order_type, qty, price=None, time_in_force="GoodTillCancel"):
+    async def place_active_order(self, symbol, side, order_type, qty, price=None, time_in_force="GoodTillCancel", priority=Priority.normal):
         """
         Выставляет активный (лимитный или рыночный) ордер.
         """
@@ -63,9 +297,9 @@ class AsyncBybitClient:
         }
         if price is not None:
             params["price"] = price
-        return await self._request("POST", path, params)
+        return await self._request("POST", path, params, priority)
 
-    async def get_active_order(self, symbol, order_id=None):
+    async def get_active_order(self, symbol, order_id=None, priority=Priority.normal):
         """
         Получает информацию об активном ордере. Если order_id не указан, возвращает все активные ордера для символа.
         """
@@ -73,12 +307,95 @@ class AsyncBybitClient:
         params = {"symbol": symbol}
         if order_id:
             params["order_id"] = order_id
-        return await self._request("GET", path, params)
+        return await self._request("GET", path, params, priority)
 
-    async def cancel_active_order(self, symbol, order_id):
+    async def get_order_list(self, symbol, order_status=None, limit=50, priority=Priority.normal):
         """
-        Отменяет активный ордер по order_id.
+        Получает последние ордера по символу (включая исполненные и отменённые), при необходимости с фильтром по статусу.
+        """
+        path = "/v2/private/order/list"
+        params = {"symbol": symbol, "limit": limit}
+        if order_status:
+            params["order_status"] = order_status
+        return await self._request("GET", path, params, priority)
+
+    async def cancel_active_order(self, symbol, order_id, priority=Priority.critical):
+        """
+        Отменяет активный ордер по order_id. Отмены по умолчанию идут вне очереди.
         """
         path = "/v2/private/order/cancel"
         params = {"symbol": symbol, "order_id": order_id}
-        return await self._request("POST", path, params)
+        return await self._request("POST", path, params, priority, idempotent=True)
+
+    async def batch_place_orders(self, symbol, orders, priority=Priority.normal):
+        """
+        Выставляет несколько ордеров batch-запросами v5 (по BATCH_LIMITS ордеров в запросе).
+        orders: список словарей side, order_type, qty, price, time_in_force, order_link_id.
+        Возвращает результаты в том же порядке, что и orders.
+        """
+        requests = []
+        for order in orders:
+            request = {
+                "side": order["side"],
+                "orderType": order.get("order_type", "Limit"),
+                "qty": str(order["qty"]),
+                "timeInForce": order.get("time_in_force", "GTC"),
+            }
+            if order.get("price") is not None:
+                request["price"] = str(order["price"])
+            if order.get("order_link_id"):
+                request["orderLinkId"] = order["order_link_id"]
+            requests.append(request)
+        return await self._batch("/v5/order/create-batch", symbol, requests, priority)
+
+    async def batch_cancel_orders(self, symbol, order_ids, priority=Priority.critical):
+        """
+        Отменяет несколько ордеров batch-запросами v5. Возвращает результаты в порядке order_ids.
+        """
+        return await self._batch("/v5/order/cancel-batch", symbol, [{"orderId": order_id} for order_id in order_ids], priority, idempotent=True)
+
+    async def get_tickers(self, symbol):
+        """
+        Получает тикер символа (v5).
+        """
+        return await self._public_request("/v5/market/tickers", {"category": self.category, "symbol": symbol})
+
+    async def get_instruments_info(self):
+        """
+        Получает спецификации инструментов категории (v5, одна страница до 1000 символов).
+        """
+        return await self._public_request("/v5/market/instruments-info", {"category": self.category, "limit": 1000})
+
+    async def create_order(self, symbol, side, order_type, qty, price=None, time_in_force="GTC", priority=Priority.normal):
+        """
+        Выставляет ордер (v5). Возвращает orderId без полей ордера.
+        """
+        body = {
+            "category": self.category,
+            "symbol": symbol,
+            "side": side,
+            "orderType": order_type,
+            "qty": str(qty),
+            "timeInForce": time_in_force,
+        }
+        if price is not None:
+            body["price"] = str(price)
+        return await self._request_v5("/v5/order/create", body, priority)
+
+    async def get_open_orders(self, symbol, order_id=None, priority=Priority.normal):
+        """
+        Получает открытые ордера по символу (v5). По order_id возвращает и недавно закрытый ордер.
+        """
+        params = {"category": self.category, "symbol": symbol}
+        if order_id:
+            params["orderId"] = order_id
+        return await self._request_v5("/v5/order/realtime", params, priority, idempotent=True, method="GET")
+
+    async def get_order_history(self, symbol, order_status=None, limit=50, priority=Priority.normal):
+        """
+        Получает историю ордеров по символу (v5), при необходимости с фильтром по статусу.
+        """
+        params = {"category": self.category, "symbol": symbol, "limit": limit}
+        if order_status:
+            params["orderStatus"] = order_status
+        return await self._request_v5("/v5/order/history", params, priority, idempotent=True, method="GET")
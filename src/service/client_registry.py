@@ -0,0 +1,153 @@
+# client_registry.py
+import aiohttp
+from src.config import Config
+from src.manage_accounts.models import Category, Exchange
+from src.service.bybit_client import AsyncBybitClient
+from src.service.connectors.bybit_v2 import BybitV2Connector
+from src.service.connectors.bybit_v5 import BybitV5Connector
+from src.service.connectors.simulated import SimulatedConnector, SimulatedVenue
+from src.service.rate_limit import RequestScheduler
+from src.service.logger import logger
+
+# Коннекторы бирж поверх клиента Bybit; симулированная биржа клиента не использует
+BYBIT_CONNECTORS = {Exchange.bybit_v2: BybitV2Connector, Exchange.bybit_v5: BybitV5Connector}
+
+
+class ClientRegistry:
+    """
+    Реестр клиентов биржи: один AsyncBybitClient на API-ключ и категорию инструментов поверх общего пула соединений
+    и коннекторы бирж аккаунтов поверх этих клиентов. Клиенты одного ключа делят его квоту запросов.
+    """
+
+    def __init__(self, endpoint="https://api.bybit.com", limit=100, limit_per_host=50, keepalive_timeout=30, ttl_dns_cache=300, rate_limit=10, max_concurrency=5, allow_simulated=False):
+        self.endpoint = endpoint
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.rate_limit = rate_limit
+        self.max_concurrency = max_concurrency
+        self._session = None
+        self._clients = {}  # (api_key, category): AsyncBybitClient
+        self._schedulers = {}  # api_key: RequestScheduler
+        self._connectors = {}  # (exchange, api_key, category): ExchangeConnector
+        self._users = {}  # api_key: {account_id} — аккаунты, которые используют клиент и коннекторы ключа
+        self.allow_simulated = allow_simulated
+        self.simulated = SimulatedVenue()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_session(self):
+        # Сессия создаётся лениво, чтобы коннектор привязался к работающему event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.ttl_dns_cache,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def get(self, api_key, api_secret, category=Category.inverse):
+        client = self._clients.get((api_key, category))
+        if client is not None and client.api_secret == api_secret.encode('utf-8'):
+            self.hits += 1
+            return client
+        self.misses += 1
+        scheduler = self._schedulers.get(api_key)
+        if scheduler is None:
+            scheduler = self._schedulers[api_key] = RequestScheduler(rate=self.rate_limit, capacity=self.rate_limit, max_concurrency=self.max_concurrency)
+        client = AsyncBybitClient(
+            api_key=api_key, api_secret=api_secret, endpoint=self.endpoint, session=self._get_session(),
+            category=category.value, scheduler=scheduler,
+        )
+        self._clients[(api_key, category)] = client
+        return client
+
+    def get_for_account(self, account):
+        return self.get(account.api_key, account.secret_key, account.category)
+
+    def get_public(self, category=Category.inverse):
+        # Клиент без ключей для публичных эндпоинтов (тикеры и т.п.)
+        return self.get("", "", category)
+
+    def _connector(self, exchange, api_key, api_secret, category):
+        key = (exchange, api_key, category)
+        connector = self._connectors.get(key)
+        if exchange == Exchange.simulated:
+            if connector is None:
+                connector = self._connectors[key] = SimulatedConnector(self.simulated, api_key)
+            return connector
+        # Клиент мог смениться вместе с секретом — коннектор пересоздаётся поверх актуального клиента
+        client = self.get(api_key, api_secret, category)
+        if connector is None or connector.client is not client:
+            connector = self._connectors[key] = BYBIT_CONNECTORS[exchange](client)
+        return connector
+
+    def get_connector(self, account):
+        if account.exchange == Exchange.simulated:
+            if not self.allow_simulated:
+                raise ValueError("Simulated exchange is disabled (ALLOW_SIMULATED_EXCHANGE)")
+            # Символ симулированной биржи появляется с ценой в середине диапазона сетки
+            self.simulated.ensure(account.symbol, (account.start_price + account.end_price) / 2)
+        self._users.setdefault(account.api_key, set()).add(account.id)
+        return self._connector(account.exchange, account.api_key, account.secret_key, account.category)
+
+    def get_public_connector(self, exchange, category=Category.inverse):
+        return self._connector(exchange, "", "", category)
+
+    async def release(self, account):
+        # Ключ может быть общим для нескольких аккаунтов: клиент и коннекторы закрываются с последним из них
+        users = self._users.get(account.api_key)
+        if users is not None:
+            users.discard(account.id)
+            if users:
+                return
+        await self._drop(account.api_key)
+
+    async def _drop(self, api_key):
+        self._users.pop(api_key, None)
+        self._schedulers.pop(api_key, None)
+        for key in [key for key in self._connectors if key[1] == api_key]:
+            del self._connectors[key]
+        for key in [key for key in self._clients if key[0] == api_key]:
+            await self._clients.pop(key).close()
+
+    async def close(self):
+        for api_key in {api_key for api_key, _ in self._clients}:
+            await self._drop(api_key)
+        self._connectors.clear()
+        self._users.clear()
+        await self.simulated.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        logger.info(f"Client registry closed: {self.stats()}")
+
+    def open_connections(self):
+        if self._session is None or self._session.closed:
+            return 0
+        connector = self._session.connector
+        idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        return idle + len(getattr(connector, "_acquired", ()))
+
+    def stats(self):
+        return {
+            "clients": len(self._clients),
+            "connectors": len(self._connectors),
+            "hits": self.hits,
+            "misses": self.misses,
+            "open_connections": self.open_connections(),
+        }
+
+
+client_registry = ClientRegistry(
+    endpoint=Config.exchange_endpoint,
+    limit=Config.exchange_pool_limit,
+    limit_per_host=Config.exchange_pool_limit_per_host,
+    rate_limit=Config.exchange_rate_limit,
+    max_concurrency=Config.exchange_max_concurrency,
+    allow_simulated=Config.allow_simulated_exchange,
+)
@@ -0,0 +1,128 @@
+# base.py
+import enum
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from decimal import Decimal
+import numpy as np
+from src.service.rate_limit import Priority
+
+
+def _decimals(step):
+    # Число знаков после запятой у шага (0.05 -> 2), чтобы убрать шум float после умножения
+    return max(0, -Decimal(str(step)).normalize().as_tuple().exponent)
+
+
+@dataclass(frozen=True, slots=True)
+class InstrumentSpec:
+    symbol: str
+    tick_size: float
+    qty_step: float
+    min_qty: float
+    min_notional: float = 0.0
+
+    def quantize_prices(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        return np.round(np.round(prices / self.tick_size) * self.tick_size, _decimals(self.tick_size))
+
+    def quantize_quantities(self, quantities):
+        # Количество округляем вниз, чтобы не выйти за депозит
+        quantities = np.asarray(quantities, dtype=np.float64)
+        steps = np.floor(np.round(quantities / self.qty_step, 9))
+        return np.round(steps * self.qty_step, _decimals(self.qty_step))
+
+    def valid(self, prices, quantities):
+        """
+        Маска ордеров, которые биржа примет: не меньше минимального количества и минимального объёма.
+        """
+        return (quantities >= self.min_qty) & (quantities > 0) & (prices > 0) & (prices * quantities >= self.min_notional)
+
+
+class OrderStatus(str, enum.Enum):
+    open = "open"
+    filled = "filled"
+    cancelled = "cancelled"
+    rejected = "rejected"
+
+
+@dataclass(frozen=True, slots=True)
+class Ticker:
+    symbol: str
+    last_price: float
+
+
+@dataclass(frozen=True, slots=True)
+class Order:
+    order_id: str
+    symbol: str
+    side: str  # Buy / Sell
+    order_type: str  # Limit / Market
+    price: float | None
+    qty: float
+    status: OrderStatus
+
+
+@dataclass(frozen=True, slots=True)
+class OrderResult:
+    # Результат одного ордера из пачки: order_id None и ненулевой code — ордер отклонён.
+    # unknown — запрос пачки сорвался и ордер мог быть выставлен
+    order_id: str | None
+    code: int = 0
+    msg: str = ""
+    unknown: bool = False
+
+    @property
+    def ok(self):
+        return self.order_id is not None and self.code == 0
+
+
+class ExchangeConnector(ABC):
+    """
+    Биржа для грид-воркера: нормализованные тикеры, инструменты, ордера и поток исполнений.
+    Стороны ордеров — Buy / Sell, time_in_force — GTC / IOC; ошибки — классы из resilience.
+    """
+
+    @abstractmethod
+    async def ticker(self, symbol) -> Ticker:
+        ...
+
+    @abstractmethod
+    async def instruments(self) -> list[InstrumentSpec]:
+        ...
+
+    @abstractmethod
+    async def place_order(self, symbol, side, order_type, qty, price=None, time_in_force="GTC", priority=Priority.normal) -> Order:
+        ...
+
+    @abstractmethod
+    async def place_orders(self, symbol, orders, priority=Priority.normal) -> list[OrderResult]:
+        """
+        orders: список словарей side, qty, price (и необязательно order_type, time_in_force, order_link_id).
+        Результаты — в порядке orders.
+        """
+
+    @abstractmethod
+    async def cancel_orders(self, symbol, order_ids, priority=Priority.critical) -> list[OrderResult]:
+        ...
+
+    @abstractmethod
+    async def get_order(self, symbol, order_id, priority=Priority.normal) -> Order | None:
+        ...
+
+    @abstractmethod
+    async def open_orders(self, symbol, priority=Priority.normal) -> list[Order]:
+        ...
+
+    @abstractmethod
+    async def order_history(self, symbol, status=None, limit=50, priority=Priority.normal) -> list[Order]:
+        """
+        Последние ордера по символу (включая исполненные и отменённые), при необходимости с фильтром по OrderStatus.
+        """
+
+    @abstractmethod
+    def execution_stream(self, account):
+        """
+        Поток исполнений аккаунта (ExecutionStream): start/close, connected и wait_fills с order_id исполненных ордеров.
+        """
+
+    async def close(self):
+        pass
@@ -0,0 +1,102 @@
+# bybit_v2.py
+from src.service.connectors.base import ExchangeConnector, InstrumentSpec, Order, OrderResult, OrderStatus, Ticker
+from src.service.executions import BybitExecutionStream
+from src.service.rate_limit import Priority
+
+TIME_IN_FORCE = {"GTC": "GoodTillCancel", "IOC": "ImmediateOrCancel", "FOK": "FillOrKill", "PostOnly": "PostOnly"}
+# Статусы ордеров v2 и v5; неизвестные считаются открытыми, их судьбу покажет следующая сверка
+ORDER_STATUSES = {
+    "Filled": OrderStatus.filled,
+    "Cancelled": OrderStatus.cancelled,
+    "PartiallyFilledCanceled": OrderStatus.cancelled,
+    "Deactivated": OrderStatus.cancelled,
+    "Rejected": OrderStatus.rejected,
+}
+# Обратное соответствие для фильтра истории по статусу
+STATUS_NAMES = {OrderStatus.open: "New", OrderStatus.filled: "Filled", OrderStatus.cancelled: "Cancelled", OrderStatus.rejected: "Rejected"}
+
+
+def _float(value):
+    return float(value) if value not in (None, "") else None
+
+
+def _order(item):
+    return Order(
+        order_id=item["order_id"],
+        symbol=item.get("symbol", ""),
+        side=item.get("side", ""),
+        order_type=item.get("order_type", ""),
+        price=_float(item.get("price")),
+        qty=float(item.get("qty") or 0),
+        status=ORDER_STATUSES.get(item.get("order_status"), OrderStatus.open),
+    )
+
+
+def _batch_result(result):
+    return OrderResult(order_id=result["order_id"], code=result["code"] or 0, msg=result["msg"] or "", unknown=result.get("unknown", False))
+
+
+def _items(result):
+    # Список ордеров v2 приходит либо списком, либо страницей {"data": [...], "cursor": ...}
+    if isinstance(result, dict):
+        return result.get("data") or []
+    return result or []
+
+
+class BybitV2Connector(ExchangeConnector):
+    """
+    Bybit v2: тикеры, инструменты и одиночные ордера через v2 REST, пачки ордеров — batch-эндпоинтами v5.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def ticker(self, symbol):
+        response = await self.client.latest_information_for_symbol(symbol=symbol)
+        return Ticker(symbol=symbol, last_price=float(response['result'][0]['last_price']))
+
+    async def instruments(self):
+        response = await self.client.query_symbols()
+        specs = []
+        for item in response.get('result', []):
+            price_filter = item.get('price_filter', {})
+            lot_size_filter = item.get('lot_size_filter', {})
+            specs.append(InstrumentSpec(
+                symbol=item['name'],
+                tick_size=float(price_filter['tick_size']),
+                qty_step=float(lot_size_filter['qty_step']),
+                min_qty=float(lot_size_filter.get('min_trading_qty', 0)),
+                min_notional=float(lot_size_filter.get('min_order_amt', 0)),
+            ))
+        return specs
+
+    async def place_order(self, symbol, side, order_type, qty, price=None, time_in_force="GTC", priority=Priority.normal):
+        response = await self.client.place_active_order(
+            symbol=symbol, side=side, order_type=order_type, qty=qty, price=price,
+            time_in_force=TIME_IN_FORCE.get(time_in_force, time_in_force), priority=priority,
+        )
+        return _order({"symbol": symbol, "side": side, "order_type": order_type, "price": price, "qty": qty, **response['result']})
+
+    async def place_orders(self, symbol, orders, priority=Priority.normal):
+        results = await self.client.batch_place_orders(symbol, orders, priority)
+        return [_batch_result(result) for result in results]
+
+    async def cancel_orders(self, symbol, order_ids, priority=Priority.critical):
+        results = await self.client.batch_cancel_orders(symbol, order_ids, priority)
+        return [_batch_result(result) for result in results]
+
+    async def get_order(self, symbol, order_id, priority=Priority.normal):
+        response = await self.client.get_active_order(symbol=symbol, order_id=order_id, priority=priority)
+        result = response.get('result')
+        return _order(result) if result else None
+
+    async def open_orders(self, symbol, priority=Priority.normal):
+        response = await self.client.get_active_order(symbol=symbol, priority=priority)
+        return [_order(item) for item in _items(response.get('result'))]
+
+    async def order_history(self, symbol, status=None, limit=50, priority=Priority.normal):
+        response = await self.client.get_order_list(symbol=symbol, order_status=STATUS_NAMES.get(status), limit=limit, priority=priority)
+        return [_order(item) for item in _items(response.get('result'))]
+
+    def execution_stream(self, account):
+        return BybitExecutionStream(account)
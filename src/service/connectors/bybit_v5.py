@@ -0,0 +1,81 @@
+# bybit_v5.py
+from src.service.connectors.base import ExchangeConnector, InstrumentSpec, Order, OrderStatus, Ticker
+from src.service.connectors.bybit_v2 import ORDER_STATUSES, STATUS_NAMES, _batch_result, _float
+from src.service.executions import BybitV5ExecutionStream
+from src.service.rate_limit import Priority
+
+
+def _order(item):
+    return Order(
+        order_id=item["orderId"],
+        symbol=item.get("symbol", ""),
+        side=item.get("side", ""),
+        order_type=item.get("orderType", ""),
+        price=_float(item.get("price")),
+        qty=float(item.get("qty") or 0),
+        status=ORDER_STATUSES.get(item.get("orderStatus"), OrderStatus.open),
+    )
+
+
+def _list(response):
+    return (response.get('result') or {}).get('list') or []
+
+
+class BybitV5Connector(ExchangeConnector):
+    """
+    Bybit v5 (единый торговый аккаунт): все запросы через v5 REST, исполнения — приватный поток v5.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def ticker(self, symbol):
+        response = await self.client.get_tickers(symbol)
+        return Ticker(symbol=symbol, last_price=float(_list(response)[0]['lastPrice']))
+
+    async def instruments(self):
+        response = await self.client.get_instruments_info()
+        specs = []
+        for item in _list(response):
+            price_filter = item.get('priceFilter', {})
+            lot_size_filter = item.get('lotSizeFilter', {})
+            specs.append(InstrumentSpec(
+                symbol=item['symbol'],
+                tick_size=float(price_filter['tickSize']),
+                # Спот задаёт шаг количества как basePrecision, деривативы — qtyStep
+                qty_step=float(lot_size_filter.get('qtyStep') or lot_size_filter['basePrecision']),
+                min_qty=float(lot_size_filter.get('minOrderQty', 0)),
+                min_notional=float(lot_size_filter.get('minNotionalValue') or lot_size_filter.get('minOrderAmt') or 0),
+            ))
+        return specs
+
+    async def place_order(self, symbol, side, order_type, qty, price=None, time_in_force="GTC", priority=Priority.normal):
+        response = await self.client.create_order(symbol, side, order_type, qty, price, time_in_force, priority)
+        # v5 возвращает только orderId: остальные поля — из запроса
+        return Order(
+            order_id=response['result']['orderId'], symbol=symbol, side=side, order_type=order_type,
+            price=price, qty=float(qty), status=OrderStatus.open,
+        )
+
+    async def place_orders(self, symbol, orders, priority=Priority.normal):
+        results = await self.client.batch_place_orders(symbol, orders, priority)
+        return [_batch_result(result) for result in results]
+
+    async def cancel_orders(self, symbol, order_ids, priority=Priority.critical):
+        results = await self.client.batch_cancel_orders(symbol, order_ids, priority)
+        return [_batch_result(result) for result in results]
+
+    async def get_order(self, symbol, order_id, priority=Priority.normal):
+        items = _list(await self.client.get_open_orders(symbol, order_id=order_id, priority=priority))
+        return _order(items[0]) if items else None
+
+    async def open_orders(self, symbol, priority=Priority.normal):
+        items = _list(await self.client.get_open_orders(symbol, priority=priority))
+        return [order for order in map(_order, items) if order.status == OrderStatus.open]
+
+    async def order_history(self, symbol, status=None, limit=50, priority=Priority.normal):
+        response = await self.client.get_order_history(symbol, STATUS_NAMES.get(status), limit, priority)
+        return [_order(item) for item in _list(response)]
+
+    def execution_stream(self, account):
+        return BybitV5ExecutionStream(account)
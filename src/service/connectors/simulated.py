@@ -0,0 +1,126 @@
+# simulated.py
+import asyncio
+from src.service.connectors.base import ExchangeConnector, InstrumentSpec, Order, OrderResult, OrderStatus, Ticker
+from src.service.executions import ExecutionStream
+from src.service.rate_limit import Priority
+from src.simulator.matching import MatchingEngine
+
+ORDER_STATUSES = {"New": OrderStatus.open, "Filled": OrderStatus.filled, "Cancelled": OrderStatus.cancelled}
+STATUS_NAMES = {status: name for name, status in ORDER_STATUSES.items()}
+DEFAULT_PRICE = 100.0  # начальная цена символа, для которого нет аккаунта с диапазоном сетки
+
+
+def _order(order):
+    return Order(
+        order_id=order.order_id, symbol=order.symbol, side=order.side, order_type=order.order_type,
+        price=order.fill_price if order.price is None else order.price, qty=order.qty,
+        status=ORDER_STATUSES.get(order.status, OrderStatus.open),
+    )
+
+
+class SimulatedVenue:
+    """
+    Биржа в памяти процесса: общий движок матчинга и фоновое движение цены. Запускается при первом обращении.
+    """
+
+    def __init__(self, engine=None, tick_interval=0.1, tick_size=0.01, qty_step=0.0001, min_qty=0.0001):
+        self.engine = engine if engine is not None else MatchingEngine({})
+        self.tick_interval = tick_interval
+        self.tick_size = tick_size
+        self.qty_step = qty_step
+        self.min_qty = min_qty
+        self._ticker = None
+
+    def ensure(self, symbol, price=DEFAULT_PRICE):
+        self.engine.add_symbol(symbol, price)
+        if self._ticker is None:
+            self._ticker = asyncio.create_task(self._tick())
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.engine.tick()
+
+    async def close(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+            await asyncio.gather(self._ticker, return_exceptions=True)
+            self._ticker = None
+
+
+class SimulatedExecutionStream(ExecutionStream):
+    """
+    Исполнения прямо из движка матчинга: без сети, поэтому поток всегда подключён.
+    """
+
+    def __init__(self, account, engine):
+        super().__init__(account)
+        self.engine = engine
+
+    def _on_fill(self, order):
+        if order.owner == self.account.api_key and order.symbol == self.account.symbol:
+            self._fills.put_nowait(order.order_id)
+
+    def start(self):
+        if not self.connected:
+            self.engine.add_listener(self._on_fill)
+            self.connected = True
+
+    async def close(self):
+        self.engine.remove_listener(self._on_fill)
+        self.connected = False
+
+
+class SimulatedConnector(ExchangeConnector):
+    """
+    Симулированная биржа в памяти: для бумажной торговли и проверки грид-воркера без сети.
+    Ордера принадлежат API-ключу аккаунта, как на настоящей бирже.
+    """
+
+    def __init__(self, venue, owner=""):
+        self.venue = venue
+        self.engine = venue.engine
+        self.owner = owner
+
+    async def ticker(self, symbol):
+        self.venue.ensure(symbol)
+        return Ticker(symbol=symbol, last_price=self.engine.last_price(symbol))
+
+    async def instruments(self):
+        return [
+            InstrumentSpec(symbol=symbol, tick_size=self.venue.tick_size, qty_step=self.venue.qty_step, min_qty=self.venue.min_qty)
+            for symbol in self.engine.paths
+        ]
+
+    async def place_order(self, symbol, side, order_type, qty, price=None, time_in_force="GTC", priority=Priority.normal):
+        self.venue.ensure(symbol)
+        return _order(self.engine.place(self.owner, symbol, side, order_type, qty, price))
+
+    async def place_orders(self, symbol, orders, priority=Priority.normal):
+        self.venue.ensure(symbol)
+        return [
+            OrderResult(order_id=self.engine.place(
+                self.owner, symbol, order["side"], order.get("order_type", "Limit"), order["qty"], order.get("price"),
+            ).order_id)
+            for order in orders
+        ]
+
+    async def cancel_orders(self, symbol, order_ids, priority=Priority.critical):
+        results = []
+        for order_id in order_ids:
+            order = self.engine.cancel(self.owner, symbol, order_id)
+            results.append(OrderResult(order_id=order_id) if order else OrderResult(order_id=None, code=110001, msg="Order does not exist"))
+        return results
+
+    async def get_order(self, symbol, order_id, priority=Priority.normal):
+        order = self.engine.get(self.owner, order_id)
+        return _order(order) if order is not None else None
+
+    async def open_orders(self, symbol, priority=Priority.normal):
+        return [_order(order) for order in self.engine.open_orders(self.owner, symbol)]
+
+    async def order_history(self, symbol, status=None, limit=50, priority=Priority.normal):
+        return [_order(order) for order in self.engine.history(self.owner, symbol, STATUS_NAMES.get(status), limit)]
+
+    def execution_stream(self, account):
+        return SimulatedExecutionStream(account, self.engine)
@@ -0,0 +1,117 @@
+# events.py
+import asyncio
+import json
+from dataclasses import asdict, dataclass
+from sqlalchemy import text
+from src.database import engine
+from src.manage_accounts.models import AccountStatus
+from src.service.logger import logger
+
+
+@dataclass(frozen=True, slots=True)
+class AccountEvent:
+    account_id: int
+    status: AccountStatus
+
+
+@dataclass(frozen=True, slots=True)
+class FillEvent:
+    account_id: int
+    side: str  # buy / sell
+    price: float
+    quantity: float
+
+
+class EventBus:
+    """
+    Внутрипроцессная шина событий: каждый подписчик получает свою очередь.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self):
+        queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def publish(self, event):
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+
+account_events = EventBus()
+fill_events = EventBus()
+# Статусы, которые меняет сам воркер (перевод в error). Отдельная шина: воркер пересылает в API только их,
+# а не все события account_events, которые сам получил от API через LISTEN
+status_events = EventBus()
+
+
+NOTIFY_CHANNEL = "account_events"
+FILLS_CHANNEL = "fill_events"
+STATUS_CHANNEL = "status_events"
+
+
+def encode_event(event):
+    data = asdict(event)
+    if isinstance(event, AccountEvent):
+        data["status"] = event.status.value
+    return json.dumps({"type": type(event).__name__, **data})
+
+
+def decode_event(payload):
+    data = json.loads(payload)
+    if data.pop("type", None) == "FillEvent":
+        return FillEvent(**data)
+    return AccountEvent(account_id=data["account_id"], status=AccountStatus(data["status"]))
+
+
+async def forward_to_postgres(bus, channel=NOTIFY_CHANNEL):
+    """
+    Пересылает события шины в PostgreSQL NOTIFY — для процессов, работающих отдельно (менеджеры шардов, API).
+    """
+    queue = bus.subscribe()
+    try:
+        while True:
+            event = await queue.get()
+            payload = encode_event(event)
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+            except Exception as e:
+                # Потерянный статус подхватит сверка менеджера; потерянное исполнение видно в снимке статистики
+                logger.error(f"Events: failed to notify {payload}: {e}")
+    finally:
+        bus.unsubscribe(queue)
+
+
+async def listen_postgres(bus, channel=NOTIFY_CHANNEL, retry_delay=5):
+    """
+    Слушает PostgreSQL LISTEN и публикует полученные события в локальную шину.
+    """
+    def on_notify(connection, pid, channel, payload):
+        bus.publish(decode_event(payload))
+
+    while True:
+        try:
+            async with engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                driver = raw.driver_connection
+                await driver.add_listener(channel, on_notify)
+                logger.info(f"Events: listening on {channel}")
+                try:
+                    # Держим соединение, проверяя, что оно живо
+                    while not driver.is_closed():
+                        await asyncio.sleep(retry_delay)
+                finally:
+                    if not driver.is_closed():
+                        await driver.remove_listener(channel, on_notify)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Events: listener failed: {e}")
+        await asyncio.sleep(retry_delay)
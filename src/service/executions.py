@@ -0,0 +1,151 @@
+# executions.py
+import asyncio
+import hashlib
+import hmac
+import time
+import websockets
+from src.config import Config
+from src.service.json_backend import dumps, loads
+from src.service.logger import logger
+from src.service.scheduler import timer_wheel
+
+PING_INTERVAL = 20  # секунд, Bybit закрывает соединение без пингов
+RECONNECT_DELAY = 1  # секунд, начальная задержка переподключения
+MAX_RECONNECT_DELAY = 30
+
+
+class ExecutionStream:
+    """
+    Поток исполнений аккаунта: order_id исполненных ордеров сразу попадают в очередь воркера.
+    Источник исполнений задаёт подкласс в _run.
+    """
+
+    def __init__(self, account):
+        self.account = account
+        self.connected = False
+        self._fills = asyncio.Queue()  # order_id исполненных ордеров
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.connected = False
+
+    async def _run(self):
+        raise NotImplementedError
+
+    def _drain(self, filled):
+        while not self._fills.empty():
+            order_id = self._fills.get_nowait()
+            if order_id is not None:
+                filled.add(order_id)
+
+    async def wait_fills(self, timeout):
+        """
+        Ждёт исполнения хотя бы одного ордера не дольше timeout секунд и возвращает все накопившиеся order_id.
+        Таймаут ставится в общее колесо таймеров: по его срабатыванию в очередь кладётся None.
+        None, оставшийся от таймаута прошлого ожидания, отбрасывается до начала нового, иначе оно вернулось бы сразу.
+        """
+        filled = set()
+        self._drain(filled)
+        if not filled:
+            handle = timer_wheel.call_later(timeout, self._fills.put_nowait, None)
+            try:
+                order_id = await self._fills.get()
+            finally:
+                handle.cancel()
+            if order_id is not None:
+                filled.add(order_id)
+            self._drain(filled)
+        return filled
+
+
+class BybitExecutionStream(ExecutionStream):
+    """
+    Приватный WebSocket-поток ордеров Bybit v2.
+    """
+
+    order_id_field = "order_id"
+    order_status_field = "order_status"
+
+    def __init__(self, account, endpoint=None):
+        super().__init__(account)
+        self.endpoint = endpoint or Config.exchange_ws_endpoint
+        self.api_key = account.api_key
+        self.api_secret = account.secret_key.encode('utf-8')
+
+    def _auth_message(self):
+        expires = int((time.time() + 10) * 1000)
+        signature = hmac.new(self.api_secret, f"GET/realtime{expires}".encode('utf-8'), hashlib.sha256).hexdigest()
+        return {"op": "auth", "args": [self.api_key, expires, signature]}
+
+    async def _run(self):
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                async with websockets.connect(self.endpoint, ping_interval=None) as ws:
+                    await ws.send(dumps(self._auth_message()))
+                    await ws.send(dumps({"op": "subscribe", "args": ["order"]}))
+                    pinger = asyncio.create_task(self._ping(ws))
+                    try:
+                        async for message in ws:
+                            if self._handle(loads(message)):
+                                delay = RECONNECT_DELAY
+                    finally:
+                        pinger.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{self.account.name}({self.account.id}): Execution stream error: {e}")
+            self.connected = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(PING_INTERVAL)
+            await ws.send(dumps({"op": "ping"}))
+
+    @staticmethod
+    def _reply_op(message):
+        # Ответ на auth/subscribe: v2 возвращает исходный запрос в поле request
+        return message["request"].get("op") if "request" in message else None
+
+    def _handle(self, message):
+        op = self._reply_op(message)
+        if op is not None:
+            if not message.get("success"):
+                logger.error(f"{self.account.name}({self.account.id}): Execution stream {op} failed: {message.get('ret_msg')}")
+            elif op == "subscribe":
+                self.connected = True
+                logger.info(f"{self.account.name}({self.account.id}): Execution stream subscribed")
+            return self.connected
+        if message.get("topic") != "order":
+            return False
+        for update in message.get("data", []):
+            if update.get("symbol") == self.account.symbol and update.get(self.order_status_field) == "Filled":
+                self._fills.put_nowait(update[self.order_id_field])
+        return True
+
+
+class BybitV5ExecutionStream(BybitExecutionStream):
+    """
+    Приватный WebSocket-поток ордеров Bybit v5: та же подпись auth, поля ордера в camelCase.
+    """
+
+    order_id_field = "orderId"
+    order_status_field = "orderStatus"
+
+    def __init__(self, account, endpoint=None):
+        super().__init__(account, endpoint or Config.exchange_ws_v5_endpoint)
+
+    @staticmethod
+    def _reply_op(message):
+        # v5 отвечает на auth/subscribe/ping полем op и флагом success
+        return message.get("op") if "success" in message else None
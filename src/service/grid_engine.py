@@ -0,0 +1,196 @@
+# grid_engine.py
+from dataclasses import dataclass
+import numpy as np
+
+BUY = 0
+SELL = 1
+SIDE_NAMES = np.array(["Buy", "Sell"])
+
+
+def grid_levels(start_price, end_price, grid_count, spacing="arithmetic"):
+    """
+    Цены уровней сетки (grid_count + 1 штук) с арифметическим или геометрическим шагом.
+    """
+    if spacing == "geometric":
+        return np.geomspace(start_price, end_price, grid_count + 1)
+    return np.linspace(start_price, end_price, grid_count + 1)
+
+
+@dataclass(slots=True)
+class GridDiff:
+    place: np.ndarray  # индексы ячеек, для которых нужно выставить ордер
+    cancel: np.ndarray  # индексы ячеек, чей живой ордер нужно отменить
+
+
+class GridEngine:
+    """
+    Состояние сетки в массивах NumPy. Ордера те же, что у исходного бота: покупка на каждом уровне levels[:-1]
+    и продажа на каждом уровне levels[1:] — 2 * grid_count ячеек, по ордеру в каждой. Исполненный ордер
+    сменяется ордером противоположной стороны на той же цене. Покупка и продажа на одном уровне — разные ячейки,
+    поэтому они не вытесняют друг друга, как совпадающие ключи словаря orders.
+    """
+
+    def __init__(self, levels, quantities):
+        self.levels = np.asarray(levels, dtype=np.float64)
+        count = len(self.levels) - 1
+        self.price = np.concatenate([self.levels[:-1], self.levels[1:]])
+        self.initial_side = np.repeat(np.array([BUY, SELL], dtype=np.int8), count)
+        size = len(self.price)
+        self.quantity = np.asarray(quantities, dtype=np.float64)
+        self.spec = None  # InstrumentSpec, по которому квантованы цены и количества
+        self.side = self.initial_side.copy()
+        self.enabled = np.ones(size, dtype=bool)
+        # Фактическое состояние: живой ордер ячейки, его сторона и цена
+        self.live = np.zeros(size, dtype=bool)
+        self.order_side = np.full(size, BUY, dtype=np.int8)
+        self.order_price = np.zeros(size, dtype=np.float64)
+        self.order_ids = np.full(size, None, dtype=object)
+        self._cells_by_order = {}  # order_id: индекс ячейки
+        # Ячейки, выставление ордера в которых сорвалось с неизвестным исходом: до сверки с биржей не выставляются
+        self.unknown = np.zeros(size, dtype=bool)
+        # Сетка остановлена стоплоссом: ордера только отменяются, пока цена не вернётся к порогу
+        self.halted = False
+        # Ячейки, изменённые с последнего сохранения состояния
+        self.dirty = np.zeros(size, dtype=bool)
+
+    @classmethod
+    def from_account(cls, account, spacing="arithmetic", spec=None):
+        """
+        Строит сетку аккаунта: количество ордера — депозит / grid_count / цена, как в compute_quantity.
+        Если передана спецификация инструмента, цены и количества квантуются по шагу цены/лота,
+        а ячейки, которые биржа отклонит, выключаются ещё до отправки ордеров.
+        """
+        levels = grid_levels(account.start_price, account.end_price, account.grid_count, spacing)
+        if spec is None:
+            levels = np.round(levels, 2)
+            prices = np.concatenate([levels[:-1], levels[1:]])
+            return cls(levels, np.round(account.deposit / account.grid_count / prices, 4))
+        levels = spec.quantize_prices(levels)
+        prices = np.concatenate([levels[:-1], levels[1:]])
+        quantities = spec.quantize_quantities(account.deposit / account.grid_count / np.maximum(prices, spec.tick_size))
+        engine = cls(levels, quantities)
+        engine.spec = spec
+        # Соседние уровни, слившиеся после округления до шага цены, дали бы повторные ордера на одной цене
+        distinct = np.tile(levels[1:] > levels[:-1], 2)
+        engine.enabled = distinct & spec.valid(prices, quantities)
+        return engine
+
+    def __len__(self):
+        return len(self.price)
+
+    def desired_price(self):
+        return self.price
+
+    def diff(self):
+        """
+        Сравнивает желаемое и фактическое состояние за один векторный проход.
+        Ордер отменяется, если ячейка выключена или ордер не совпадает по стороне/цене; выставляется там, где ордера нет
+        и исход прошлого выставления известен. Остановленная сетка отменяет все ордера и ничего не выставляет.
+        """
+        if self.halted:
+            return GridDiff(place=np.empty(0, dtype=np.intp), cancel=np.flatnonzero(self.live))
+        stale = self.live & (~self.enabled | (self.order_side != self.side) | (self.order_price != self.desired_price()))
+        place = self.enabled & ~self.unknown & (~self.live | stale)
+        return GridDiff(place=np.flatnonzero(place), cancel=np.flatnonzero(stale))
+
+    def placements(self, cells):
+        """
+        Список (cell, side, price, quantity) для выставления ордеров в ячейках cells.
+        """
+        prices = self.desired_price()[cells]
+        return list(zip(cells.tolist(), SIDE_NAMES[self.side[cells]].tolist(), prices.tolist(), self.quantity[cells].tolist()))
+
+    def orders(self, cells):
+        return [
+            {"order_id": self.order_ids[cell], "side": SIDE_NAMES[self.order_side[cell]].lower(),
+             "price": float(self.order_price[cell]), "quantity": float(self.quantity[cell])}
+            for cell in cells.tolist()
+        ]
+
+    def assign(self, placed):
+        """
+        Запоминает выставленные ордера: placed — {cell: order}.
+        """
+        if not placed:
+            return
+        cells = np.fromiter(placed.keys(), dtype=np.intp, count=len(placed))
+        self.dirty[cells] = True
+        self.live[cells] = True
+        self.order_side[cells] = self.side[cells]
+        self.order_price[cells] = self.desired_price()[cells]
+        for cell, order in placed.items():
+            self.order_ids[cell] = order['order_id']
+            self._cells_by_order[order['order_id']] = cell
+
+    def clear(self, cells):
+        for order_id in self.order_ids[cells]:
+            self._cells_by_order.pop(order_id, None)
+        self.live[cells] = False
+        self.order_ids[cells] = None
+        self.dirty[cells] = True
+
+    def fill(self, order_ids):
+        """
+        Отмечает ордера исполненными и переворачивает сторону их ячеек. Возвращает индексы ячеек.
+        """
+        cells = np.array([self._cells_by_order[order_id] for order_id in order_ids if order_id in self._cells_by_order], dtype=np.intp)
+        if len(cells):
+            self.side[cells] = 1 - self.order_side[cells]
+            self.clear(cells)
+        return cells
+
+    def total_quantity(self, cells):
+        """
+        Суммарное количество ордеров ячеек для одного рыночного ордера, приведённое к шагу лота.
+        """
+        total = self.quantity[cells].sum()
+        if self.spec is None:
+            return round(float(total), 4)
+        return float(self.spec.quantize_quantities(total))
+
+    def cell_of(self, order_id):
+        return self._cells_by_order.get(order_id)
+
+    def live_cells(self, side=None):
+        mask = self.live if side is None else self.live & (self.order_side == side)
+        return np.flatnonzero(mask)
+
+    def reset(self, cells):
+        """
+        Возвращает ячейкам исходную сторону, например после стоплосса.
+        """
+        self.clear(cells)
+        self.side[cells] = self.initial_side[cells]
+
+    def take_dirty(self):
+        """
+        Возвращает ячейки, изменённые с прошлого вызова, и сбрасывает отметки.
+        """
+        cells = np.flatnonzero(self.dirty)
+        self.dirty[cells] = False
+        return cells
+
+    def restore(self, cells, sides, order_ids, order_prices):
+        """
+        Восстанавливает сохранённое состояние: сторону ячеек и их живые ордера (order_id None — ордера нет).
+        """
+        cells = np.asarray(cells, dtype=np.intp)
+        self.side[cells] = sides
+        for cell, order_id, price in zip(cells.tolist(), order_ids, order_prices):
+            if order_id is None:
+                continue
+            self.live[cell] = True
+            self.order_side[cell] = self.side[cell]
+            self.order_price[cell] = price
+            self.order_ids[cell] = order_id
+            self._cells_by_order[order_id] = cell
+
+    def match(self, side, price):
+        """
+        Ищет ячейку без живого ордера, которой нужен ордер с такой стороной и ценой; ячейки с неизвестным исходом — первыми.
+        """
+        candidates = np.flatnonzero(~self.live & self.enabled & (self.side == side) & np.isclose(self.desired_price(), price))
+        if not len(candidates):
+            return None
+        preferred = candidates[self.unknown[candidates]]
+        return int(preferred[0] if len(preferred) else candidates[0])
@@ -0,0 +1,69 @@
+# grid_state.py
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from datetime import datetime
+from src.database import engine
+from src.manage_accounts.models import GridOrder, GridOrderStatus, TradeSide
+from src.service.grid_engine import BUY, SELL
+
+async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+SIDES = {BUY: TradeSide.buy, SELL: TradeSide.sell}
+SIDE_CODES = {TradeSide.buy: BUY, TradeSide.sell: SELL}
+
+
+class GridStateStore:
+    """
+    Хранение состояния ячеек сетки в grid_orders: одна строка на ячейку, изменённые ячейки сохраняются одним upsert.
+    """
+
+    async def load(self, account_id):
+        async with async_session() as session:
+            result = await session.execute(
+                select(GridOrder.cell, GridOrder.side, GridOrder.order_id, GridOrder.price, GridOrder.status)
+                .where(GridOrder.account_id == account_id)
+                .order_by(GridOrder.cell)
+            )
+            return result.all()
+
+    async def save(self, account_id, grid):
+        cells = grid.take_dirty()
+        if not len(cells):
+            return
+        prices = grid.desired_price()
+        now = datetime.now()
+        rows = [
+            {
+                "account_id": account_id,
+                "cell": cell,
+                "side": SIDES[int(grid.side[cell])],
+                "price": float(grid.order_price[cell] if grid.live[cell] else prices[cell]),
+                "quantity": float(grid.quantity[cell]),
+                "order_id": grid.order_ids[cell],
+                "status": GridOrderStatus.open if grid.live[cell] else GridOrderStatus.idle,
+                "updated_at": now,
+            }
+            for cell in cells.tolist()
+        ]
+        query = insert(GridOrder)
+        query = query.on_conflict_do_update(
+            index_elements=[GridOrder.account_id, GridOrder.cell],
+            set_={name: query.excluded[name] for name in ("side", "price", "quantity", "order_id", "status", "updated_at")},
+        )
+        try:
+            async with async_session() as session:
+                await session.execute(query, rows)
+                await session.commit()
+        except BaseException:
+            # Запись не прошла или отменена: отметки возвращаются, ячейки сохранит следующий вызов
+            grid.dirty[cells] = True
+            raise
+
+    async def clear(self, account_id):
+        async with async_session() as session:
+            await session.execute(delete(GridOrder).where(GridOrder.account_id == account_id))
+            await session.commit()
+
+
+grid_state = GridStateStore()
@@ -1,82 +1,138 @@
 # grid_worker.py
 import asyncio
-from src.service.bybit_client import AsyncBybitClient
-from src.service.logger import logger
-from sqlalchemy.ext.asyncio import AsyncSession
-from src.database import engine
-from src.manage_accounts.models import Account, Trade, TradeStatus
-
-# Функция для создания асинхронного клиента Bybit
-async def create_client(account: Account):
-    client = AsyncBybitClient(
-        api_key=account.api_key,
-        api_secret=account.secret_key
-    )
-    return client
+import time
+from datetime import datetime
+from functools import partial
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.database import engine as db_engine
+from src.service.client_registry import client_registry
+from src.service.connectors.base import OrderStatus
+from src.service.market_data import market_data_hub
+from src.service.events import account_events, fill_events, status_events, AccountEvent, FillEvent
+from src.service.rate_limit import Priority
+from src.service.grid_engine import GridEngine, BUY, SELL
+from src.service.grid_state import grid_state, SIDE_CODES
+from src.service.instruments import instrument_cache
+from src.service.logger import logger, log_sampler
+from src.service.scheduler import MAX_CHECK_INTERVAL, next_check_delay, timer_wheel
+from src.service.pnl import pnl_aggregator
+from src.service.stop_loss import stop_loss_watcher
+from src.service.resilience import AuthError, CircuitOpenError, ExchangeError, backoff_delay
+from src.service.metrics import grid_cycle_last_seconds, grid_cycle_seconds, grid_orders, trade_enqueue_seconds
+from src.service.trade_writer import trade_writer
+from src.manage_accounts.models import Account, AccountStatus, GridOrderStatus, TradeSide, TradeStatus
+
+async_session = async_sessionmaker(db_engine, expire_on_commit=False)
+
+PRICE_MAX_AGE = 5  # секунд: более старая котировка считается устаревшей
+PRICE_TIMEOUT = 30  # секунд ожидания свежей котировки
+CYCLE_INTERVAL = 5  # секунд между циклами без исполнений, если WebSocket недоступен
+RECONCILE_INTERVAL = 60  # секунд между сверками ордеров через REST при живом WebSocket
+ERROR_BACKOFF = 1  # секунд — база паузы после цикла с ошибкой
+ERROR_BACKOFF_CAP = 120
+AUTH_FAILURE_LIMIT = 3  # циклов подряд с ошибкой авторизации, после которых аккаунт переводится в error
+
+# Сообщения горячего пути форматируются лениво: поля передаются аргументами и попадают в extra JSON-логов
+PLACED_MESSAGE = "{account}({account_id}): Placed limit {side} order at {price} with quantity {quantity}"
+CANCELLED_MESSAGE = "{account}({account_id}): Cancelled order {order_id} at price {price}"
+EXECUTED_MESSAGE = "{account}({account_id}): Order in cell {cell} executed, side: {side}"
+
+# Получение коннектора биржи аккаунта из общего реестра (один клиент на API-ключ)
+async def get_connector(account: Account):
+    return client_registry.get_connector(account)
 
-# Получение текущей цены по инструменту
+# Получение текущей цены по инструменту из общего потока тикеров биржи аккаунта
 async def get_current_price(account: Account):
-    client = await create_client(account)
-    response = await client.latest_information_for_symbol(symbol=account.symbol)
-    price = response['result'][0]['last_price']
-    return float(price)
+    return await market_data_hub.get_price(account.symbol, account.exchange, max_age=PRICE_MAX_AGE, timeout=PRICE_TIMEOUT, category=account.category)
 
-# Сохранение сделки (ордера) в БД
+# Сохранение сделки (ордера) в БД через очередь отложенной записи
 async def record_trade(account: Account, order_info):
-    async with AsyncSession(engine) as session:
-        trade = Trade(
-            symbol=account.symbol,
-            side=order_info['side'],
-            price=order_info['price'],
-            quantity=order_info['quantity'],
-            status=TradeStatus.open
-        )
-        trade.account_id = account.id
-        session.add(trade)
-        await session.commit()
-        logger.info(f"{account.name}({account.id}): Recorded trade {trade}")
+    with trade_enqueue_seconds.time():
+        await trade_writer.put({
+            "account_id": account.id,
+            "symbol": account.symbol,
+            "side": TradeSide(order_info['side']),
+            "price": order_info['price'],
+            "quantity": order_info['quantity'],
+            "status": TradeStatus.open,
+            "created_at": datetime.now(),
+        })
 
 # Выставление лимитного ордера
 async def place_limit_order(account: Account, symbol: str, side: str, price: float, quantity: float):
-    client = await create_client(account)
-    order = await client.place_active_order(
-        symbol=symbol,
-        side=side,
-        order_type="Limit",
-        qty=quantity,
-        price=price,
-        time_in_force="GoodTillCancel"
-    )
-    logger.info(f"{account.name}({account.id}): Placed limit {side} order at {price} with quantity {quantity}")
+    connector = await get_connector(account)
+    order = await connector.place_order(symbol, side, "Limit", quantity, price, time_in_force="GTC")
+    logger.info(PLACED_MESSAGE, account=account.name, account_id=account.id, side=side, price=price, quantity=quantity)
+    grid_orders.inc("placed")
     # Дублируем ордер в БД
     await record_trade(account, {"side": side.lower(), "price": price, "quantity": quantity})
-    # Добавляем поле side для дальнейшей обработки
-    order['side'] = side.lower()
-    return order
+    # Оставляем только поля, нужные для дальнейшей обработки
+    return {"order_id": order.order_id, "side": side.lower(), "price": price, "quantity": quantity}
+
+# Выставление пачки лимитных ордеров batch-запросами: placements — список (key, side, price, quantity)
+# Возвращает {key: order} для успешно выставленных ордеров и ключи ордеров с неизвестным исходом
+async def place_limit_orders(account: Account, symbol: str, placements):
+    if not placements:
+        return {}, []
+    connector = await get_connector(account)
+    results = await connector.place_orders(symbol, [
+        {"side": side, "order_type": "Limit", "qty": quantity, "price": price, "time_in_force": "GTC"}
+        for _, side, price, quantity in placements
+    ])
+    placed, unknown = {}, []
+    for (key, side, price, quantity), result in zip(placements, results):
+        if result.unknown:
+            logger.warning(f"{account.name}({account.id}): Limit {side} order at {price} may have been placed: {result.msg}")
+            unknown.append(key)
+            continue
+        if not result.ok:
+            logger.error(f"{account.name}({account.id}): Failed to place limit {side} order at {price}: {result.msg}")
+            grid_orders.inc("rejected")
+            continue
+        grid_orders.inc("placed")
+        logger.info(PLACED_MESSAGE, account=account.name, account_id=account.id, side=side, price=price, quantity=quantity)
+        await record_trade(account, {"side": side.lower(), "price": price, "quantity": quantity})
+        placed[key] = {"order_id": result.order_id, "side": side.lower(), "price": price, "quantity": quantity}
+    return placed, unknown
 
 # Проверка исполнения ордера
 async def check_order_executed(account: Account, order: dict):
-    client = await create_client(account)
-    response = await client.get_active_order(symbol=account.symbol, order_id=order['order_id'])
-    order_status = response['result']['order_status']
-    return order_status == "Filled"
+    connector = await get_connector(account)
+    order = await connector.get_order(account.symbol, order['order_id'], priority=Priority.low)
+    return order is not None and order.status == OrderStatus.filled
 
 # Отмена отдельного ордера
 async def cancel_order(account: Account, order: dict):
-    client = await create_client(account)
-    await client.cancel_active_order(symbol=account.symbol, order_id=order['order_id'])
-    logger.info(f"{account.name}({account.id}): Cancelled order {order['order_id']} at price {order['price']}")
+    connector = await get_connector(account)
+    [result] = await connector.cancel_orders(account.symbol, [order['order_id']])
+    if not result.ok:
+        logger.error(f"{account.name}({account.id}): Failed to cancel order {order['order_id']}: {result.msg}")
+        return
+    grid_orders.inc("cancelled")
+    logger.info(CANCELLED_MESSAGE, account=account.name, account_id=account.id, order_id=order['order_id'], price=order['price'])
+
+# Отмена пачки ордеров batch-запросами
+async def cancel_orders(account: Account, orders):
+    if not orders:
+        return
+    connector = await get_connector(account)
+    results = await connector.cancel_orders(account.symbol, [order['order_id'] for order in orders])
+    for order, result in zip(orders, results):
+        if not result.ok:
+            logger.error(f"{account.name}({account.id}): Failed to cancel order {order['order_id']}: {result.msg}")
+        else:
+            logger.info(CANCELLED_MESSAGE, account=account.name, account_id=account.id, order_id=order['order_id'], price=order.get('price'))
+            grid_orders.inc("cancelled")
 
 # Метод для отмены всех активных ордеров на аккаунте
 async def cancel_all_orders_for_account(account: Account):
-    client = await create_client(account)
+    connector = await get_connector(account)
     try:
-        response = await client.get_active_order(symbol=account.symbol)
-        orders = response.get('result', [])
+        orders = await connector.open_orders(account.symbol)
         if orders:
-            for order in orders:
-                await client.cancel_active_order(symbol=account.symbol, order_id=order['order_id'])
-                logger.info(f"{account.name}({account.id}): Cancelled order {order['order_id']} at price {order.get('price')}")
+            await cancel_orders(account, [{"order_id": order.order_id, "price": order.price} for order in orders])
         else:
             logger.info(f"{account.name}({account.id}): No active orders to cancel.")
     except Exception as e:
@@ -84,82 +140,263 @@ async def cancel_all_orders_for_account(account: Account):
 
 # Выставление рыночного ордера на продажу (для stoploss)
 async def place_market_sell(account, symbol, quantity):
-    client = await create_client(account)
-    order = await client.place_active_order(
-        symbol=symbol,
-        side="Sell",
-        order_type="Market",
-        qty=quantity,
-        time_in_force="ImmediateOrCancel"
-    )
+    connector = await get_connector(account)
+    order = await connector.place_order(symbol, "Sell", "Market", quantity, time_in_force="IOC", priority=Priority.critical)
     logger.info(f"{account.name}({account.id}): Placed market sell order with quantity {quantity}")
-    await record_trade(account, {"side": "sell", "price": order.get('price', 0), "quantity": quantity})
+    await record_trade(account, {"side": "sell", "price": order.price or 0, "quantity": quantity})
     return order
 
-# Простейший расчёт количества для ордера
-def compute_quantity(account, price, side):
-    quantity = account.deposit / account.grid_count / price
-    return round(quantity, 4)
-
-# Проверка условия стоплосса для ордеров на продажу
-async def check_stop_loss(account, current_price, orders):
-    if current_price < account.stop_loss:
-        for level, order in list(orders.items()):
-            if order['side'] == 'sell':
-                await cancel_order(account, order)
-                logger.info(f"{account.name}({account.id}): Stoploss triggered at level {level}")
-                market_order = await place_market_sell(account, account.symbol, order['quantity'])
-                orders.pop(level, None)
+# Проверка условия стоплосса: ниже порога сетка останавливается — все ордера отменяются, объём живых продаж
+# продаётся по рынку, и новые ордера не выставляются, пока цена не вернётся к порогу
+async def check_stop_loss(account, current_price, engine):
+    if current_price >= account.stop_loss:
+        if engine.halted:
+            engine.halted = False
+            logger.info(f"{account.name}({account.id}): Price {current_price} recovered to stoploss {account.stop_loss}, resuming grid")
+        return
+    engine.halted = True
+    live = engine.live_cells()
+    if not len(live):
+        return
+    triggered = engine.live_cells(SELL)
+    logger.info(f"{account.name}({account.id}): Stoploss triggered at levels {engine.price[triggered].tolist()}, grid halted")
+    # Отменяем все ордера одной пачкой и продаём объём ордеров на продажу одним рыночным ордером
+    await cancel_orders(account, engine.orders(live))
+    quantity = engine.total_quantity(triggered)
+    engine.reset(live)
+    if quantity > 0:
+        await place_market_sell(account, account.symbol, quantity)
+        pnl_aggregator.record_fills(account.id, [SELL], [current_price], [quantity])
+        fill_events.publish(FillEvent(account_id=account.id, side="sell", price=current_price, quantity=quantity))
+
+# Срабатывание стоплосса из общего наблюдателя: ордера сетки меняются только под блокировкой аккаунта.
+# Сетка останавливается ещё до ожидания блокировки, чтобы sync_orders, который её держит, не выставлял новых ордеров
+async def trigger_stop_loss(account, engine, lock, price):
+    engine.halted = True
+    async with lock:
+        await check_stop_loss(account, price, engine)
+        await grid_state.save(account.id, engine)
+
+# Привязка открытых ордеров биржи, которых нет в сетке, к ячейкам, ждущим ордер с такой стороной и ценой.
+# Ордера, которым ячейка не нашлась, отменяются. Ячейки с неизвестным исходом после этого снова выставляются
+async def adopt_open_orders(account, engine, open_orders=None):
+    if open_orders is None:
+        connector = await get_connector(account)
+        open_orders = await connector.open_orders(account.symbol, priority=Priority.high)
+    adopted, orphans = 0, []
+    for order in open_orders:
+        if engine.cell_of(order.order_id) is not None:
+            continue
+        cell = engine.match(BUY if order.side == "Buy" else SELL, order.price)
+        if cell is None:
+            orphans.append({"order_id": order.order_id, "price": order.price})
+        else:
+            engine.assign({cell: {"order_id": order.order_id}})
+            adopted += 1
+    await cancel_orders(account, orphans)
+    engine.unknown[:] = False
+    return adopted, len(orphans)
+
+# Приводит ордера на бирже к желаемому состоянию сетки: отмена устаревших и выставление недостающих пачками.
+# Если выставление сорвалось с неизвестным исходом, ячейки сверяются с открытыми ордерами до следующих выставлений:
+# иначе ордер, всё-таки дошедший до биржи, был бы выставлен второй раз
+async def sync_orders(account, engine):
+    if engine.unknown.any():
+        await adopt_open_orders(account, engine)
+    diff = engine.diff()
+    if len(diff.cancel):
+        await cancel_orders(account, engine.orders(diff.cancel))
+        engine.clear(diff.cancel)
+    # Стоплосс мог сработать, пока шла отмена: его обработчик ждёт блокировку, выставлять уже нечего
+    if engine.halted:
+        return
+    placed, unknown = await place_limit_orders(account, account.symbol, engine.placements(diff.place))
+    engine.assign(placed)
+    if unknown:
+        engine.unknown[unknown] = True
+        adopted, orphans = await adopt_open_orders(account, engine)
+        logger.info(f"{account.name}({account.id}): Reconciled {len(unknown)} orders with unknown outcome: {adopted} adopted, {orphans} orphans cancelled")
+
+# Ордера исполнены: ячейки переворачиваются, ордера противоположной стороны выставит sync_orders
+def handle_executed(account, engine, order_ids):
+    cells = engine.fill(order_ids)
+    grid_orders.inc("filled", value=len(cells))
+    pnl_aggregator.record_fills(account.id, 1 - engine.side[cells], engine.order_price[cells], engine.quantity[cells])
+    for cell, side, price, quantity in zip(cells.tolist(), engine.side[cells].tolist(), engine.order_price[cells].tolist(), engine.quantity[cells].tolist()):
+        filled_side = "buy" if side == SELL else "sell"
+        logger.info(EXECUTED_MESSAGE, account=account.name, account_id=account.id, cell=cell, side=filled_side, price=price)
+        fill_events.publish(FillEvent(account_id=account.id, side=filled_side, price=price, quantity=quantity))
+
+# Восстановление сетки после перезапуска: сохранённое состояние сверяется с открытыми ордерами биржи,
+# чтобы продолжить работу без повторного выставления уже стоящих ордеров
+async def recover_grid(account, engine):
+    rows = [row for row in await grid_state.load(account.id) if row.cell < len(engine)]
+    engine.restore(
+        [row.cell for row in rows],
+        [SIDE_CODES[row.side] for row in rows],
+        [row.order_id if row.status == GridOrderStatus.open else None for row in rows],
+        [row.price for row in rows],
+    )
+    engine.take_dirty()
+
+    connector = await get_connector(account)
+    open_orders = {order.order_id: order for order in await connector.open_orders(account.symbol, priority=Priority.high)}
+
+    # Ордера из сохранённого состояния, которых нет среди открытых: исполнены или отменены, пока бот не работал.
+    # Сначала смотрим одну страницу истории исполненных; ордера, не попавшие в неё, запрашиваем по id,
+    # чтобы не выставить заново ордер, который на самом деле исполнен или ещё стоит
+    missing = [order_id for order_id in engine.order_ids[engine.live_cells()] if order_id not in open_orders]
+    filled, gone = set(), []
+    if missing:
+        history = await connector.order_history(account.symbol, OrderStatus.filled, priority=Priority.high)
+        filled = {order.order_id for order in history if order.status == OrderStatus.filled} & set(missing)
+        unknown = [order_id for order_id in missing if order_id not in filled]
+        orders = await asyncio.gather(*(
+            connector.get_order(account.symbol, order_id, priority=Priority.high) for order_id in unknown
+        ))
+        for order_id, order in zip(unknown, orders):
+            if order is not None and order.status == OrderStatus.filled:
+                filled.add(order_id)
+            elif order is None or order.status != OrderStatus.open:
+                gone.append(order_id)
+        handle_executed(account, engine, [order_id for order_id in missing if order_id in filled])
+        # Отменённые и отклонённые: ячейка выставит ордер той же стороны заново
+        engine.clear(np.array([engine.cell_of(order_id) for order_id in gone], dtype=np.intp))
+
+    # Открытые ордера, которых нет в состоянии (выставлены прямо перед падением): привязываем к ячейке или отменяем
+    _, orphans = await adopt_open_orders(account, engine, open_orders.values())
+    await grid_state.save(account.id, engine)
+    logger.info(
+        f"{account.name}({account.id}): Recovered grid: {len(engine.live_cells())} live orders, "
+        f"{len(filled)} filled while down, {len(gone)} gone, {orphans} orphans cancelled"
+    )
+
+# Подготовка сетки: уровни с учётом шага цены и лота инструмента, позиция, поток исполнений и стоплосс.
+# Вызывается из цикла бота, поэтому её ошибки биржи и БД обрабатываются так же, как ошибки цикла
+async def start_grid(account, lock):
+    # Коннектор создаётся первым: симулированная биржа заводит символ аккаунта при его создании
+    connector = await get_connector(account)
+    spec = await instrument_cache.get(account.symbol, account.exchange, account.category)
+    engine = GridEngine.from_account(account, account.grid_spacing.value, spec)
+    logger.info(f"{account.name}({account.id}): Starting grid bot with {len(engine)} cells, levels {engine.levels.tolist()}")
+    if not engine.enabled.all():
+        logger.warning(f"{account.name}({account.id}): {int((~engine.enabled).sum())} cells below exchange minimums are disabled")
+    
+    await pnl_aggregator.load(account)
+    stream = connector.execution_stream(account)
+    stream.start()
+    # Пересечение стоплосса ловит общий наблюдатель на каждом обновлении цены, не дожидаясь цикла воркера
+    stop_loss_watcher.register(account, partial(trigger_stop_loss, account, engine, lock))
+    return engine, stream
 
 # Основная функция грид-бота для аккаунта
 async def run_grid_bot_for_account(account):
-    # Вычисляем шаг и уровни сетки
-    step = (account.end_price - account.start_price) / account.grid_count
-    buy_levels = [round(account.start_price + i * step, 2) for i in range(account.grid_count)]
-    sell_levels = [round(account.start_price + i * step, 2) for i in range(1, account.grid_count + 1)]
-    
-    orders = {}  # Отслеживаем ордера: {level: order}
-    logger.info(f"{account.name}({account.id}): Starting grid bot with buy levels {buy_levels} and sell levels {sell_levels}")
-    
-    while True:
-        try:
-            current_price = await get_current_price(account)
-            logger.info(f"{account.name}({account.id}): Current market price is {current_price}")
-            
-            # Проверка стоплосса для активных ордеров на продажу
-            await check_stop_loss(account, current_price, orders)
+    market_data_hub.subscribe(account.symbol, account.exchange, account.category)
+    try:
+        await _grid_loop(account, asyncio.Lock())
+    finally:
+        stop_loss_watcher.unregister(account.id)
+        market_data_hub.unsubscribe(account.symbol, account.exchange, account.category)
+        grid_cycle_last_seconds.remove(account.id)
+        log_sampler.forget(("price", account.id))
+
+
+# Перевод аккаунта в статус error: бот останавливается менеджером, ордера остаются на бирже
+async def disable_account(account, error):
+    logger.error(f"{account.name}({account.id}): Persistent authentication failure, moving account to error: {error}")
+    async with async_session() as session:
+        await session.execute(update(Account).where(Account.id == account.id).values(status=AccountStatus.error))
+        await session.commit()
+    event = AccountEvent(account_id=account.id, status=AccountStatus.error)
+    account_events.publish(event)
+    # Клиентам API, работающего отдельным процессом, статус уходит через NOTIFY
+    status_events.publish(event)
+
+
+async def _grid_loop(account, lock):
+    # Цикл аккаунта остаётся отдельной корутиной: менеджер запускает, отменяет и сдаёт аренду каждого аккаунта отдельно.
+    # Все его ожидания — исполнений и паузы после ошибок — ставятся в общее колесо таймеров, своих таймеров у цикла нет
+    loop = asyncio.get_running_loop()
+    last_reconcile = loop.time()
+    engine = stream = None
+    recovered = False
+    failures = 0  # циклов с ошибкой подряд — степень экспоненциальной паузы
+    auth_failures = 0
+    try:
+        while True:
+            try:
+                if engine is None:
+                    engine, stream = await start_grid(account, lock)
+                started = time.perf_counter()
+                current_price = await get_current_price(account)
+                # Цена меняется каждый цикл: пишем её не чаще раза в LOG_SAMPLE_INTERVAL на аккаунт
+                if log_sampler.allow(("price", account.id)):
+                    logger.info("{account}({account_id}): Current market price is {price}", account=account.name, account_id=account.id, price=current_price)
+                pnl_aggregator.mark(account.id, current_price)
             
-            # Выставляем лимитные ордера на покупку, если их ещё нет
-            for level in buy_levels:
-                if level not in orders:
-                    quantity = compute_quantity(account, level, "buy")
-                    order = await place_limit_order(account, account.symbol, "Buy", level, quantity)
-                    orders[level] = order
-
-            # Выставляем лимитные ордера на продажу, если их ещё нет
-            for level in sell_levels:
-                if level not in orders:
-                    quantity = compute_quantity(account, level, "sell")
-                    order = await place_limit_order(account, account.symbol, "Sell", level, quantity)
-                    orders[level] = order
+                async with lock:
+                    # Восстановление внутри цикла: его ошибки обрабатываются так же, как ошибки цикла
+                    if not recovered:
+                        await recover_grid(account, engine)
+                        recovered = True
+                    # Пока цена ниже стоплосса, наблюдатель молчит (он реагирует на пересечение) — проверяем раз в цикл;
+                    # здесь же остановленная сетка возобновляется, когда цена вернулась к порогу
+                    await check_stop_loss(account, current_price, engine)
+                    # Выставляем недостающие ордера сетки
+                    await sync_orders(account, engine)
+                    await grid_state.save(account.id, engine)
             
-            # Проверяем исполнение ордеров и, если ордер исполнен, выставляем ордер противоположной стороны
-            for level, order in list(orders.items()):
-                executed = await check_order_executed(account, order)
-                if executed:
-                    logger.info(f"{account.name}({account.id}): Order at level {level} executed, side: {order['side']}")
-                    orders.pop(level, None)
-                    # Выставляем ордер противоположной стороны
-                    opposite_side = "Sell" if order['side'] == "buy" else "Buy"
-                    quantity = order['quantity']
-                    new_order = await place_limit_order(account, account.symbol, opposite_side, level, quantity)
-                    orders[level] = new_order
+                # Ждём исполнений из WebSocket вместо фиксированной паузы; ожидание в длительность цикла не входит.
+                # Следующая проверка тем раньше, чем ближе цена к ближайшему ордеру и чем выше волатильность;
+                # без WebSocket исполнения видны только через REST, поэтому ждём не дольше CYCLE_INTERVAL.
+                # Остановленная стоплоссом сетка ждёт возврата цены к порогу
+                busy = time.perf_counter() - started
+                targets = engine.order_price[engine.live]
+                if engine.halted:
+                    targets = np.append(targets, account.stop_loss)
+                delay = next_check_delay(
+                    current_price,
+                    targets,
+                    market_data_hub.volatility(account.symbol, account.exchange, account.category),
+                    MAX_CHECK_INTERVAL if stream.connected else CYCLE_INTERVAL,
+                )
+                filled_ids = await stream.wait_fills(delay)
+                started = time.perf_counter()
             
-            await asyncio.sleep(5)
+                # Сверка через REST: периодически или если поток недоступен. Запросы идут без блокировки,
+                # чтобы не задерживать стоплосс; ордера, снятые им за это время, fill пропустит
+                reconciled = []
+                if not stream.connected or loop.time() - last_reconcile >= RECONCILE_INTERVAL:
+                    last_reconcile = loop.time()
+                    orders = engine.orders(engine.live_cells())
+                    executed = await asyncio.gather(*(check_order_executed(account, order) for order in orders))
+                    reconciled = [order['order_id'] for order, filled in zip(orders, executed) if filled]
+                async with lock:
+                    handle_executed(account, engine, filled_ids)
+                    handle_executed(account, engine, reconciled)
+                    await grid_state.save(account.id, engine)
+                busy += time.perf_counter() - started
+                grid_cycle_seconds.observe(value=busy)
+                grid_cycle_last_seconds.set(account.id, value=busy)
+                failures = auth_failures = 0
         
-        except asyncio.CancelledError:
-            logger.info(f"{account.name}({account.id}): Grid bot cancelled.")
-            break
-        except Exception as e:
-            logger.error(f"{account.name}({account.id}): Error in grid bot: {e}")
-            await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                logger.info(f"{account.name}({account.id}): Grid bot cancelled.")
+                break
+            except Exception as e:
+                failures += 1
+                if isinstance(e, AuthError):
+                    auth_failures += 1
+                    if auth_failures >= AUTH_FAILURE_LIMIT:
+                        await disable_account(account, e)
+                        break
+                # Ошибки повторяются с растущей паузой; при разомкнутом предохранителе ждём, пока он не пропустит пробный запрос
+                delay = backoff_delay(failures, ERROR_BACKOFF, ERROR_BACKOFF_CAP)
+                if isinstance(e, CircuitOpenError):
+                    delay = max(delay, e.retry_after)
+                kind = e.kind if isinstance(e, ExchangeError) else type(e).__name__
+                logger.error(f"{account.name}({account.id}): Error in grid bot ({kind}): {e}, retry in {delay:.1f}s")
+                await timer_wheel.sleep(delay)
+    finally:
+        if stream is not None:
+            await stream.close()
@@ -0,0 +1,56 @@
+# instruments.py
+import asyncio
+import time
+from src.manage_accounts.models import Category, Exchange
+from src.service.client_registry import client_registry
+from src.service.connectors.base import InstrumentSpec
+from src.service.logger import logger
+
+
+class InstrumentCache:
+    """
+    Кеш спецификаций инструментов по биржам и категориям: список символов запрашивается один раз и обновляется по TTL.
+    Отсутствующий символ тоже запоминается на TTL, чтобы запросы с ним не перезагружали весь список.
+    """
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._specs = {}  # (exchange, category): {symbol: InstrumentSpec}
+        self._loaded_at = {}  # (exchange, category): time.monotonic() загрузки
+        self._locks = {}  # (exchange, category): asyncio.Lock
+        self._misses = {}  # (exchange, category, symbol): time.monotonic() загрузки, в которой символа не оказалось
+
+    def _expired(self, venue):
+        loaded_at = self._loaded_at.get(venue)
+        return loaded_at is None or time.monotonic() - loaded_at > self.ttl
+
+    def _missing(self, symbol, venue):
+        if self._expired(venue):
+            return True
+        if symbol in self._specs[venue]:
+            return False
+        missed_at = self._misses.get((*venue, symbol))
+        return missed_at is None or time.monotonic() - missed_at > self.ttl
+
+    async def _load(self, venue):
+        exchange, category = venue
+        specs = await client_registry.get_public_connector(exchange, category).instruments()
+        self._specs[venue] = {spec.symbol: spec for spec in specs}
+        self._loaded_at[venue] = time.monotonic()
+        logger.info(f"Instruments: loaded {len(specs)} {exchange.value}:{category.value} symbols")
+
+    async def get(self, symbol, exchange=Exchange.bybit_v2, category=Category.inverse):
+        venue = (exchange, category)
+        if self._missing(symbol, venue):
+            async with self._locks.setdefault(venue, asyncio.Lock()):
+                # Другая корутина могла уже обновить кеш, пока мы ждали блокировку
+                if self._missing(symbol, venue):
+                    await self._load(venue)
+        spec = self._specs[venue].get(symbol)
+        if spec is None:
+            self._misses[(*venue, symbol)] = self._loaded_at[venue]
+            raise ValueError(f"Unknown {exchange.value}:{category.value} symbol {symbol}")
+        return spec
+
+
+instrument_cache = InstrumentCache()
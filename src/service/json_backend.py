@@ -0,0 +1,57 @@
+# json_backend.py
+from collections.abc import Mapping
+
+# Быстрый JSON-бэкенд выбирается при импорте: orjson, если установлен, иначе стандартный json
+try:
+    import orjson
+
+    BACKEND = "orjson"
+    loads = orjson.loads
+
+    def dumps(obj):
+        return orjson.dumps(obj).decode('utf-8')
+except ImportError:
+    import json
+
+    BACKEND = "json"
+    loads = json.loads
+
+    def dumps(obj):
+        # Тот же вывод, что у orjson: без пробелов и без \u-экранирования
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+class LazyResponse(Mapping):
+    """
+    Ответ биржи, который декодируется при первом обращении к полям. Ответы, которые никто не читает
+    (например, подтверждения отмены), не декодируются вовсе. on_decode вызывается один раз с готовым dict.
+    """
+
+    __slots__ = ("_body", "_data", "_on_decode")
+
+    def __init__(self, body, on_decode=None):
+        self._body = body
+        self._data = None
+        self._on_decode = on_decode
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = loads(self._body)
+            self._body = None
+            if self._on_decode is not None:
+                on_decode, self._on_decode = self._on_decode, None
+                on_decode(self._data)
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f"LazyResponse({self.data!r})"
@@ -0,0 +1,57 @@
+# leases.py
+from datetime import timedelta
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.database import engine
+from src.manage_accounts.models import AccountLease
+
+async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+
+class LeaseManager:
+    """
+    Аренды аккаунтов в таблице account_lease. Время берётся из БД, чтобы не зависеть от часов узлов.
+    """
+
+    def __init__(self, owner, ttl=30):
+        self.owner = owner
+        self.ttl = timedelta(seconds=ttl)
+
+    async def acquire(self, account_id):
+        now = func.localtimestamp()
+        query = insert(AccountLease).values(account_id=account_id, owner=self.owner, expires_at=now + self.ttl)
+        query = query.on_conflict_do_update(
+            index_elements=[AccountLease.account_id],
+            set_={"owner": self.owner, "expires_at": now + self.ttl},
+            where=(AccountLease.owner == self.owner) | (AccountLease.expires_at < now),
+        ).returning(AccountLease.account_id)
+        async with async_session() as session:
+            acquired = (await session.execute(query)).scalar() is not None
+            await session.commit()
+        return acquired
+
+    async def renew(self, account_ids):
+        """
+        Продлевает аренды; возвращает id, которые всё ещё принадлежат этому владельцу.
+        """
+        if not account_ids:
+            return set()
+        query = (
+            update(AccountLease)
+            .where(AccountLease.account_id.in_(account_ids), AccountLease.owner == self.owner)
+            .values(expires_at=func.localtimestamp() + self.ttl)
+            .returning(AccountLease.account_id)
+        )
+        async with async_session() as session:
+            renewed = set((await session.execute(query)).scalars().all())
+            await session.commit()
+        return renewed
+
+    async def release(self, account_ids):
+        if not account_ids:
+            return
+        query = delete(AccountLease).where(AccountLease.account_id.in_(account_ids), AccountLease.owner == self.owner)
+        async with async_session() as session:
+            await session.execute(query)
+            await session.commit()
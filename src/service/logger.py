@@ -1,11 +1,72 @@
 from loguru import logger
+import json
 import sys
+import time
+from src.config import Config
+
+LOG_SAMPLE_INTERVAL = 60  # секунд между повторами однотипного сообщения по одному ключу
+
+
+def parse_levels(spec):
+    """
+    Уровни по модулям из строки вида "src.service.grid_worker=WARNING,src.service.bybit_client=DEBUG".
+    """
+    levels = {}
+    for item in (spec or "").split(","):
+        module, _, level = item.strip().partition("=")
+        if module and level:
+            levels[module.strip()] = level.strip().upper()
+    return levels
+
+
+def json_format(record):
+    # Компактная JSON-строка: время, уровень, модуль, сообщение и поля extra (account_id, price, ...)
+    record["extra"]["_json"] = json.dumps({
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "module": record["name"],
+        "message": record["message"],
+        **{key: value for key, value in record["extra"].items() if key != "_json"},
+    }, default=str, ensure_ascii=False)
+    return "{extra[_json]}\n{exception}"
 
 
 def init_logger():
-    format_info = "<red>GRID_BOT</red>: <green>{time:HH:mm:ss}</green> | <blue>{level}</blue> | <level>{message}</level>"
+    levels = {"": Config.log_level.upper(), **parse_levels(Config.log_levels)}
+    # Минимальный уровень обработчика — самый низкий из настроенных: вызовы ниже него loguru отбрасывает
+    # до форматирования, поэтому сообщения с аргументами ("... {}", value) на выключенных уровнях ничего не стоят
+    min_level = min(logger.level(name).no for name in levels.values())
     logger.remove()
-    logger.add(sys.stdout, colorize=True, format=format_info, level="INFO")
+    # enqueue: запись в stdout идёт в фоновом потоке, event loop только кладёт строку в очередь.
+    # Для json вместо цветного формата — одна JSON-строка на запись с полями extra
+    if Config.log_format.lower() == "json":
+        logger.add(sys.stdout, format=json_format, enqueue=True, filter=levels, level=min_level)
+    else:
+        format_info = "<red>GRID_BOT</red>: <green>{time:HH:mm:ss}</green> | <blue>{level}</blue> | <level>{message}</level>"
+        logger.add(sys.stdout, colorize=True, format=format_info, enqueue=True, filter=levels, level=min_level)
     return logger
-    
+
+
+class LogSampler:
+    """
+    Пропускает сообщение с данным ключом не чаще раза в interval секунд — для повторяющихся логов вроде цены на каждом цикле.
+    """
+
+    def __init__(self, interval=LOG_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._last = {}  # key: time.monotonic() последнего пропущенного сообщения
+
+    def allow(self, key):
+        now = time.monotonic()
+        if now - self._last.get(key, -self.interval) < self.interval:
+            return False
+        self._last[key] = now
+        return True
+
+    def forget(self, key):
+        self._last.pop(key, None)
+
+
+log_sampler = LogSampler()
+
 init_logger()
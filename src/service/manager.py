@@ -1,51 +1,217 @@
 # manager.py
 import asyncio
+import os
+import socket
+from datetime import datetime
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from src.database import engine
 from src.manage_accounts.models import Account, AccountStatus
 from src.service.logger import logger
 from src.service.grid_worker import run_grid_bot_for_account, cancel_all_orders_for_account
+from src.service.client_registry import client_registry
+from src.service.grid_state import grid_state
+from src.service.market_data import market_data_hub
+from src.service.pnl import pnl_aggregator
+from src.service.resilience import endpoint_breakers
+from src.service.scheduler import timer_wheel
+from src.service.stop_loss import stop_loss_watcher
+from src.service.trade_writer import trade_writer
+from src.service.events import account_events
+from src.service.leases import LeaseManager
+from src.service.sharding import HashRing
 
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
+RECONCILE_INTERVAL = 60  # секунд между сверками с БД; старт/стоп приходят событиями из роутов
+LEASE_TTL = 30  # секунд жизни аренды аккаунта без продления
+LEASE_RENEW_INTERVAL = LEASE_TTL / 3
+
 class AccountManager:
-    def __init__(self):
+    def __init__(self, reconcile_interval=RECONCILE_INTERVAL, shard_id=0, shard_count=1, owner=None):
         self.tasks = {}  # id: asyncio.Task
+        self.reconcile_interval = reconcile_interval
+        self.shard_id = shard_id
+        self.ring = HashRing(shard_count)
+        self.leases = LeaseManager(owner or f"{socket.gethostname()}:{os.getpid()}:shard-{shard_id}", ttl=LEASE_TTL)
+        self._leased_at = {}  # id: loop.time() перед последним успешным захватом или продлением аренды
+        self._pending = set()  # id running-аккаунтов шарда, ждущих аренду: занята другим владельцем, потеряна или не продлилась
+        self._watermark = None  # максимальный updated_at из последней сверки
+        self._events = None
+        self._heartbeat = None
+
+    def owns(self, account_id):
+        return self.ring.shard_for(account_id) == self.shard_id
 
     async def run(self):
+        trade_writer.start()
+        pnl_aggregator.start()
+        self._events = account_events.subscribe()
+        self._heartbeat = asyncio.create_task(self._renew_leases())
+        try:
+            await self._run()
+        finally:
+            account_events.unsubscribe(self._events)
+            self._heartbeat.cancel()
+            await self.close()
+
+    async def close(self):
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        try:
+            await self.leases.release(list(self.tasks))
+        except Exception as e:
+            logger.error(f"Failed to release leases: {e}")
+        self.tasks.clear()
+        await stop_loss_watcher.close()
+        await market_data_hub.close()
+        await trade_writer.close()
+        await pnl_aggregator.close()
+        await timer_wheel.close()
+        await client_registry.close()
+
+    async def _run(self):
+        # Аккаунты, ждущие аренду, пробуем захватить каждые LEASE_RENEW_INTERVAL: сверка их не поднимет,
+        # если строка аккаунта не менялась. Старая аренда этого же узла (перезапуск до истечения TTL) истечёт сама
+        loop = asyncio.get_running_loop()
+        await self._reconcile()
+        next_reconcile = loop.time() + self.reconcile_interval
+        next_retry = loop.time() + LEASE_RENEW_INTERVAL
         while True:
-            async with async_session() as session:
-                result = await session.execute(select(Account))
-                accounts = result.scalars().all()
-                logger.info(f"Found {len(accounts)} accounts")
-                running_ids = []
-                for acc in accounts:
-                    if acc.status == AccountStatus.running:
-                        running_ids.append(acc.id)
-                        if acc.id not in self.tasks:
-                            logger.info(f"{acc.name}(id={acc.id}): start bot")
-                            self.tasks[acc.id] = asyncio.create_task(run_grid_bot_for_account(acc))
-
-                    elif acc.status == AccountStatus.stopped:
-                        if acc.id in self.tasks:
-                            logger.info(f"{acc.name}(id={acc.id}): stop bot")
-                            self.tasks[acc.id].cancel()
-                            del self.tasks[acc.id]
-                            await cancel_all_orders_for_account(acc)
-
-                    elif acc.status == AccountStatus.deleted:
-                        if acc.id in self.tasks:
-                            logger.info(f"{acc.name}(id={acc.id}): delete bot")
-                            self.tasks[acc.id].cancel()
-                            del self.tasks[acc.id]
-                            # Не отменяем ордера
-
-                # Убираем завершённые задачи, если аккаунт больше не running
-                for acc_id in list(self.tasks):
-                    if acc_id not in running_ids:
-                        logger.info(f"{acc.name}(id={acc.id}): delete task")
-                        self.tasks[acc_id].cancel()
-                        del self.tasks[acc_id]
-
-            await asyncio.sleep(10)
+            deadline = min(next_reconcile, next_retry) if self._pending else next_reconcile
+            try:
+                event = await asyncio.wait_for(self._events.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                event = None
+            # Ошибки БД не останавливают менеджер: пропущенное подберёт следующая сверка по updated_at
+            try:
+                if event is not None:
+                    if self.owns(event.account_id):
+                        await self._apply([event.account_id])
+                elif loop.time() >= next_reconcile:
+                    next_reconcile = loop.time() + self.reconcile_interval
+                    await self._reconcile()
+                else:
+                    await self._apply(list(self._pending))
+            except Exception as e:
+                logger.error(f"Shard {self.shard_id}/{self.ring.shard_count}: failed to apply account changes: {e!r}")
+            if event is None:
+                next_retry = loop.time() + LEASE_RENEW_INTERVAL
+
+    async def _renew_leases(self):
+        # Продлеваем аренды; аккаунты, аренду которых перехватили, останавливаем без отмены ордеров.
+        # Если продлить не удаётся, бот останавливается до истечения TTL, иначе аренду заберёт другой шард,
+        # пока этот ещё торгует. Аккаунт поднимет сверка, когда аренду снова удастся захватить
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(LEASE_RENEW_INTERVAL)
+            started = loop.time()
+            try:
+                renewed = await asyncio.wait_for(self.leases.renew(list(self.tasks)), LEASE_RENEW_INTERVAL)
+            except Exception as e:
+                # Следующая попытка будет через LEASE_RENEW_INTERVAL — к этому времени аренда может истечь
+                deadline = loop.time() + LEASE_RENEW_INTERVAL - LEASE_TTL
+                expiring = [acc_id for acc_id in self.tasks if self._leased_at.get(acc_id, deadline) <= deadline]
+                logger.error(f"Failed to renew leases: {e!r}, stopping {len(expiring)} bots before their leases expire")
+                for acc_id in expiring:
+                    await self._stop_bot(acc_id)
+                continue
+            for acc_id in renewed:
+                self._leased_at[acc_id] = started
+            for acc_id in [acc_id for acc_id in self.tasks if acc_id not in renewed]:
+                logger.warning(f"(id={acc_id}): lease lost, stop bot")
+                await self._stop_bot(acc_id)
+
+    async def _stop_bot(self, acc_id):
+        # Остановка без отмены ордеров: сетку восстановит тот, кто следующим захватит аренду, — возможно, снова этот шард
+        self._pending.add(acc_id)
+        task = self.tasks.pop(acc_id)
+        self._leased_at.pop(acc_id, None)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def _reconcile(self):
+        """
+        Медленная сверка: выбирает только id/status/updated_at аккаунтов, изменённых с прошлой сверки.
+        Первая сверка поднимает все running-аккаунты.
+        """
+        query = select(Account.id, Account.status, Account.updated_at)
+        if self._watermark is None:
+            query = query.where(Account.status == AccountStatus.running)
+            self._watermark = datetime.now()
+        else:
+            query = query.where(Account.updated_at >= self._watermark)
+        async with async_session() as session:
+            rows = (await session.execute(query)).all()
+
+        changed = []
+        for acc_id, status, updated_at in rows:
+            self._watermark = max(self._watermark, updated_at)
+            if not self.owns(acc_id):
+                continue
+            if (status == AccountStatus.running) != (acc_id in self.tasks):
+                changed.append(acc_id)
+        changed.extend(acc_id for acc_id in self._pending if acc_id not in changed)
+        # Перезапускаем упавшие задачи running-аккаунтов
+        for acc_id, task in list(self.tasks.items()):
+            if task.done():
+                del self.tasks[acc_id]
+                self._leased_at.pop(acc_id, None)
+                changed.append(acc_id)
+
+        logger.info(f"Shard {self.shard_id}/{self.ring.shard_count}: reconciled {len(rows)} changed accounts, running: {len(self.tasks)}, clients: {client_registry.stats()}")
+        logger.info(f"Market data: {market_data_hub.stats()}")
+        logger.info(f"Trade writer: {trade_writer.stats()}")
+        logger.info(f"PnL aggregator: {pnl_aggregator.stats()}")
+        logger.info(f"Timer wheel: {timer_wheel.stats()}")
+        logger.info(f"Stop-loss watcher: {stop_loss_watcher.stats()}")
+        if endpoint_breakers.stats():
+            logger.warning(f"Open exchange circuits: {endpoint_breakers.stats()}")
+        if changed:
+            await self._apply(changed)
+
+    async def _apply(self, account_ids):
+        async with async_session() as session:
+            result = await session.execute(select(Account).where(Account.id.in_(account_ids)))
+            accounts = result.scalars().all()
+        # Удалённые из БД аккаунты больше не ждут аренду
+        self._pending.difference_update(set(account_ids) - {acc.id for acc in accounts})
+        for acc in accounts:
+            await self._handle(acc)
+
+    async def _handle(self, acc):
+        self._pending.discard(acc.id)
+        if acc.status == AccountStatus.running:
+            if acc.id not in self.tasks:
+                started = asyncio.get_running_loop().time()
+                try:
+                    acquired = await self.leases.acquire(acc.id)
+                except Exception as e:
+                    logger.error(f"{acc.name}(id={acc.id}): failed to acquire lease: {e!r}")
+                    acquired = False
+                if not acquired:
+                    logger.warning(f"{acc.name}(id={acc.id}): lease not acquired, retry in {LEASE_RENEW_INTERVAL:.0f}s")
+                    self._pending.add(acc.id)
+                    return
+                self._leased_at[acc.id] = started
+                logger.info(f"{acc.name}(id={acc.id}): start bot")
+                self.tasks[acc.id] = asyncio.create_task(run_grid_bot_for_account(acc))
+            return
+
+        task = self.tasks.pop(acc.id, None)
+        if task is None:
+            return
+        self._leased_at.pop(acc.id, None)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await pnl_aggregator.release(acc.id)
+        if acc.status == AccountStatus.stopped:
+            logger.info(f"{acc.name}(id={acc.id}): stop bot")
+            await cancel_all_orders_for_account(acc)
+            await grid_state.clear(acc.id)
+        else:
+            # Удалённые и аккаунты с ошибкой: ордера не отменяем
+            logger.info(f"{acc.name}(id={acc.id}): delete bot")
+        await self.leases.release([acc.id])
+        await client_registry.release(acc)
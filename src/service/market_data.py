@@ -0,0 +1,167 @@
+# market_data.py
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from src.config import Config
+from src.manage_accounts.models import Category, Exchange
+from src.service.client_registry import client_registry
+from src.service.logger import logger
+
+VOLATILITY_HALF_LIFE = 300  # секунд: период полураспада веса старых доходностей в оценке волатильности
+
+
+@dataclass(slots=True)
+class Quote:
+    symbol: str
+    price: float
+    updated_at: float  # time.monotonic() момента получения
+
+    def age(self):
+        return time.monotonic() - self.updated_at
+
+
+class MarketDataHub:
+    """
+    Один поток тикеров на рынок (биржа, символ, категория): цена запрашивается один раз и раздаётся всем грид-воркерам
+    этого рынка. Один и тот же символ на разных биржах или в разных категориях — разные рынки со своей ценой.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._quotes = {}  # (exchange, symbol, category): Quote
+        self._conditions = {}  # (exchange, symbol, category): asyncio.Condition
+        self._feeds = {}  # (exchange, symbol, category): asyncio.Task
+        self._subscribers = {}  # (exchange, symbol, category): количество подписчиков
+        self._variance = {}  # (exchange, symbol, category): EWMA дисперсии лог-доходности за секунду
+        self._listeners = []  # callback(exchange, symbol, price, category) на каждое обновление цены
+
+    def add_listener(self, callback):
+        """
+        Синхронный обработчик каждого обновления цены: вызывается до пробуждения ожидающих, поэтому должен быть быстрым.
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def subscribe(self, symbol, exchange=Exchange.bybit_v2, category=Category.inverse):
+        market = (exchange, symbol, category)
+        self._subscribers[market] = self._subscribers.get(market, 0) + 1
+        self._conditions.setdefault(market, asyncio.Condition())
+        if market not in self._feeds:
+            self._feeds[market] = asyncio.create_task(self._feed(exchange, symbol, category))
+            logger.info(f"Market data: started feed for {exchange.value}:{category.value}:{symbol}")
+
+    def unsubscribe(self, symbol, exchange=Exchange.bybit_v2, category=Category.inverse):
+        market = (exchange, symbol, category)
+        count = self._subscribers.get(market, 0) - 1
+        if count > 0:
+            self._subscribers[market] = count
+            return
+        self._subscribers.pop(market, None)
+        task = self._feeds.pop(market, None)
+        if task is not None:
+            task.cancel()
+            logger.info(f"Market data: stopped feed for {exchange.value}:{category.value}:{symbol}")
+        self._quotes.pop(market, None)
+        self._conditions.pop(market, None)
+        self._variance.pop(market, None)
+
+    async def _fetch_price(self, exchange, symbol, category):
+        ticker = await client_registry.get_public_connector(exchange, category).ticker(symbol)
+        return ticker.last_price
+
+    async def _feed(self, exchange, symbol, category):
+        while True:
+            try:
+                price = await self._fetch_price(exchange, symbol, category)
+                await self.publish(symbol, price, exchange, category)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Market data: failed to fetch {exchange.value}:{category.value}:{symbol}: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def publish(self, symbol, price, exchange=Exchange.bybit_v2, category=Category.inverse):
+        market = (exchange, symbol, category)
+        quote = Quote(symbol=symbol, price=price, updated_at=time.monotonic())
+        previous = self._quotes.get(market)
+        if previous is not None and previous.price > 0 and price > 0:
+            self._update_variance(market, math.log(price / previous.price), quote.updated_at - previous.updated_at)
+        self._quotes[market] = quote
+        for callback in self._listeners:
+            callback(exchange, symbol, price, category)
+        condition = self._conditions.get(market)
+        if condition is not None:
+            async with condition:
+                condition.notify_all()
+
+    async def wait_update(self, symbol, exchange=Exchange.bybit_v2, timeout=None, category=Category.inverse):
+        """
+        Ждёт следующего обновления цены по рынку.
+        """
+        market = (exchange, symbol, category)
+        condition = self._conditions.setdefault(market, asyncio.Condition())
+        async with condition:
+            await asyncio.wait_for(condition.wait(), timeout)
+        return self._quotes[market]
+
+    async def get_quote(self, symbol, exchange=Exchange.bybit_v2, max_age=None, timeout=None, category=Category.inverse):
+        """
+        Возвращает последнюю котировку; если она старше max_age секунд — ждёт свежую.
+        """
+        quote = self._quotes.get((exchange, symbol, category))
+        if quote is not None and (max_age is None or quote.age() <= max_age):
+            return quote
+        return await self.wait_update(symbol, exchange, timeout, category)
+
+    async def get_price(self, symbol, exchange=Exchange.bybit_v2, max_age=None, timeout=None, category=Category.inverse):
+        quote = await self.get_quote(symbol, exchange, max_age, timeout, category)
+        return quote.price
+
+    def _update_variance(self, market, log_return, dt):
+        if dt <= 0:
+            return
+        # Дисперсия за секунду, усреднённая экспоненциально с весом по прошедшему времени
+        sample = log_return * log_return / dt
+        variance = self._variance.get(market)
+        if variance is None:
+            self._variance[market] = sample
+            return
+        weight = 1 - 0.5 ** (dt / VOLATILITY_HALF_LIFE)
+        self._variance[market] = variance + weight * (sample - variance)
+
+    def volatility(self, symbol, exchange=Exchange.bybit_v2, category=Category.inverse):
+        """
+        Оценка волатильности рынка: стандартное отклонение лог-доходности за секунду или None, если данных ещё нет.
+        """
+        variance = self._variance.get((exchange, symbol, category))
+        return math.sqrt(variance) if variance is not None else None
+
+    def staleness(self, symbol, exchange=Exchange.bybit_v2, category=Category.inverse):
+        quote = self._quotes.get((exchange, symbol, category))
+        return quote.age() if quote is not None else None
+
+    def stats(self):
+        return {
+            f"{exchange.value}:{category.value}:{symbol}": {
+                "price": self._quotes[(exchange, symbol, category)].price if (exchange, symbol, category) in self._quotes else None,
+                "age": self.staleness(symbol, exchange, category),
+                "volatility": self.volatility(symbol, exchange, category),
+                "subscribers": count,
+            }
+            for (exchange, symbol, category), count in self._subscribers.items()
+        }
+
+    async def close(self):
+        tasks = list(self._feeds.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._feeds.clear()
+        self._subscribers.clear()
+        self._quotes.clear()
+        self._conditions.clear()
+        self._variance.clear()
+
+
+market_data_hub = MarketDataHub(interval=Config.market_data_interval)
@@ -0,0 +1,198 @@
+# metrics.py
+import asyncio
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from aiohttp import web
+
+# Границы гистограмм задержек, секунды
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOOP_LAG_INTERVAL = 0.5  # секунд между замерами задержки event loop
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._values = {}  # кортеж значений меток: значение
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    """
+    Счётчик. Метрики пишутся только из потока event loop, поэтому обычного int достаточно — без блокировок.
+    """
+    type = "counter"
+
+    def inc(self, *labels, value=1):
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def get(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        return self._header() + [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, *labels, value):
+        self._values[labels] = value
+
+    def remove(self, *labels):
+        self._values.pop(labels, None)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        # [счётчики по корзинам..., +Inf], сумма — последним элементом
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labels, value=time.perf_counter() - started)
+
+    def render(self):
+        lines = self._header()
+        names = self.labelnames + ("le",)
+        for key, state in self._values.items():
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), state[:-1]):
+                total += count
+                lines.append(f"{self.name}_bucket{_labels(names, key + (bound,))} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {state[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {total}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self):
+        """
+        Текстовый формат экспозиции Prometheus.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+exchange_request_seconds = registry.histogram("exchange_request_seconds", "Latency of exchange REST requests, excluding scheduler wait", ("path",))
+exchange_scheduler_wait_seconds = registry.histogram("exchange_scheduler_wait_seconds", "Time exchange REST requests wait for a rate limit slot", ("path",))
+exchange_request_errors = registry.counter("exchange_request_errors_total", "Failed exchange REST requests by error class", ("path", "kind"))
+exchange_circuit_trips = registry.counter("exchange_circuit_trips_total", "Exchange circuit breakers opened", ("scope",))
+grid_cycle_seconds = registry.histogram("grid_cycle_seconds", "Duration of one grid bot cycle, excluding waiting for fills")
+grid_cycle_last_seconds = registry.gauge("grid_cycle_last_seconds", "Duration of the last grid bot cycle per account", ("account",))
+grid_orders = registry.counter("grid_orders_total", "Grid orders by event", ("event",))
+stop_loss_triggers = registry.counter("stop_loss_triggers_total", "Accounts whose stop-loss was triggered by a price update")
+stop_loss_seconds = registry.histogram("stop_loss_seconds", "Time from the triggering price update to the end of the stop-loss sequence")
+trade_enqueue_seconds = registry.histogram("trade_enqueue_seconds", "Time record_trade waits for space in the trade writer queue")
+trade_flush_seconds = registry.histogram("trade_flush_seconds", "Latency of one batched trade INSERT")
+trade_queue_depth = registry.gauge("trade_queue_depth", "Trades waiting in the trade writer queue")
+event_loop_lag_seconds = registry.histogram("event_loop_lag_seconds", "Extra delay of a sleep on the event loop")
+http_request_seconds = registry.histogram("http_request_seconds", "HTTP request latency by route", ("method", "route", "status"))
+
+
+async def monitor_loop_lag(interval=LOOP_LAG_INTERVAL):
+    """
+    Замеряет, насколько позже положенного просыпается sleep: это время event loop был занят другими задачами.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        event_loop_lag_seconds.observe(value=max(0.0, loop.time() - started - interval))
+
+
+async def serve_metrics(port, host="0.0.0.0"):
+    """
+    Отдельный HTTP-сервер /metrics для процессов без API (воркеры шардов).
+    """
+    async def handle(request):
+        return web.Response(text=registry.render(), content_type="text/plain")
+
+    app = web.Application()
+    app.add_routes([web.get("/metrics", handle)])
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+class MetricsMiddleware:
+    """
+    ASGI-слой, замеряющий задержку HTTP-запросов; метка route — шаблон пути, а не конкретный URL.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Запросы, отклонённые до маршрутизации (например, авторизацией), учитываются по префиксу приложения
+            route = scope.get("route")
+            path = scope.get("root_path", "") + route.path if route is not None else scope.get("root_path") or "unmatched"
+            http_request_seconds.observe(scope["method"], path, status, value=time.perf_counter() - started)
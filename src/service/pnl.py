@@ -0,0 +1,194 @@
+# pnl.py
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+import numpy as np
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.config import Config
+from src.database import engine
+from src.manage_accounts.models import Account, AccountStats
+from src.service.grid_engine import BUY
+from src.service.logger import logger
+
+async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+SNAPSHOT_INTERVAL = 10  # секунд между сохранениями изменённых аккаунтов
+
+
+@dataclass(slots=True)
+class PositionStats:
+    """
+    Позиция аккаунта, обновляемая на каждом исполнении за O(1): объём, средняя цена входа, реализованный PnL.
+    Комиссии обеих сторон сразу вычитаются из реализованного PnL и копятся отдельно в fees.
+    Позиция учитывает только купленное сеткой. Исходные ордера на продажу уровней продают монеты, бывшие на счёте
+    до запуска: их цена входа неизвестна, поэтому продажа сверх позиции PnL не меняет и в минус её не уводит.
+    """
+    deposit: float
+    position: float = 0.0
+    avg_entry: float = 0.0
+    realized_pnl: float = 0.0
+    buy_fills: int = 0
+    sell_fills: int = 0
+    volume: float = 0.0  # оборот в валюте котировки
+    last_price: float = 0.0
+    fees: float = 0.0  # уплаченные комиссии в валюте котировки
+
+    def buy(self, price, quantity, fee=0.0):
+        total = self.position + quantity
+        if total > 0:
+            self.avg_entry = (self.avg_entry * self.position + price * quantity) / total
+        self.position = total
+        self.buy_fills += 1
+        self.volume += price * quantity
+        self.fees += fee
+        self.realized_pnl -= fee
+
+    def sell(self, price, quantity, fee=0.0):
+        closed = min(quantity, self.position)
+        self.realized_pnl += (price - self.avg_entry) * closed
+        self.position -= closed
+        if self.position <= 0:
+            self.position = self.avg_entry = 0.0
+        self.sell_fills += 1
+        self.volume += price * quantity
+        self.fees += fee
+        self.realized_pnl -= fee
+
+    @property
+    def unrealized_pnl(self):
+        return (self.last_price - self.avg_entry) * self.position if self.last_price else 0.0
+
+    @property
+    def balance(self):
+        return self.deposit + self.realized_pnl + self.unrealized_pnl
+
+    def as_dict(self):
+        return {
+            "position": self.position,
+            "avg_entry": self.avg_entry,
+            "realized_pnl": self.realized_pnl,
+            "unrealized_pnl": self.unrealized_pnl,
+            "buy_fills": self.buy_fills,
+            "sell_fills": self.sell_fills,
+            "volume": self.volume,
+            "last_price": self.last_price,
+            "fees": self.fees,
+            "balance": self.balance,
+        }
+
+
+class PnLAggregator:
+    """
+    Позиции и PnL запущенных аккаунтов в памяти. Исполнения применяются сразу, в БД (account_stats
+    и Account.current_balance_usd) периодически пишутся только изменившиеся аккаунты.
+    """
+
+    def __init__(self, interval=SNAPSHOT_INTERVAL, fee_rate=Config.trade_fee_rate):
+        self.interval = interval
+        self.fee_rate = fee_rate  # доля оборота исполнения, которую берёт биржа
+        self._stats = {}  # account_id: PositionStats
+        self._dirty = set()
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def load(self, account):
+        """
+        Поднимает последний снимок аккаунта при старте бота, чтобы счётчики продолжались после перезапуска.
+        """
+        async with async_session() as session:
+            row = (await session.execute(select(AccountStats).where(AccountStats.account_id == account.id))).scalar()
+        stats = PositionStats(deposit=account.deposit)
+        if row is not None:
+            stats.position, stats.avg_entry, stats.realized_pnl = row.position, row.avg_entry, row.realized_pnl
+            stats.buy_fills, stats.sell_fills, stats.volume, stats.last_price = row.buy_fills, row.sell_fills, row.volume, row.last_price
+            stats.fees = row.fees
+        self._stats[account.id] = stats
+        return stats
+
+    def get(self, account_id):
+        return self._stats.get(account_id)
+
+    def record_fills(self, account_id, sides, prices, quantities):
+        """
+        Применяет исполнения ордеров сетки (массивы сторон, цен и количеств) в порядке поступления.
+        """
+        stats = self._stats.get(account_id)
+        if stats is None or not len(sides):
+            return
+        for side, price, quantity in zip(np.asarray(sides).tolist(), np.asarray(prices).tolist(), np.asarray(quantities).tolist()):
+            fee = price * quantity * self.fee_rate
+            if side == BUY:
+                stats.buy(price, quantity, fee)
+            else:
+                stats.sell(price, quantity, fee)
+        self._dirty.add(account_id)
+
+    def mark(self, account_id, price):
+        stats = self._stats.get(account_id)
+        if stats is not None and stats.last_price != price:
+            stats.last_price = price
+            self._dirty.add(account_id)
+
+    async def release(self, account_id):
+        """
+        Сохраняет последний снимок остановленного аккаунта и убирает его из памяти.
+        """
+        if account_id in self._dirty:
+            await self.flush()
+        self._stats.pop(account_id, None)
+
+    async def flush(self):
+        dirty, self._dirty = self._dirty, set()
+        rows = [(account_id, self._stats[account_id]) for account_id in dirty if account_id in self._stats]
+        if not rows:
+            return
+        try:
+            await self._flush(rows)
+        except Exception as e:
+            logger.error(f"PnL aggregator: failed to snapshot {len(rows)} accounts: {e}")
+            self._dirty |= dirty
+
+    async def _flush(self, rows):
+        now = datetime.now()
+        snapshots = [
+            {"account_id": account_id, **{key: value for key, value in stats.as_dict().items() if key != "balance"}, "updated_at": now}
+            for account_id, stats in rows
+        ]
+        query = insert(AccountStats)
+        query = query.on_conflict_do_update(
+            index_elements=[AccountStats.account_id],
+            set_={name: query.excluded[name] for name in snapshots[0] if name != "account_id"},
+        )
+        # updated_at аккаунта не трогаем: иначе каждая сделка будила бы сверку AccountManager
+        balances = update(Account).where(Account.id == bindparam("_id")).values(
+            current_balance_usd=bindparam("_balance"), updated_at=Account.updated_at,
+        )
+        async with async_session() as session:
+            await session.execute(query, snapshots)
+            # Core executemany: ORM-режим bulk update по первичному ключу не допускает WHERE с bindparam
+            connection = await session.connection()
+            await connection.execute(balances, [{"_id": account_id, "_balance": stats.balance} for account_id, stats in rows])
+            await session.commit()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def stats(self):
+        return {"accounts": len(self._stats), "dirty": len(self._dirty)}
+
+
+pnl_aggregator = PnLAggregator()
@@ -0,0 +1,149 @@
+# rate_limit.py
+import asyncio
+import enum
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+
+
+class Priority(enum.IntEnum):
+    critical = 0  # отмены и рыночные ордера стоплосса
+    high = 1
+    normal = 2  # новые ордера сетки
+    low = 3  # сверка и служебные запросы
+
+
+class RequestScheduler:
+    """
+    Планировщик запросов аккаунта: token bucket по квоте биржи, приоритетные очереди и ограничение параллельности.
+    Биржа сообщает остаток квоты отдельно по каждому эндпоинту, поэтому он хранится по группам (путям запросов):
+    исчерпанный эндпоинт ждёт сброса своего окна, не задерживая запросы к остальным.
+    """
+
+    def __init__(self, rate=10, capacity=10, max_concurrency=5):
+        self.rate = rate  # токенов в секунду
+        self.capacity = capacity
+        self.max_concurrency = max_concurrency
+        self.tokens = capacity
+        self.active = 0
+        self._updated_at = time.monotonic()
+        self._groups = {}  # группа: [остаток квоты, monotonic-время сброса окна, лимит окна]
+        self._waiters = []  # heap: (priority, seq, group, future)
+        self._seq = itertools.count()
+        self._timer = None
+        self._parked = False  # в очереди есть запросы, ждущие сброса окна своей группы
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _delay(self):
+        # Сколько ждать до появления токена
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def _group_delay(self, group, now):
+        # Сколько ждать сброса окна группы, квоту которой биржа объявила исчерпанной
+        quota = self._groups.get(group)
+        if quota is None or quota[0] > 0 or now >= quota[1]:
+            return 0
+        return quota[1] - now
+
+    def _wake(self):
+        self._timer = None
+        self._refill()
+        now = time.monotonic()
+        deferred = []  # ждут сброса окна своей группы; очередь за ними не стоит
+        wait = None
+        while self._waiters and self.active < self.max_concurrency:
+            _, _, group, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._delay()
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+                break
+            delay = self._group_delay(group, now)
+            if delay > 0:
+                deferred.append(heapq.heappop(self._waiters))
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            heapq.heappop(self._waiters)
+            self.tokens -= 1
+            self.active += 1
+            quota = self._groups.get(group)
+            if quota is not None and now < quota[1]:
+                quota[0] -= 1
+            future.set_result(None)
+        for waiter in deferred:
+            heapq.heappush(self._waiters, waiter)
+        self._parked = bool(deferred)
+        if wait is not None:
+            self._timer = asyncio.get_running_loop().call_later(wait, self._wake)
+
+    def _poke(self):
+        # Таймер ждёт токен — новый запрос всё равно ждал бы его. Если же он ждёт окно чужой группы,
+        # очередь пересматривается сразу: запрос к другому эндпоинту может пройти
+        if self._timer is None or self._parked:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._wake()
+
+    async def acquire(self, priority=Priority.normal, group=None):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), group, future))
+        self._poke()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Слот мог быть выдан одновременно с отменой — возвращаем его
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._poke()
+
+    @asynccontextmanager
+    async def slot(self, priority=Priority.normal, group=None):
+        await self.acquire(priority, group)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def update(self, group=None, remaining=None, reset_ms=None, limit=None):
+        """
+        Синхронизирует квоту группы с тем, что сообщила биржа. Лимит относится к эндпоинту, а не к аккаунту,
+        поэтому ёмкость общего bucket он не меняет.
+        """
+        if remaining is None:
+            return
+        now = time.monotonic()
+        reset_at = now + max(0.0, reset_ms / 1000 - time.time()) if reset_ms else now
+        self._groups[group] = [remaining, reset_at, limit]
+
+    def update_from_headers(self, headers, group=None):
+        remaining = headers.get("X-Bapi-Limit-Status")
+        reset_ms = headers.get("X-Bapi-Limit-Reset-Timestamp")
+        limit = headers.get("X-Bapi-Limit")
+        self.update(
+            group,
+            remaining=int(remaining) if remaining is not None else None,
+            reset_ms=int(reset_ms) if reset_ms is not None else None,
+            limit=int(limit) if limit is not None else None,
+        )
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "tokens": round(self.tokens, 2),
+            "active": self.active,
+            "waiting": sum(1 for _, _, _, future in self._waiters if not future.done()),
+            "exhausted_groups": sum(1 for group in self._groups if self._group_delay(group, now) > 0),
+        }
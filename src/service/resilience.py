@@ -0,0 +1,162 @@
+# resilience.py
+import random
+import re
+import time
+from src.service.metrics import exchange_circuit_trips
+
+# Быстрая проверка успешного ответа без декодирования тела: ret_code/retCode — первое поле ответа Bybit
+OK_PREFIX = re.compile(rb'\s*\{\s*"(?:ret_code|retCode)"\s*:\s*0\s*[,}]')
+
+
+class ExchangeError(Exception):
+    """
+    Ошибка биржи с классом: по классу решается, повторять ли запрос и чья это проблема — эндпоинта или аккаунта.
+    """
+    kind = "error"
+
+    def __init__(self, path, code=None, message=""):
+        super().__init__(f"{path}: {message}" + (f" (code {code})" if code is not None else ""))
+        self.path = path
+        self.code = code
+        self.message = message
+
+
+class AuthError(ExchangeError):
+    # Неверный или просроченный ключ, подпись, нет прав, IP не в белом списке: повтор не поможет
+    kind = "auth"
+
+
+class RateLimitError(ExchangeError):
+    # Биржа отклонила запрос до исполнения — повтор после паузы безопасен
+    kind = "rate_limit"
+
+
+class InvalidRequestError(ExchangeError):
+    # Ошибка параметров или бизнес-правил (нет ордера, мало баланса): повтор с теми же параметрами бесполезен
+    kind = "invalid"
+
+
+class TransientError(ExchangeError):
+    # Сбой сервиса, таймаут, обрыв соединения: исход запроса неизвестен
+    kind = "transient"
+
+
+class CircuitOpenError(TransientError):
+    # Запрос не отправлялся: эндпоинт или аккаунт временно отключены предохранителем
+    kind = "circuit_open"
+
+    def __init__(self, path, retry_after, message):
+        super().__init__(path, None, message)
+        self.retry_after = retry_after
+
+
+# Ошибки, при которых биржа точно не исполнила запрос; при остальных его исход неизвестен
+REJECTED_ERRORS = (InvalidRequestError, AuthError, RateLimitError, CircuitOpenError)
+
+# Коды ошибок Bybit (v2 и v5); остальные ненулевые коды считаются ошибками запроса
+ERROR_CODES = {
+    10000: TransientError,  # server timeout
+    10002: TransientError,  # timestamp вне recv_window — обычно рассинхронизация часов
+    10003: AuthError,  # invalid api key
+    10004: AuthError,  # sign error
+    10005: AuthError,  # permission denied
+    10006: RateLimitError,  # too many visits
+    10007: AuthError,  # user authentication failed
+    10010: AuthError,  # unmatched IP
+    10016: TransientError,  # service error
+    10018: RateLimitError,  # IP rate limit
+    33004: AuthError,  # api key expired
+}
+
+HTTP_ERRORS = {401: AuthError, 403: RateLimitError, 429: RateLimitError}
+
+
+def classify(code):
+    return ERROR_CODES.get(code, InvalidRequestError)
+
+
+def classify_http(status):
+    if status >= 500:
+        return TransientError
+    return HTTP_ERRORS.get(status, InvalidRequestError)
+
+
+def backoff_delay(attempt, base=0.5, cap=30):
+    """
+    Экспоненциальная пауза с полным джиттером: случайная в [0, min(cap, base * 2^attempt)],
+    чтобы аккаунты после общего сбоя не возвращались к бирже одновременно.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Предохранитель: после failure_threshold ошибок подряд размыкается на reset_timeout секунд и отклоняет запросы
+    без обращения к бирже. Затем пропускает один пробный запрос: успех замыкает цепь, ошибка снова размыкает.
+    """
+
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+    def __init__(self, scope, failure_threshold=5, reset_timeout=30):
+        self.scope = scope  # endpoint / account — метка метрики срабатываний
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.closed
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_at = None
+
+    def retry_after(self):
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self):
+        now = time.monotonic()
+        if self.state == self.closed:
+            return True
+        if self.state == self.open:
+            if now - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.half_open
+        # Один пробный запрос; если он потерялся (отмена задачи), через reset_timeout пропускаем следующий
+        if self._probe_at is not None and now - self._probe_at < self.reset_timeout:
+            return False
+        self._probe_at = now
+        return True
+
+    def record_success(self):
+        self.state = self.closed
+        self.failures = 0
+        self._probe_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_at = None
+        if self.state == self.half_open or (self.state == self.closed and self.failures >= self.failure_threshold):
+            self.state = self.open
+            self._opened_at = time.monotonic()
+            exchange_circuit_trips.inc(self.scope)
+
+
+class BreakerRegistry:
+    """
+    Предохранители эндпоинтов, общие для всех клиентов: сбой эндпоинта отключает его сразу для всех аккаунтов.
+    """
+
+    def __init__(self, failure_threshold=10, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}  # path: CircuitBreaker
+
+    def get(self, path):
+        breaker = self._breakers.get(path)
+        if breaker is None:
+            breaker = self._breakers[path] = CircuitBreaker("endpoint", self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def stats(self):
+        return {path: breaker.state for path, breaker in self._breakers.items() if breaker.state != CircuitBreaker.closed}
+
+
+endpoint_breakers = BreakerRegistry()
@@ -0,0 +1,135 @@
+# scheduler.py
+import asyncio
+import math
+import random
+import numpy as np
+from src.service.logger import logger
+
+WHEEL_TICK = 0.05  # секунд на слот колеса
+WHEEL_SLOTS = 1200  # один оборот — 60 секунд
+MIN_CHECK_INTERVAL = 0.5  # секунд: цена у самого уровня
+DEFAULT_CHECK_INTERVAL = 5  # секунд, пока волатильность символа ещё не оценена
+MAX_CHECK_INTERVAL = 30  # секунд: спокойный рынок, уровни далеко
+CHECK_HORIZON = 0.25  # доля ожидаемого времени до касания уровня, через которую проверяем снова
+CHECK_JITTER = 0.2  # случайный разброс задержки, чтобы аккаунты не просыпались в одну и ту же секунду
+
+
+class TimerHandle:
+    __slots__ = ("rounds", "callback", "args", "cancelled")
+
+    def __init__(self, rounds, callback, args):
+        self.rounds = rounds
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    Хешированное колесо таймеров: один фоновый таск раз в tick продвигает курсор и вызывает таймеры слота.
+    Постановка и отмена — O(1), а тысячи ожиданий аккаунтов не создают тысячи таймеров event loop.
+    """
+
+    def __init__(self, tick=WHEEL_TICK, slots=WHEEL_SLOTS):
+        self.tick = tick
+        self._slots = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._task = None
+        self.scheduled = 0
+        self.fired = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def call_later(self, delay, callback, *args):
+        self.start()
+        # Слот в 1..len(slots) тиков от курсора: нулевое смещение попало бы в текущий слот,
+        # который курсор посетит только через полный оборот
+        ticks = max(1, math.ceil(delay / self.tick))
+        rounds, offset = divmod(ticks - 1, len(self._slots))
+        offset += 1
+        handle = TimerHandle(rounds, callback, args)
+        self._slots[(self._cursor + offset) % len(self._slots)].append(handle)
+        self.scheduled += 1
+        return handle
+
+    async def sleep(self, delay):
+        # Аналог asyncio.sleep на колесе: пауза аккаунта не заводит собственный таймер event loop
+        waiter = asyncio.get_running_loop().create_future()
+        handle = self.call_later(delay, _wake, waiter)
+        try:
+            await waiter
+        finally:
+            handle.cancel()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            # Шаг привязан к абсолютному времени: если loop отстал, пропущенные слоты догоняются без сна
+            next_tick += self.tick
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            self._advance()
+
+    def _advance(self):
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        slot = self._slots[self._cursor]
+        if not slot:
+            return
+        pending = []
+        for handle in slot:
+            if handle.cancelled:
+                continue
+            if handle.rounds:
+                handle.rounds -= 1
+                pending.append(handle)
+                continue
+            self.fired += 1
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                logger.error(f"Timer wheel: callback failed: {e}")
+        self._slots[self._cursor] = pending
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for slot in self._slots:
+            slot.clear()
+
+    def stats(self):
+        return {"pending": sum(len(slot) for slot in self._slots), "scheduled": self.scheduled, "fired": self.fired}
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def next_check_delay(price, targets, volatility, max_delay=MAX_CHECK_INTERVAL):
+    """
+    Задержка до следующей проверки аккаунта. targets — цены, касание которых требует реакции (живые ордера, стоплосс),
+    volatility — стандартное отклонение лог-доходности за секунду. Для случайного блуждания ожидаемое время
+    до касания растёт как (расстояние / волатильность)^2; проверяем через долю CHECK_HORIZON этого времени.
+    """
+    targets = np.asarray(targets, dtype=np.float64)
+    if not len(targets) or price <= 0:
+        delay = max_delay
+    elif volatility is None:
+        delay = DEFAULT_CHECK_INTERVAL
+    elif volatility == 0:
+        delay = max_delay
+    else:
+        distance = float(np.min(np.abs(np.log(targets / price))))
+        delay = CHECK_HORIZON * (distance / volatility) ** 2
+    delay = min(max(delay, MIN_CHECK_INTERVAL), max_delay)
+    return delay * random.uniform(1 - CHECK_JITTER, 1)
+
+
+timer_wheel = TimerWheel()
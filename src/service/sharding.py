@@ -0,0 +1,23 @@
+# sharding.py
+import bisect
+import hashlib
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(str(value).encode('utf-8')).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Консистентное хеширование аккаунтов по шардам: при изменении числа шардов переезжает лишь малая часть аккаунтов.
+    """
+
+    def __init__(self, shard_count, vnodes=160):
+        self.shard_count = shard_count
+        points = sorted((_hash(f"shard-{shard}#{v}"), shard) for shard in range(shard_count) for v in range(vnodes))
+        self._keys = [key for key, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, account_id):
+        index = bisect.bisect(self._keys, _hash(account_id)) % len(self._keys)
+        return self._shards[index]
@@ -0,0 +1,121 @@
+# stop_loss.py
+import asyncio
+import time
+from bisect import bisect_right, insort
+from src.manage_accounts.models import Category
+from src.service.logger import logger
+from src.service.market_data import market_data_hub
+from src.service.metrics import stop_loss_seconds, stop_loss_triggers
+
+
+def _remove(index, market, entry):
+    entries = index.get(market)
+    if not entries:
+        return
+    i = bisect_right(entries, entry) - 1
+    if i >= 0 and entries[i] == entry:
+        del entries[i]
+    if not entries:
+        del index[market]
+
+
+class StopLossWatcher:
+    """
+    Стоплоссы всех аккаунтов процесса: на каждый рынок (биржа, символ, категория) — отсортированный список (порог, account_id).
+    Обновление цены находит сработавшие аккаунты бинарным поиском за O(log n + k) и сразу запускает
+    их обработчики параллельно, не дожидаясь цикла грид-воркера.
+    Срабатывание — по пересечению порога сверху вниз: сработавший аккаунт снова ставится на контроль,
+    когда цена вернётся к порогу; пока цена ниже, стоплосс проверяет цикл воркера.
+
+    Задержка от пересечения до рыночной продажи складывается из опроса цены (до MARKET_DATA_INTERVAL) и ожидания
+    блокировки аккаунта, которую держит воркер. Обработчик сразу останавливает сетку, и sync_orders не начинает
+    новых выставлений: ожидание ограничено запросами, уже отправленными под блокировкой (обычно одна пачка отмены
+    или выставления, при неизвестном исходе пачки — ещё сверка с открытыми ордерами, на первом цикле — восстановление сетки)
+    и сохранением состояния.
+    Гистограмма stop_loss_seconds меряет от обновления цены до конца обработчика, включая ожидание блокировки.
+    """
+
+    def __init__(self):
+        self._armed = {}  # (exchange, symbol, category): [(stop_loss, account_id)] по возрастанию порога
+        self._tripped = {}  # (exchange, symbol, category): [(stop_loss, account_id)] сработавшие, ждут возврата цены
+        self._accounts = {}  # account_id: ((exchange, symbol, category), stop_loss, handler)
+        self._firing = {}  # account_id: asyncio.Task сработавшего обработчика
+        self._attached = False
+
+    def register(self, account, handler):
+        """
+        Ставит стоплосс аккаунта на контроль. handler(price) — корутина отмены ордеров и продажи по рынку.
+        """
+        if not self._attached:
+            market_data_hub.add_listener(self.on_price)
+            self._attached = True
+        self.unregister(account.id)
+        market = (account.exchange, account.symbol, account.category)
+        self._accounts[account.id] = (market, account.stop_loss, handler)
+        insort(self._armed.setdefault(market, []), (account.stop_loss, account.id))
+
+    def unregister(self, account_id):
+        entry = self._accounts.pop(account_id, None)
+        if entry is not None:
+            market, stop_loss, _ = entry
+            _remove(self._armed, market, (stop_loss, account_id))
+            _remove(self._tripped, market, (stop_loss, account_id))
+        task = self._firing.pop(account_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+    def on_price(self, exchange, symbol, price, category=Category.inverse):
+        market = (exchange, symbol, category)
+        key = (price, float("inf"))
+        # Сработавшие с порогом не выше цены снова на контроле — это голова их списка
+        tripped = self._tripped.get(market)
+        if tripped and tripped[0][0] <= price:
+            i = bisect_right(tripped, key)
+            for entry in tripped[:i]:
+                insort(self._armed.setdefault(market, []), entry)
+            del tripped[:i]
+        # Сработали все пороги выше цены — это хвост списка; снимаем их с контроля
+        armed = self._armed.get(market)
+        if not armed or armed[-1][0] <= price:
+            return
+        i = bisect_right(armed, key)
+        triggered = armed[i:]
+        del armed[i:]
+        started = time.perf_counter()
+        for _, account_id in triggered:
+            stop_loss_triggers.inc()
+            self._firing[account_id] = asyncio.create_task(self._fire(account_id, price, started))
+
+    async def _fire(self, account_id, price, started):
+        market, stop_loss, handler = self._accounts[account_id]
+        try:
+            await handler(price)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Stop-loss for account {account_id} at {price} failed: {e}")
+        finally:
+            stop_loss_seconds.observe(value=time.perf_counter() - started)
+        if self._firing.pop(account_id, None) is not None and account_id in self._accounts:
+            insort(self._tripped.setdefault(market, []), (stop_loss, account_id))
+
+    def stats(self):
+        return {
+            "accounts": len(self._accounts),
+            "markets": len(self._armed.keys() | self._tripped.keys()),
+            "armed": sum(map(len, self._armed.values())),
+            "firing": len(self._firing),
+        }
+
+    async def close(self):
+        tasks = list(self._firing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._firing.clear()
+        self._accounts.clear()
+        self._armed.clear()
+        self._tripped.clear()
+
+
+stop_loss_watcher = StopLossWatcher()
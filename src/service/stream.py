@@ -0,0 +1,162 @@
+# stream.py
+import asyncio
+import itertools
+from collections import OrderedDict
+from src.service.events import account_events, fill_events
+from src.service.market_data import market_data_hub
+from src.service.logger import logger
+
+OUTBOX_SIZE = 256  # сообщений в очереди одного подключения
+
+
+class Outbox:
+    """
+    Ограниченная очередь подключения. Сообщения с ключом (статус аккаунта, цена символа) схлопываются:
+    в очереди остаётся только последнее значение. Если очередь полна, самое старое сообщение выбрасывается.
+    """
+
+    def __init__(self, maxsize=OUTBOX_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()  # key: message
+        self._seq = itertools.count()
+        self._ready = asyncio.Event()
+        self._dropped = 0  # выброшено с последней отправки
+        self.dropped = 0
+        self.coalesced = 0
+
+    def put(self, key, message):
+        if key is not None and key in self._items:
+            self._items[key] = message
+            self.coalesced += 1
+        else:
+            if len(self._items) >= self.maxsize:
+                self._items.popitem(last=False)
+                self._dropped += 1
+                self.dropped += 1
+            self._items[key if key is not None else next(self._seq)] = message
+        self._ready.set()
+
+    async def get_batch(self):
+        """
+        Ждёт сообщений и забирает всё накопленное одной пачкой; о выброшенных сообщениях сообщает отдельной записью.
+        """
+        await self._ready.wait()
+        batch = list(self._items.values())
+        if self._dropped:
+            batch.append({"type": "dropped", "count": self._dropped})
+            self._dropped = 0
+        self._items.clear()
+        self._ready.clear()
+        return batch
+
+
+class StreamHub:
+    """
+    Раздача событий подключённым клиентам: одна подписка процесса на шины событий и по одному потоку цен на рынок,
+    дальше — только раскладка по очередям подключений нужных аккаунтов.
+    """
+
+    def __init__(self, outbox_size=OUTBOX_SIZE):
+        self.outbox_size = outbox_size
+        self._by_account = {}  # account_id: set(Outbox)
+        self._by_market = {}  # (exchange, symbol, category): set(Outbox)
+        self._watchers = {}  # (exchange, symbol, category): asyncio.Task
+        self._pumps = []
+
+    def _start(self):
+        if not self._pumps:
+            self._pumps = [
+                asyncio.create_task(self._pump(account_events, self._on_status)),
+                asyncio.create_task(self._pump(fill_events, self._on_fill)),
+            ]
+
+    def connect(self, accounts):
+        """
+        Регистрирует подключение для аккаунтов {account_id: (exchange, symbol, category)} и возвращает его очередь.
+        """
+        self._start()
+        outbox = Outbox(self.outbox_size)
+        for account_id in accounts:
+            self._by_account.setdefault(account_id, set()).add(outbox)
+        for market in set(accounts.values()):
+            outboxes = self._by_market.setdefault(market, set())
+            if not outboxes:
+                exchange, symbol, category = market
+                market_data_hub.subscribe(symbol, exchange, category)
+                self._watchers[market] = asyncio.create_task(self._watch(exchange, symbol, category))
+            outboxes.add(outbox)
+        return outbox
+
+    def disconnect(self, outbox, accounts):
+        for account_id in accounts:
+            outboxes = self._by_account.get(account_id)
+            if outboxes is not None:
+                outboxes.discard(outbox)
+                if not outboxes:
+                    del self._by_account[account_id]
+        for market in set(accounts.values()):
+            outboxes = self._by_market.get(market)
+            if outboxes is None:
+                continue
+            outboxes.discard(outbox)
+            if not outboxes:
+                del self._by_market[market]
+                self._watchers.pop(market).cancel()
+                exchange, symbol, category = market
+                market_data_hub.unsubscribe(symbol, exchange, category)
+
+    async def _pump(self, bus, handler):
+        queue = bus.subscribe()
+        try:
+            while True:
+                handler(await queue.get())
+        finally:
+            bus.unsubscribe(queue)
+
+    def _on_status(self, event):
+        message = {"type": "status", "account_id": event.account_id, "status": event.status.value}
+        for outbox in self._by_account.get(event.account_id, ()):
+            outbox.put(("status", event.account_id), message)
+
+    def _on_fill(self, event):
+        message = {"type": "fill", "account_id": event.account_id, "side": event.side, "price": event.price, "quantity": event.quantity}
+        for outbox in self._by_account.get(event.account_id, ()):
+            outbox.put(None, message)
+
+    async def _watch(self, exchange, symbol, category):
+        while True:
+            try:
+                quote = await market_data_hub.wait_update(symbol, exchange, category=category)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Stream: price watcher for {exchange.value}:{category.value}:{symbol} failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            message = {"type": "price", "exchange": exchange.value, "category": category.value, "symbol": symbol, "price": quote.price}
+            for outbox in self._by_market.get((exchange, symbol, category), ()):
+                outbox.put(("price", exchange, symbol, category), message)
+
+    async def serve(self, websocket, outbox):
+        """
+        Отправляет пачки из очереди подключения, пока клиент не отключится.
+        """
+        async def send():
+            while True:
+                await websocket.send_json(await outbox.get_batch())
+
+        sender = asyncio.create_task(send())
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+        finally:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+
+    def stats(self):
+        return {"accounts": len(self._by_account), "markets": len(self._by_market)}
+
+
+stream_hub = StreamHub()
@@ -0,0 +1,123 @@
+# trade_writer.py
+import asyncio
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from src.database import engine
+from src.manage_accounts.models import Trade
+from src.service.logger import logger
+from src.service.metrics import trade_flush_seconds, trade_queue_depth
+
+async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+FLUSH_RETRIES = 3
+FLUSH_RETRY_DELAY = 1  # секунд, пауза растёт линейно с номером попытки
+MAX_SPILL = 10000  # строк, ожидающих повторной записи после неудачных попыток
+
+
+class TradeWriter:
+    """
+    Отложенная запись сделок: строки копятся в очереди и вставляются пачками одним multi-row INSERT.
+    Очередь ограничена, поэтому при отставании БД производители ждут (backpressure).
+    Пачка, которую не удалось записать за FLUSH_RETRIES попыток, откладывается и пишется первой при следующем сбросе;
+    строки, не поместившиеся в отложенные или не записанные к остановке, пишутся в лог на уровне ERROR.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=1.0, max_queue=10000, max_spill=MAX_SPILL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_spill = max_spill
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._spill = []  # строки неудачных пачек
+        self._task = None
+        self.written = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, row):
+        self.start()
+        await self._queue.put(row)
+
+    async def _collect(self):
+        # Ждём первую строку, затем добираем пачку до batch_size или до истечения flush_interval.
+        # None в очереди — сигнал остановки. Пока есть отложенные строки, первую ждём не дольше flush_interval
+        loop = asyncio.get_running_loop()
+        if self._spill:
+            try:
+                row = await asyncio.wait_for(self._queue.get(), self.flush_interval)
+            except asyncio.TimeoutError:
+                return [], False
+        else:
+            row = await self._queue.get()
+        if row is None:
+            return [], True
+        # Окно пачки отсчитываем от первой строки, а не от начала ожидания
+        deadline = loop.time() + self.flush_interval
+        batch = [row]
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                row = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if row is None:
+                return batch, True
+            batch.append(row)
+        return batch, False
+
+    async def _flush(self, batch):
+        for attempt in range(1, FLUSH_RETRIES + 1):
+            try:
+                with trade_flush_seconds.time():
+                    async with async_session() as session:
+                        await session.execute(insert(Trade), batch)
+                        await session.commit()
+                self.written += len(batch)
+                trade_queue_depth.set(value=self._queue.qsize())
+                return
+            except Exception as e:
+                logger.error(f"Trade writer: failed to write {len(batch)} trades (attempt {attempt}): {e}")
+                await asyncio.sleep(attempt * FLUSH_RETRY_DELAY)
+        self._spill.extend(batch)
+        if len(self._spill) > self.max_spill:
+            self._drop(self._spill[:-self.max_spill])
+            del self._spill[:-self.max_spill]
+
+    def _drop(self, rows):
+        # Последний след сделки — лог: строки можно восстановить из него вручную
+        self.dropped += len(rows)
+        for row in rows:
+            logger.error(f"Trade writer: dropped trade {row}")
+
+    async def _run(self):
+        while True:
+            batch, stop = await self._collect()
+            if self._spill:
+                batch, self._spill = self._spill + batch, []
+            if batch:
+                await self._flush(batch)
+            if stop:
+                if self._spill:
+                    self._drop(self._spill)
+                    self._spill = []
+                return
+
+    async def close(self):
+        """
+        Дописывает всё, что осталось в очереди, и останавливает фоновую задачу.
+        """
+        if self._task is not None and not self._task.done():
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+        logger.info(f"Trade writer closed: {self.stats()}")
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), "spilled": len(self._spill), "written": self.written, "dropped": self.dropped}
+
+
+trade_writer = TradeWriter()
@@ -0,0 +1,157 @@
+# matching.py
+import heapq
+import itertools
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+HISTORY_LIMIT = 200  # закрытых ордеров на пару (владелец, символ); более старые забываются, как и на бирже
+
+
+@dataclass(slots=True)
+class SimOrder:
+    order_id: str
+    owner: str  # api_key владельца
+    symbol: str
+    side: str  # Buy / Sell
+    order_type: str  # Limit / Market
+    qty: float
+    price: float | None
+    status: str = "New"  # New / Filled / Cancelled
+    created_at: float = field(default_factory=time.time)
+    filled_at: float | None = None
+    fill_price: float | None = None
+    seq: int = 0  # порядковый номер выставления: история отдаётся от новых к старым
+
+
+class PricePath:
+    """
+    Геометрическое случайное блуждание цены с заданной волатильностью за тик.
+    """
+
+    def __init__(self, start, volatility=0.0005, seed=None):
+        self.price = start
+        self.volatility = volatility
+        self._random = random.Random(seed)
+
+    def next(self):
+        self.price *= math.exp(self._random.gauss(0, self.volatility))
+        return self.price
+
+
+class MatchingEngine:
+    """
+    Простейший матчинг: лимитные ордера исполняются, когда цена пути доходит до их цены, рыночные — сразу по последней цене.
+    """
+
+    def __init__(self, prices, volatility=0.0005, seed=None, history_limit=HISTORY_LIMIT):
+        self.volatility = volatility
+        self.history_limit = history_limit
+        self.paths = {symbol: PricePath(price, volatility, None if seed is None else seed + i) for i, (symbol, price) in enumerate(prices.items())}
+        self.orders = {}  # order_id: SimOrder — открытые и ещё хранящиеся в истории
+        self._open = {symbol: {} for symbol in prices}  # symbol: {order_id: SimOrder}
+        self._owned = {}  # (owner, symbol): {order_id: SimOrder} открытых ордеров
+        self._closed = {}  # (owner, symbol): deque закрытых ордеров, от старых к новым
+        self._ids = itertools.count(1)
+        self._listeners = []  # callback(order) на каждое исполнение
+        self.placed = 0
+        self.filled = 0
+        self.cancelled = 0
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def add_symbol(self, symbol, price, volatility=None, seed=None):
+        """
+        Добавляет символ с начальной ценой; существующий символ не меняется.
+        """
+        if symbol not in self.paths:
+            self.paths[symbol] = PricePath(price, self.volatility if volatility is None else volatility, seed)
+            self._open[symbol] = {}
+
+    def last_price(self, symbol):
+        return self.paths[symbol].price
+
+    def _close(self, order):
+        # Закрытый ордер уходит из стакана в ограниченную историю владельца; вытесненный забывается совсем
+        self._open[order.symbol].pop(order.order_id, None)
+        owned = self._owned.get((order.owner, order.symbol))
+        if owned is not None:
+            owned.pop(order.order_id, None)
+            if not owned:
+                del self._owned[(order.owner, order.symbol)]
+        closed = self._closed.get((order.owner, order.symbol))
+        if closed is None:
+            closed = self._closed[(order.owner, order.symbol)] = deque()
+        if len(closed) >= self.history_limit:
+            self.orders.pop(closed.popleft().order_id, None)
+        closed.append(order)
+
+    def _fill(self, order, price):
+        order.status = "Filled"
+        order.fill_price = price
+        order.filled_at = time.time()
+        self._close(order)
+        self.filled += 1
+        for callback in self._listeners:
+            callback(order)
+
+    def _crosses(self, order, price):
+        return price <= order.price if order.side == "Buy" else price >= order.price
+
+    def place(self, owner, symbol, side, order_type, qty, price=None):
+        if symbol not in self.paths:
+            raise KeyError(symbol)
+        order = SimOrder(
+            order_id=f"sim-{next(self._ids)}", owner=owner, symbol=symbol, side=side,
+            order_type=order_type, qty=float(qty), price=None if price is None else float(price), seq=self.placed,
+        )
+        self.orders[order.order_id] = order
+        self.placed += 1
+        last = self.last_price(symbol)
+        if order_type == "Market":
+            self._fill(order, last)
+        elif self._crosses(order, last):
+            # Лимитный ордер по ту сторону рынка исполняется сразу по лучшей цене
+            self._fill(order, last)
+        else:
+            self._open[symbol][order.order_id] = order
+            self._owned.setdefault((owner, symbol), {})[order.order_id] = order
+        return order
+
+    def cancel(self, owner, symbol, order_id):
+        order = self._open.get(symbol, {}).get(order_id)
+        if order is None or order.owner != owner:
+            return None
+        order.status = "Cancelled"
+        self._close(order)
+        self.cancelled += 1
+        return order
+
+    def get(self, owner, order_id):
+        order = self.orders.get(order_id)
+        return order if order is not None and order.owner == owner else None
+
+    def open_orders(self, owner, symbol):
+        return list(self._owned.get((owner, symbol), {}).values())
+
+    def history(self, owner, symbol, status=None, limit=50):
+        """
+        Последние ордера владельца по символу, от новых к старым: открытые и не более history_limit закрытых.
+        """
+        orders = [] if status not in (None, "New") else self.open_orders(owner, symbol)
+        closed = self._closed.get((owner, symbol), ())
+        orders.extend(order for order in closed if status is None or order.status == status)
+        return heapq.nlargest(limit, orders, key=lambda order: order.seq)
+
+    def tick(self):
+        for symbol, path in self.paths.items():
+            price = path.next()
+            for order in [order for order in self._open[symbol].values() if self._crosses(order, price)]:
+                self._fill(order, order.price)
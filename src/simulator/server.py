@@ -0,0 +1,341 @@
+# server.py
+import asyncio
+import json
+import random
+import time
+from aiohttp import web
+from src.simulator.matching import MatchingEngine
+
+
+def _order_v5(order):
+    return {
+        "orderId": order.order_id,
+        "symbol": order.symbol,
+        "side": order.side,
+        "orderType": order.order_type,
+        "price": "" if order.price is None else str(order.price),
+        "qty": str(order.qty),
+        "orderStatus": order.status,
+    }
+
+
+def _order_v2(order):
+    return {
+        "order_id": order.order_id,
+        "symbol": order.symbol,
+        "side": order.side,
+        "order_type": order.order_type,
+        "price": order.price,
+        "qty": order.qty,
+        "order_status": order.status,
+    }
+
+
+class SimulatedExchange:
+    """
+    Локальная замена Bybit для нагрузочных тестов: эндпоинты, которые использует AsyncBybitClient,
+    приватный WebSocket с исполнениями, задержки, случайные ошибки и ответы о превышении лимита.
+    """
+
+    def __init__(self, engine: MatchingEngine, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None,
+                 tick_interval=0.1, tick_size=0.01, qty_step=0.0001, min_qty=0.0001, seed=None):
+        self.engine = engine
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # запросов в секунду на API-ключ, None — без ограничений
+        self.tick_interval = tick_interval
+        self.tick_size = tick_size
+        self.qty_step = qty_step
+        self.min_qty = min_qty
+        self._random = random.Random(seed)
+        self._windows = {}  # api_key: (начало секундного окна, число запросов)
+        self._sockets = {}  # api_key: {WebSocketResponse: v5}
+        self._runner = None
+        self._ticker = None
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/v2/public/tickers", self.tickers),
+            web.get("/v2/public/symbols", self.symbols),
+            web.post("/v2/private/order/create", self.create_order),
+            web.get("/v2/private/order", self.get_order),
+            web.get("/v2/private/order/list", self.order_list),
+            web.post("/v2/private/order/cancel", self.cancel_order),
+            web.post("/v5/order/create-batch", self.create_batch),
+            web.post("/v5/order/cancel-batch", self.cancel_batch),
+            web.get("/v5/market/tickers", self.tickers_v5),
+            web.get("/v5/market/instruments-info", self.instruments_v5),
+            web.post("/v5/order/create", self.create_order_v5),
+            web.get("/v5/order/realtime", self.open_orders_v5),
+            web.get("/v5/order/history", self.order_history_v5),
+            web.get("/realtime", self.realtime),
+            web.get("/v5/private", self.realtime_v5),
+        ])
+        engine.add_listener(self._on_fill)
+
+    async def start(self, host="127.0.0.1", port=0):
+        """
+        Запускает сервер и движение цены. Возвращает (http_endpoint, ws_endpoint).
+        """
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self._ticker = asyncio.create_task(self._tick())
+        return f"http://{host}:{port}", f"ws://{host}:{port}/realtime"
+
+    async def stop(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+            await asyncio.gather(self._ticker, return_exceptions=True)
+        for sockets in self._sockets.values():
+            for ws in list(sockets):
+                await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.engine.tick()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "placed": self.engine.placed,
+            "filled": self.engine.filled,
+            "cancelled": self.engine.cancelled,
+        }
+
+    # Общая обработка запроса: задержка, лимит, случайные ошибки
+
+    def _quota(self, api_key):
+        now = time.time()
+        start, count = self._windows.get(api_key, (now, 0))
+        if now - start >= 1:
+            start, count = now, 0
+        count += 1
+        self._windows[api_key] = (start, count)
+        limit = self.rate_limit or 0
+        return count, limit, int((start + 1) * 1000)
+
+    async def _prepare(self, api_key):
+        """
+        Возвращает готовый ответ с ошибкой или None, а также поля квоты для ответа.
+        """
+        self.requests += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self._random.uniform(0, self.jitter))
+        count, limit, reset_ms = self._quota(api_key)
+        quota = {"rate_limit": limit, "rate_limit_status": max(0, limit - count), "rate_limit_reset_ms": reset_ms}
+        if self.rate_limit and count > self.rate_limit:
+            self.rate_limited += 1
+            return {"ret_code": 10006, "ret_msg": "Too many visits!", "result": None, **quota}, quota
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return {"ret_code": 10016, "ret_msg": "Service error", "result": None, **quota}, quota
+        return None, quota
+
+    @staticmethod
+    def _ok(result, quota):
+        return web.json_response({"ret_code": 0, "ret_msg": "OK", "result": result, "time_now": str(time.time()), **quota})
+
+    @staticmethod
+    def _v5(body, quota):
+        headers = {
+            "X-Bapi-Limit": str(quota["rate_limit"]),
+            "X-Bapi-Limit-Status": str(quota["rate_limit_status"]),
+            "X-Bapi-Limit-Reset-Timestamp": str(quota["rate_limit_reset_ms"]),
+        }
+        return web.json_response(body, headers=headers if quota["rate_limit"] else None)
+
+    # Публичные эндпоинты
+
+    async def tickers(self, request):
+        symbol = request.query.get("symbol")
+        error, quota = await self._prepare(request.remote)
+        if error:
+            return web.json_response(error)
+        symbols = [symbol] if symbol else list(self.engine.paths)
+        return self._ok([{"symbol": s, "last_price": str(self.engine.last_price(s))} for s in symbols if s in self.engine.paths], quota)
+
+    async def symbols(self, request):
+        return self._ok([
+            {
+                "name": symbol,
+                "price_filter": {"tick_size": str(self.tick_size)},
+                "lot_size_filter": {"qty_step": str(self.qty_step), "min_trading_qty": self.min_qty},
+            }
+            for symbol in self.engine.paths
+        ], {})
+
+    # Приватные эндпоинты v2
+
+    async def create_order(self, request):
+        params = await request.post()
+        error, quota = await self._prepare(params.get("api_key"))
+        if error:
+            return web.json_response(error)
+        order = self.engine.place(
+            params["api_key"], params["symbol"], params["side"], params["order_type"], params["qty"], params.get("price"),
+        )
+        return self._ok(_order_v2(order), quota)
+
+    async def get_order(self, request):
+        params = request.query
+        api_key = params.get("api_key")
+        error, quota = await self._prepare(api_key)
+        if error:
+            return web.json_response(error)
+        order_id = params.get("order_id")
+        if order_id:
+            order = self.engine.get(api_key, order_id)
+            if order is None:
+                return web.json_response({"ret_code": 20001, "ret_msg": "Order not exists", "result": None, **quota})
+            return self._ok(_order_v2(order), quota)
+        return self._ok([_order_v2(order) for order in self.engine.open_orders(api_key, params["symbol"])], quota)
+
+    async def order_list(self, request):
+        params = request.query
+        api_key = params.get("api_key")
+        error, quota = await self._prepare(api_key)
+        if error:
+            return web.json_response(error)
+        orders = self.engine.history(api_key, params["symbol"], params.get("order_status"), int(params.get("limit", 50)))
+        return self._ok({"data": [_order_v2(order) for order in orders], "cursor": ""}, quota)
+
+    async def cancel_order(self, request):
+        params = await request.post()
+        error, quota = await self._prepare(params.get("api_key"))
+        if error:
+            return web.json_response(error)
+        order = self.engine.cancel(params["api_key"], params["symbol"], params["order_id"])
+        if order is None:
+            return web.json_response({"ret_code": 20001, "ret_msg": "Order not exists or too late to cancel", "result": None, **quota})
+        return self._ok(_order_v2(order), quota)
+
+    # Batch-эндпоинты v5
+
+    async def create_batch(self, request):
+        api_key = request.headers.get("X-BAPI-API-KEY")
+        body = await request.json()
+        error, quota = await self._prepare(api_key)
+        if error:
+            return self._v5({"retCode": error["ret_code"], "retMsg": error["ret_msg"], "result": {}}, quota)
+        items, statuses = [], []
+        for item in body["request"]:
+            order = self.engine.place(api_key, item["symbol"], item["side"], item.get("orderType", "Limit"), item["qty"], item.get("price"))
+            items.append({"orderId": order.order_id, "orderLinkId": item.get("orderLinkId", "")})
+            statuses.append({"code": 0, "msg": "OK"})
+        return self._v5({"retCode": 0, "retMsg": "OK", "result": {"list": items}, "retExtInfo": {"list": statuses}}, quota)
+
+    async def cancel_batch(self, request):
+        api_key = request.headers.get("X-BAPI-API-KEY")
+        body = await request.json()
+        error, quota = await self._prepare(api_key)
+        if error:
+            return self._v5({"retCode": error["ret_code"], "retMsg": error["ret_msg"], "result": {}}, quota)
+        items, statuses = [], []
+        for item in body["request"]:
+            order = self.engine.cancel(api_key, item["symbol"], item["orderId"])
+            items.append({"orderId": item["orderId"] if order else "", "orderLinkId": ""})
+            statuses.append({"code": 0, "msg": "OK"} if order else {"code": 110001, "msg": "Order does not exist"})
+        return self._v5({"retCode": 0, "retMsg": "OK", "result": {"list": items}, "retExtInfo": {"list": statuses}}, quota)
+
+    # Эндпоинты v5 для одиночных ордеров и публичных данных
+
+    async def tickers_v5(self, request):
+        error, quota = await self._prepare(request.remote)
+        if error:
+            return self._v5({"retCode": error["ret_code"], "retMsg": error["ret_msg"], "result": {}}, quota)
+        symbol = request.query.get("symbol")
+        symbols = [symbol] if symbol else list(self.engine.paths)
+        items = [{"symbol": s, "lastPrice": str(self.engine.last_price(s))} for s in symbols if s in self.engine.paths]
+        return self._v5({"retCode": 0, "retMsg": "OK", "result": {"category": request.query.get("category"), "list": items}}, quota)
+
+    async def instruments_v5(self, request):
+        items = [
+            {
+                "symbol": symbol,
+                "priceFilter": {"tickSize": str(self.tick_size)},
+                "lotSizeFilter": {"qtyStep": str(self.qty_step), "minOrderQty": str(self.min_qty)},
+            }
+            for symbol in self.engine.paths
+        ]
+        return web.json_response({"retCode": 0, "retMsg": "OK", "result": {"category": request.query.get("category"), "list": items}})
+
+    async def create_order_v5(self, request):
+        api_key = request.headers.get("X-BAPI-API-KEY")
+        body = await request.json()
+        error, quota = await self._prepare(api_key)
+        if error:
+            return self._v5({"retCode": error["ret_code"], "retMsg": error["ret_msg"], "result": {}}, quota)
+        order = self.engine.place(api_key, body["symbol"], body["side"], body.get("orderType", "Limit"), body["qty"], body.get("price"))
+        return self._v5({"retCode": 0, "retMsg": "OK", "result": {"orderId": order.order_id, "orderLinkId": ""}}, quota)
+
+    async def open_orders_v5(self, request):
+        api_key = request.headers.get("X-BAPI-API-KEY")
+        error, quota = await self._prepare(api_key)
+        if error:
+            return self._v5({"retCode": error["ret_code"], "retMsg": error["ret_msg"], "result": {}}, quota)
+        order_id = request.query.get("orderId")
+        if order_id:
+            # Как и Bybit, по orderId отдаём и недавно закрытый ордер
+            order = self.engine.get(api_key, order_id)
+            orders = [order] if order is not None else []
+        else:
+            orders = self.engine.open_orders(api_key, request.query["symbol"])
+        return self._v5({"retCode": 0, "retMsg": "OK", "result": {"list": [_order_v5(order) for order in orders]}}, quota)
+
+    async def order_history_v5(self, request):
+        api_key = request.headers.get("X-BAPI-API-KEY")
+        error, quota = await self._prepare(api_key)
+        if error:
+            return self._v5({"retCode": error["ret_code"], "retMsg": error["ret_msg"], "result": {}}, quota)
+        params = request.query
+        orders = self.engine.history(api_key, params["symbol"], params.get("orderStatus"), int(params.get("limit", 50)))
+        return self._v5({"retCode": 0, "retMsg": "OK", "result": {"list": [_order_v5(order) for order in orders]}}, quota)
+
+    # Приватный WebSocket: v2 (/realtime) и v5 (/v5/private) отличаются форматом ответов и ордеров
+
+    async def realtime(self, request):
+        return await self._realtime(request, v5=False)
+
+    async def realtime_v5(self, request):
+        return await self._realtime(request, v5=True)
+
+    async def _realtime(self, request, v5):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        api_key = None
+        try:
+            async for message in ws:
+                data = json.loads(message.data)
+                op = data.get("op")
+                if op == "auth":
+                    api_key = data["args"][0]
+                elif op == "subscribe" and api_key is not None:
+                    self._sockets.setdefault(api_key, {})[ws] = v5
+                success = op != "subscribe" or api_key is not None
+                if v5:
+                    await ws.send_json({"success": success, "ret_msg": "", "op": op, "conn_id": ""})
+                else:
+                    await ws.send_json({"success": success, "ret_msg": "", "request": data})
+        finally:
+            if api_key is not None:
+                self._sockets.get(api_key, {}).pop(ws, None)
+        return ws
+
+    def _on_fill(self, order):
+        messages = {
+            False: {"topic": "order", "data": [{**_order_v2(order), "filled_at": order.filled_at}]},
+            True: {"topic": "order", "data": [_order_v5(order)]},
+        }
+        for ws, v5 in list(self._sockets.get(order.owner, {}).items()):
+            asyncio.get_running_loop().create_task(ws.send_json(messages[v5]))
@@ -0,0 +1,71 @@
+# test_backtest.py
+from dataclasses import replace
+import numpy as np
+import pytest
+from src.backtest.data import Candles
+from src.backtest.engine import GridConfig, _segments, run_backtest
+
+# Одна пара ячеек: покупка на 100 и продажа на 110
+CONFIG = GridConfig(start_price=100, end_price=110, grid_count=1, stop_loss=50, deposit=1000, fee_rate=0.0)
+BUY_QTY, SELL_QTY = 10.0, round(1000 / 110, 4)
+
+
+def candles(rows):
+    # rows: (open, high, low, close)
+    o, h, l, c = (np.array(column, dtype=np.float64) for column in zip(*rows))
+    return Candles(timestamp=np.arange(len(rows)), open=o, high=h, low=l, close=c, volume=np.ones(len(rows)))
+
+
+def test_cells_flip_at_same_price():
+    data = candles([
+        (105, 105, 105, 105),
+        (105, 105, 99, 100),  # покупка на 100
+        (100, 111, 100, 105),  # купленное продаётся на 100, исходная продажа — на 110
+        (105, 105, 99, 100),  # обе ячейки покупают: 100 и 110 по открытию 105
+    ])
+    result = run_backtest(data, CONFIG)
+    assert (result.buy_fills, result.sell_fills) == (3, 2)
+    assert result.realized_pnl == pytest.approx(SELL_QTY * (110 - 105))
+    assert result.pnl == pytest.approx(result.equity[-1] - CONFIG.deposit)
+    assert result.stopped_at is None
+
+
+def test_fees_reduce_pnl():
+    data = candles([(105, 105, 99, 100), (100, 111, 100, 105)])
+    free = run_backtest(data, CONFIG)
+    paid = run_backtest(data, replace(CONFIG, fee_rate=0.001))
+    assert paid.fees == pytest.approx(0.001 * (100 * BUY_QTY + 100 * BUY_QTY + 110 * SELL_QTY))
+    assert paid.pnl == pytest.approx(free.pnl - paid.fees)
+    assert paid.pnl == pytest.approx(paid.equity[-1] - CONFIG.deposit)
+
+
+def test_segments_halt_until_close_recovers():
+    close = np.array([100, 90, 93, 96, 97, 80, 85])
+    assert _segments(close, 95) == [(0, 1, 1), (4, 5, 5)]
+    assert _segments(np.array([100, 101]), 95) == [(0, 2, None)]
+
+
+def test_stop_loss_sells_waiting_cells_and_resumes():
+    config = GridConfig(start_price=100, end_price=110, grid_count=1, stop_loss=95, deposit=1000, fee_rate=0.0)
+    data = candles([
+        (105, 105, 99, 100),  # покупка на 100
+        (100, 100, 90, 90),  # стоплосс на закрытии: исполнения свечи не учитываются
+        (90, 93, 89, 93),  # цена ниже порога — сетка стоит
+        (93, 96, 93, 96),  # закрытие не ниже порога — сетка снова выставляется
+        (96, 111, 96, 105),  # покупка по открытию 96 и исходная продажа на 110
+    ])
+    result = run_backtest(data, config)
+    assert (result.stopped_at, result.stops) == (1, 1)
+    # Продаются купленное ячейкой покупки и исходная продажа, как объём живых продаж в check_stop_loss
+    assert result.sell_fills == 2 and result.buy_fills == 2
+    assert result.realized_pnl == pytest.approx(BUY_QTY * (90 - 100))
+    assert result.pnl == pytest.approx(result.equity[-1] - config.deposit)
+
+
+def test_stop_without_recovery_keeps_grid_halted():
+    config = GridConfig(start_price=100, end_price=110, grid_count=1, stop_loss=95, deposit=1000, fee_rate=0.001)
+    data = candles([(94, 94, 90, 94), (94, 120, 80, 94)])
+    result = run_backtest(data, config)
+    assert (result.stopped_at, result.stops) == (0, 1)
+    assert result.buy_fills == 0 and result.sell_fills == 1
+    assert result.pnl == pytest.approx(result.equity[-1] - config.deposit)
@@ -0,0 +1,121 @@
+import asyncio
+import dataclasses
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from src.manage_accounts import routes
+from src.manage_accounts.models import Category, Exchange
+from src.manage_accounts.schemas import AccountCreate
+from src.service.client_registry import ClientRegistry
+
+
+def make_account(account_id, api_key="key", exchange=Exchange.bybit_v2, category=Category.inverse):
+    return SimpleNamespace(
+        id=account_id, api_key=api_key, secret_key="secret", exchange=exchange, category=category,
+        symbol="SIMUSD", start_price=90.0, end_price=110.0,
+    )
+
+
+def test_release_keeps_connector_of_shared_key():
+    async def scenario():
+        registry = ClientRegistry()
+        first, second = make_account(1), make_account(2)
+        connector = registry.get_connector(first)
+        assert registry.get_connector(second) is connector
+
+        await registry.release(first)
+        assert registry.stats()["clients"] == 1
+        assert registry.get_connector(second) is connector
+
+        await registry.release(second)
+        assert registry.stats()["clients"] == 0
+        assert registry.stats()["connectors"] == 0
+        await registry.close()
+
+    asyncio.run(scenario())
+
+
+def test_release_of_unknown_account_drops_its_key():
+    async def scenario():
+        registry = ClientRegistry()
+        registry.get_connector(make_account(1, api_key="other"))
+        await registry.release(make_account(2))
+        assert registry.stats()["clients"] == 1
+        await registry.release(make_account(1, api_key="other"))
+        assert registry.stats()["clients"] == 0
+        await registry.close()
+
+    asyncio.run(scenario())
+
+
+def test_simulated_exchange_is_disabled_by_default():
+    async def scenario():
+        registry = ClientRegistry()
+        with pytest.raises(ValueError):
+            registry.get_connector(make_account(1, exchange=Exchange.simulated))
+
+        registry = ClientRegistry(allow_simulated=True)
+        connector = registry.get_connector(make_account(1, exchange=Exchange.simulated))
+        assert (await connector.ticker("SIMUSD")).last_price == 100.0
+        await registry.close()
+
+    asyncio.run(scenario())
+
+
+def test_create_account_rejects_simulated_exchange(monkeypatch):
+    monkeypatch.setattr(routes, "Config", dataclasses.replace(routes.Config, allow_simulated_exchange=False))
+    payload = AccountCreate(
+        name="paper", api_key="key", secret_key="secret", symbol="SIMUSD", deposit=1000,
+        start_price=90, grid_count=10, end_price=110, stop_loss=80, exchange=Exchange.simulated,
+    )
+    request = SimpleNamespace(state=SimpleNamespace(db=None, user=SimpleNamespace(id=1)))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(routes.create_account(payload, request))
+    assert error.value.status_code == 400
+
+
+def test_category_of_account_reaches_v5_requests():
+    async def scenario():
+        registry = ClientRegistry()
+        spot = registry.get_connector(make_account(1, exchange=Exchange.bybit_v5, category=Category.spot))
+        inverse = registry.get_connector(make_account(2, exchange=Exchange.bybit_v5))
+        assert spot.client is not inverse.client
+        # Клиенты одного ключа делят его квоту
+        assert spot.client.scheduler is inverse.client.scheduler
+        assert registry.get_public_connector(Exchange.bybit_v5, Category.linear).client.category == "linear"
+
+        requests = []
+
+        async def request_v5(path, body, priority=None, idempotent=False, method="POST"):
+            requests.append((path, body))
+            size = len(body.get("request", [None]))
+            return {"retCode": 0, "result": {"list": [{"orderId": "o"}] * size}, "retExtInfo": {"list": []}}
+
+        async def public_request(path, params=None):
+            requests.append((path, params))
+
+        spot.client._request_v5 = request_v5
+        spot.client._public_request = public_request
+        await spot.client.get_tickers("BTCUSDT")
+        await spot.client.create_order("BTCUSDT", "Buy", "Limit", 1, 100)
+        await spot.client.batch_place_orders("BTCUSDT", [{"side": "Buy", "qty": 1, "price": 100}] * 15)
+        await registry.close()
+        return requests
+
+    requests = asyncio.run(scenario())
+    assert {body["category"] for _, body in requests} == {"spot"}
+    # Пачки спота — по 10 ордеров
+    assert [len(body["request"]) for path, body in requests if path == "/v5/order/create-batch"] == [10, 5]
+
+
+def test_create_account_rejects_non_inverse_v2(monkeypatch):
+    payload = AccountCreate(
+        name="linear", api_key="key", secret_key="secret", symbol="BTCUSDT", deposit=1000,
+        start_price=90, grid_count=10, end_price=110, stop_loss=80, exchange=Exchange.bybit_v2, category=Category.linear,
+    )
+    request = SimpleNamespace(state=SimpleNamespace(db=None, user=SimpleNamespace(id=1)))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(routes.create_account(payload, request))
+    assert error.value.status_code == 400
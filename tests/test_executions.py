@@ -0,0 +1,149 @@
+# test_executions.py
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+import websockets
+from src.service import executions
+from src.service.executions import BybitExecutionStream, BybitV5ExecutionStream
+from src.service.scheduler import timer_wheel
+
+ACCOUNT = SimpleNamespace(id=1, name="test", api_key="key", secret_key="secret", symbol="BTCUSD")
+
+
+def v2_order(order_id, status="Filled", symbol="BTCUSD"):
+    return {"topic": "order", "data": [{"order_id": order_id, "order_status": status, "symbol": symbol}]}
+
+
+def v5_order(order_id, status="Filled", symbol="BTCUSD"):
+    return {"topic": "order", "data": [{"orderId": order_id, "orderStatus": status, "symbol": symbol}]}
+
+
+class FakeExchange:
+    """
+    Локальный WebSocket-сервер: отвечает на auth/subscribe и отправляет каждому подключению свою пачку сообщений.
+    После последнего сообщения соединение закрывается, если close_after — клиент должен переподключиться.
+    """
+
+    def __init__(self, sessions, v5=False, close_after=True):
+        self.sessions = list(sessions)
+        self.v5 = v5
+        self.close_after = close_after
+        self.connections = 0
+        self.requests = []
+
+    def _reply(self, request):
+        if self.v5:
+            return {"op": request["op"], "success": True}
+        return {"success": True, "request": request}
+
+    async def handler(self, ws):
+        self.connections += 1
+        for _ in range(2):
+            request = json.loads(await ws.recv())
+            self.requests.append(request)
+            await ws.send(json.dumps(self._reply(request)))
+        for message in self.sessions.pop(0) if self.sessions else []:
+            await ws.send(json.dumps(message))
+        if not self.close_after:
+            await ws.wait_closed()
+
+    async def __aenter__(self):
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.endpoint = f"ws://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def collect(stream, count, timeout=5):
+    filled = set()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while len(filled) < count and loop.time() < deadline:
+        filled |= await stream.wait_fills(deadline - loop.time())
+    return filled
+
+
+@pytest.fixture(autouse=True)
+def fast_reconnect(monkeypatch):
+    monkeypatch.setattr(executions, "RECONNECT_DELAY", 0.01)
+
+
+def test_fills_are_parsed_and_filtered():
+    async def scenario():
+        sessions = [[
+            v2_order("a"),
+            v2_order("b", status="New"),
+            v2_order("c", symbol="ETHUSD"),
+            {"topic": "position", "data": [{"order_id": "d", "order_status": "Filled", "symbol": "BTCUSD"}]},
+            v2_order("e"),
+        ]]
+        async with FakeExchange(sessions, close_after=False) as server:
+            stream = BybitExecutionStream(ACCOUNT, server.endpoint)
+            stream.start()
+            try:
+                filled = await collect(stream, 2)
+                assert stream.connected
+            finally:
+                await stream.close()
+            await timer_wheel.close()
+        assert filled == {"a", "e"}
+        assert [request["op"] for request in server.requests] == ["auth", "subscribe"]
+        assert server.requests[0]["args"][0] == "key"
+
+    asyncio.run(scenario())
+
+
+def test_reconnects_after_disconnect():
+    async def scenario():
+        async with FakeExchange([[v2_order("a")], [v2_order("b")]]) as server:
+            stream = BybitExecutionStream(ACCOUNT, server.endpoint)
+            stream.start()
+            try:
+                filled = await collect(stream, 2)
+            finally:
+                await stream.close()
+            await timer_wheel.close()
+        assert filled == {"a", "b"}
+        assert server.connections >= 2
+        assert not stream.connected
+
+    asyncio.run(scenario())
+
+
+def test_v5_fields_and_replies():
+    async def scenario():
+        async with FakeExchange([[v5_order("x"), v5_order("y", status="PartiallyFilled")]], v5=True, close_after=False) as server:
+            stream = BybitV5ExecutionStream(ACCOUNT, server.endpoint)
+            stream.start()
+            try:
+                filled = await collect(stream, 1)
+                assert stream.connected
+            finally:
+                await stream.close()
+            await timer_wheel.close()
+        assert filled == {"x"}
+
+    asyncio.run(scenario())
+
+
+def test_wait_fills_times_out_without_fills():
+    async def scenario():
+        async with FakeExchange([[]], close_after=False) as server:
+            stream = BybitExecutionStream(ACCOUNT, server.endpoint)
+            stream.start()
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            try:
+                filled = await stream.wait_fills(0.2)
+            finally:
+                await stream.close()
+            await timer_wheel.close()
+        assert filled == set()
+        assert 0.15 <= loop.time() - started < 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,126 @@
+# test_grid_engine.py
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from src.service.connectors.base import InstrumentSpec
+from src.service.grid_engine import BUY, SELL, GridEngine, grid_levels
+
+ACCOUNT = SimpleNamespace(start_price=100.0, end_price=110.0, grid_count=5, deposit=1000.0)
+
+
+def placed(engine, cells, prefix="o"):
+    return {cell: {"order_id": f"{prefix}{cell}"} for cell in np.asarray(cells).tolist()}
+
+
+def test_levels_spacing():
+    assert np.allclose(grid_levels(100, 110, 5), [100, 102, 104, 106, 108, 110])
+    geometric = grid_levels(100, 121, 2, "geometric")
+    assert np.allclose(geometric, [100, 110, 121])
+
+
+def test_buy_and_sell_order_per_level():
+    engine = GridEngine.from_account(ACCOUNT)
+    assert len(engine) == 2 * ACCOUNT.grid_count
+    orders = sorted(zip(engine.side.tolist(), engine.price.tolist()))
+    assert orders == [(BUY, p) for p in [100, 102, 104, 106, 108]] + [(SELL, p) for p in [102, 104, 106, 108, 110]]
+    # Количество как у compute_quantity: депозит / grid_count / цена уровня
+    assert np.allclose(engine.quantity, np.round(1000 / 5 / engine.price, 4))
+
+
+def test_initial_diff_places_every_cell():
+    engine = GridEngine.from_account(ACCOUNT)
+    diff = engine.diff()
+    assert diff.place.tolist() == list(range(10))
+    assert not len(diff.cancel)
+    engine.assign(placed(engine, diff.place))
+    diff = engine.diff()
+    assert not len(diff.place) and not len(diff.cancel)
+
+
+def test_fill_flips_side_at_same_price():
+    engine = GridEngine.from_account(ACCOUNT)
+    engine.assign(placed(engine, engine.diff().place))
+    cells = engine.fill(["o1", "o7", "unknown"])
+    assert cells.tolist() == [1, 7]
+    assert engine.side[1] == SELL and engine.side[7] == BUY
+    assert not engine.live[[1, 7]].any()
+    diff = engine.diff()
+    assert diff.place.tolist() == [1, 7]
+    placements = engine.placements(diff.place)
+    assert placements == [(1, "Sell", 102.0, engine.quantity[1]), (7, "Buy", 106.0, engine.quantity[7])]
+    # Повторное исполнение того же ордера не переворачивает ячейку обратно
+    assert not len(engine.fill(["o1"]))
+
+
+def test_stale_and_disabled_orders_are_cancelled():
+    engine = GridEngine.from_account(ACCOUNT)
+    engine.assign(placed(engine, engine.diff().place))
+    engine.side[2] = SELL
+    engine.enabled[3] = False
+    diff = engine.diff()
+    assert diff.cancel.tolist() == [2, 3]
+    assert diff.place.tolist() == [2]
+    engine.clear(diff.cancel)
+    assert engine.cell_of("o2") is None and engine.cell_of("o3") is None
+
+
+def test_reset_restores_initial_side():
+    engine = GridEngine.from_account(ACCOUNT)
+    engine.assign(placed(engine, engine.diff().place))
+    engine.fill(["o0", "o5"])
+    engine.assign(placed(engine, [0, 5], prefix="n"))
+    engine.reset(np.array([0, 5]))
+    assert engine.side[0] == BUY and engine.side[5] == SELL
+    assert not engine.live[[0, 5]].any()
+
+
+def test_restore_and_match():
+    engine = GridEngine.from_account(ACCOUNT)
+    engine.restore([0, 1, 6], [SELL, BUY, BUY], ["a", None, "c"], [102.0, 0.0, 104.0])
+    assert engine.live.tolist()[:3] == [True, False, False]
+    assert engine.cell_of("a") == 0 and engine.cell_of("c") == 6
+    assert engine.order_side[0] == SELL and engine.order_price[0] == 102.0
+    # Сохранённая цена не совпадает с уровнем ячейки 0 — ордер устарел
+    diff = engine.diff()
+    assert 0 in diff.cancel.tolist()
+    assert engine.match(BUY, 102.0) == 1
+    assert engine.match(SELL, 110.0) == 9
+    assert engine.match(SELL, 101.0) is None
+
+
+def test_dirty_cells():
+    engine = GridEngine.from_account(ACCOUNT)
+    assert not len(engine.take_dirty())
+    engine.assign(placed(engine, [4, 2]))
+    assert engine.take_dirty().tolist() == [2, 4]
+    assert not len(engine.take_dirty())
+
+
+def test_spec_quantization_disables_invalid_cells():
+    spec = InstrumentSpec(symbol="X", tick_size=5.0, qty_step=0.5, min_qty=2.0)
+    engine = GridEngine.from_account(ACCOUNT, spec=spec)
+    assert set(engine.levels.tolist()) <= {100.0, 105.0, 110.0}
+    assert np.all(engine.quantity % 0.5 == 0)
+    # Уровни, слившиеся после округления, и ордера меньше минимального количества выключены
+    assert not engine.enabled[engine.quantity < 2.0].any()
+    buys = engine.price[engine.enabled & (engine.side == BUY)].tolist()
+    assert len(buys) == len(set(buys))
+
+
+def test_total_quantity_follows_lot_step():
+    spec = InstrumentSpec(symbol="X", tick_size=0.01, qty_step=0.001, min_qty=0.001)
+    engine = GridEngine.from_account(ACCOUNT, spec=spec)
+    cells = np.array([5, 6, 7])
+    total = engine.total_quantity(cells)
+    assert total == pytest.approx(engine.quantity[cells].sum())
+    assert round(total / 0.001, 9) == int(round(total / 0.001))
+    assert str(total) == str(round(total, 3))
+
+
+def test_halted_grid_cancels_everything_and_places_nothing():
+    engine = GridEngine.from_account(ACCOUNT)
+    engine.assign(placed(engine, [0, 7]))
+    engine.halted = True
+    diff = engine.diff()
+    assert not len(diff.place)
+    assert diff.cancel.tolist() == [0, 7]
@@ -0,0 +1,119 @@
+# test_grid_state.py
+import asyncio
+from types import SimpleNamespace
+import pytest
+from src.manage_accounts.models import GridOrderStatus, TradeSide
+from src.service import grid_state as grid_state_module
+from src.service import grid_worker
+from src.service.connectors.base import Order, OrderResult, OrderStatus
+from src.service.grid_engine import BUY, SELL, GridEngine
+from src.service.grid_state import grid_state
+
+ACCOUNT = SimpleNamespace(id=7, name="test", symbol="BTCUSD", start_price=100.0, end_price=110.0, grid_count=5, deposit=1000.0)
+
+
+class FailingSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, *args):
+        raise ConnectionError("database is down")
+
+
+def test_save_keeps_dirty_cells_when_write_fails(monkeypatch):
+    monkeypatch.setattr(grid_state_module, "async_session", FailingSession)
+    engine = GridEngine.from_account(ACCOUNT)
+    engine.assign({1: {"order_id": "a"}, 3: {"order_id": "b"}})
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(grid_state.save(ACCOUNT.id, engine))
+    assert engine.take_dirty().tolist() == [1, 3]
+
+
+class FakeConnector:
+    def __init__(self, orders, history=()):
+        self.orders = {order.order_id: order for order in orders}
+        self.history = list(history)
+        self.lookups = []
+        self.cancelled = []
+
+    async def open_orders(self, symbol, priority=None):
+        return [order for order in self.orders.values() if order.status == OrderStatus.open]
+
+    async def order_history(self, symbol, status=None, limit=50, priority=None):
+        return self.history
+
+    async def get_order(self, symbol, order_id, priority=None):
+        self.lookups.append(order_id)
+        return self.orders.get(order_id)
+
+    async def cancel_orders(self, symbol, order_ids, priority=None):
+        self.cancelled += order_ids
+        return [OrderResult(order_id=order_id) for order_id in order_ids]
+
+
+def order(order_id, side, price, status):
+    return Order(order_id=order_id, symbol="BTCUSD", side=side, order_type="Limit", price=price, qty=1.0, status=status)
+
+
+def row(cell, side, order_id, price):
+    return SimpleNamespace(cell=cell, side=side, order_id=order_id, price=price, status=GridOrderStatus.open)
+
+
+def test_recover_looks_up_orders_missing_from_history(monkeypatch):
+    engine = GridEngine.from_account(ACCOUNT)
+    rows = [
+        row(0, TradeSide.buy, "open", 100.0),
+        row(1, TradeSide.buy, "old-fill", 102.0),
+        row(2, TradeSide.buy, "recent-fill", 104.0),
+        row(3, TradeSide.buy, "cancelled", 106.0),
+        row(4, TradeSide.buy, "vanished", 108.0),
+    ]
+    connector = FakeConnector(
+        [
+            order("open", "Buy", 100.0, OrderStatus.open),
+            order("old-fill", "Buy", 102.0, OrderStatus.filled),
+            order("cancelled", "Buy", 106.0, OrderStatus.cancelled),
+            # Выставлен прямо перед падением: в состоянии нет, но совпадает с ячейкой продажи 8
+            order("orphan", "Sell", 108.0, OrderStatus.open),
+            order("stray", "Sell", 103.0, OrderStatus.open),
+        ],
+        history=[order("recent-fill", "Buy", 104.0, OrderStatus.filled)],
+    )
+    saved = []
+
+    async def load(account_id):
+        return rows
+
+    async def save(account_id, grid):
+        saved.append(grid.take_dirty().tolist())
+
+    async def get_connector(account):
+        return connector
+
+    async def record_trade(account, order_info):
+        pass
+
+    monkeypatch.setattr(grid_state, "load", load)
+    monkeypatch.setattr(grid_state, "save", save)
+    monkeypatch.setattr(grid_worker, "get_connector", get_connector)
+    monkeypatch.setattr(grid_worker, "record_trade", record_trade)
+    monkeypatch.setattr(grid_worker.pnl_aggregator, "record_fills", lambda *args: None)
+
+    asyncio.run(grid_worker.recover_grid(ACCOUNT, engine))
+
+    # Ордер из истории по id не запрашивается; остальные пропавшие — запрашиваются
+    assert sorted(connector.lookups) == ["cancelled", "old-fill", "vanished"]
+    assert engine.cell_of("open") == 0 and engine.live[0]
+    # Исполненные, в том числе вне окна истории, переворачивают ячейку на продажу по той же цене
+    assert engine.side[1] == SELL and engine.side[2] == SELL
+    assert not engine.live[[1, 2]].any()
+    # Отменённый и ненайденный ордера освобождают ячейку с прежней стороной
+    assert engine.side[3] == BUY and engine.side[4] == BUY
+    assert not engine.live[[3, 4]].any()
+    assert engine.cell_of("orphan") == 8
+    assert connector.cancelled == ["stray"]
+    assert saved and saved[-1]
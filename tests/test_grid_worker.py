@@ -0,0 +1,164 @@
+# test_grid_worker.py
+import asyncio
+from types import SimpleNamespace
+import pytest
+from src.manage_accounts.models import Category, Exchange
+from src.service import grid_worker
+from src.service.connectors.base import Order, OrderResult, OrderStatus
+from src.service.grid_engine import SELL, GridEngine
+from src.service.resilience import AuthError, TransientError
+
+ACCOUNT = SimpleNamespace(id=3, name="test", symbol="BTCUSD", exchange=Exchange.bybit_v2, category=Category.inverse)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(grid_worker, "ERROR_BACKOFF", 0)
+
+
+def test_setup_errors_are_retried_and_auth_failures_disable_account(monkeypatch):
+    errors = [TransientError("/v2/public/symbols", 10016, "service error")] + [AuthError("/v2/private/order", 10003, "invalid api key")] * 3
+    attempts = []
+    disabled = []
+
+    async def start_grid(account, lock):
+        attempts.append(account.id)
+        raise errors[len(attempts) - 1]
+
+    async def disable_account(account, error):
+        disabled.append(error)
+
+    monkeypatch.setattr(grid_worker, "start_grid", start_grid)
+    monkeypatch.setattr(grid_worker, "disable_account", disable_account)
+
+    asyncio.run(asyncio.wait_for(grid_worker.run_grid_bot_for_account(ACCOUNT), 5))
+    assert len(attempts) == 1 + grid_worker.AUTH_FAILURE_LIMIT
+    assert len(disabled) == 1 and isinstance(disabled[0], AuthError)
+
+
+class FlakyConnector:
+    """
+    Биржа, на которой часть пачки выставляется, но ответ на неё теряется.
+    """
+
+    def __init__(self, lost=0):
+        self.lost = lost  # сколько первых ордеров пачки выставляются с потерянным ответом
+        self.open = {}
+        self.placed = 0
+        self.market_sells = []
+
+    async def place_orders(self, symbol, orders, priority=None):
+        results = []
+        for i, order in enumerate(orders):
+            self.placed += 1
+            order_id = f"o{self.placed}"
+            self.open[order_id] = Order(order_id, symbol, order["side"], "Limit", order["price"], order["qty"], OrderStatus.open)
+            results.append(OrderResult(None, msg="timeout", unknown=True) if i < self.lost else OrderResult(order_id))
+        self.lost = 0
+        return results
+
+    async def place_order(self, symbol, side, order_type, qty, price=None, time_in_force="GTC", priority=None):
+        self.market_sells.append(qty)
+        return Order("m1", symbol, side, order_type, price, qty, OrderStatus.filled)
+
+    async def open_orders(self, symbol, priority=None):
+        return list(self.open.values())
+
+    async def cancel_orders(self, symbol, order_ids, priority=None):
+        for order_id in order_ids:
+            self.open.pop(order_id)
+        return [OrderResult(order_id) for order_id in order_ids]
+
+
+GRID_ACCOUNT = SimpleNamespace(
+    id=4, name="test", symbol="BTCUSD", start_price=100.0, end_price=110.0, grid_count=5, deposit=1000.0, stop_loss=95.0,
+)
+
+
+def use_connector(monkeypatch, connector):
+    async def get_connector(account):
+        return connector
+
+    async def record_trade(account, order_info):
+        pass
+
+    async def save(account_id, grid=None):
+        pass
+
+    monkeypatch.setattr(grid_worker, "get_connector", get_connector)
+    monkeypatch.setattr(grid_worker, "record_trade", record_trade)
+    monkeypatch.setattr(grid_worker.grid_state, "save", save)
+
+
+def test_unknown_placements_are_adopted_not_duplicated(monkeypatch):
+    connector = FlakyConnector(lost=3)
+    account = GRID_ACCOUNT
+    engine = GridEngine.from_account(account)
+    use_connector(monkeypatch, connector)
+
+    async def scenario():
+        await grid_worker.sync_orders(account, engine)
+        await grid_worker.sync_orders(account, engine)
+
+    asyncio.run(scenario())
+    assert connector.placed == len(engine)
+    assert engine.live.all()
+    assert not engine.unknown.any()
+    assert sorted(engine.order_ids.tolist()) == sorted(connector.open)
+
+
+def test_stop_loss_halts_grid_until_price_recovers(monkeypatch):
+    connector = FlakyConnector()
+    account = GRID_ACCOUNT
+    engine = GridEngine.from_account(account)
+    use_connector(monkeypatch, connector)
+
+    async def scenario():
+        await grid_worker.sync_orders(account, engine)
+        sells = engine.total_quantity(engine.live_cells(SELL))
+        await grid_worker.check_stop_loss(account, 94.0, engine)
+        assert engine.halted and not engine.live.any() and not connector.open
+        assert connector.market_sells == [sells]
+
+        # Ниже порога сетка стоит, даже когда продавать уже нечего: ордера не выставляются и стоплосс не повторяется
+        await grid_worker.check_stop_loss(account, 93.0, engine)
+        await grid_worker.sync_orders(account, engine)
+        assert not connector.open and connector.market_sells == [sells]
+
+        await grid_worker.check_stop_loss(account, 95.0, engine)
+        await grid_worker.sync_orders(account, engine)
+        assert not engine.halted and engine.live.all()
+
+    asyncio.run(scenario())
+
+
+def test_stop_loss_during_sync_stops_placement(monkeypatch):
+    connector = FlakyConnector()
+    account = GRID_ACCOUNT
+    engine = GridEngine.from_account(account)
+    engine.assign({0: {"order_id": "stale"}})
+    engine.order_price[0] = 1.0  # ордер не по цене ячейки: sync_orders сначала отменит его
+    connector.open["stale"] = Order("stale", "BTCUSD", "Buy", "Limit", 1.0, 1.0, OrderStatus.open)
+    use_connector(monkeypatch, connector)
+    lock = asyncio.Lock()
+    cancel_orders = connector.cancel_orders
+
+    async def slow_cancel(symbol, order_ids, priority=None):
+        await asyncio.sleep(0.05)
+        return await cancel_orders(symbol, order_ids, priority)
+
+    connector.cancel_orders = slow_cancel
+
+    async def sync():
+        async with lock:
+            await grid_worker.sync_orders(account, engine)
+
+    async def scenario():
+        task = asyncio.create_task(sync())
+        await asyncio.sleep(0.01)
+        await grid_worker.trigger_stop_loss(account, engine, lock, 94.0)
+        await task
+
+    asyncio.run(scenario())
+    assert engine.halted
+    assert connector.placed == 0 and not connector.open
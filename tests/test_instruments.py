@@ -0,0 +1,51 @@
+# test_instruments.py
+import asyncio
+import pytest
+from src.manage_accounts.models import Exchange
+from src.service import instruments
+from src.service.connectors.base import InstrumentSpec
+from src.service.instruments import InstrumentCache
+
+
+class FakeConnector:
+    def __init__(self):
+        self.loads = 0
+
+    async def instruments(self):
+        self.loads += 1
+        return [InstrumentSpec(symbol="BTCUSD", tick_size=0.5, qty_step=0.001, min_qty=0.001)]
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    connector = FakeConnector()
+    monkeypatch.setattr(instruments.client_registry, "get_public_connector", lambda exchange, category: connector)
+    return connector
+
+
+def test_specs_are_loaded_once(connector):
+    cache = InstrumentCache()
+
+    async def scenario():
+        specs = await asyncio.gather(*(cache.get("BTCUSD") for _ in range(5)))
+        assert {spec.tick_size for spec in specs} == {0.5}
+
+    asyncio.run(scenario())
+    assert connector.loads == 1
+
+
+def test_unknown_symbol_is_cached_until_ttl(connector):
+    cache = InstrumentCache()
+
+    async def scenario():
+        await cache.get("BTCUSD", Exchange.bybit_v2)
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                await cache.get("NOPE", Exchange.bybit_v2)
+        assert connector.loads == 2
+        cache.ttl = 0
+        with pytest.raises(ValueError):
+            await cache.get("NOPE", Exchange.bybit_v2)
+        assert connector.loads == 3
+
+    asyncio.run(scenario())
@@ -0,0 +1,65 @@
+# test_json_backend.py
+import builtins
+import importlib.util
+import pytest
+from src.service import json_backend
+
+MESSAGE = {"retCode": 0, "result": {"list": [{"orderId": "o-1", "price": "100.5", "qty": 2}]}, "retMsg": "ок", "ok": True, "extra": None}
+
+
+def load_backend(monkeypatch, without_orjson):
+    # Отдельная копия модуля: выбор бэкенда происходит при импорте, а общий модуль уже загружен
+    if without_orjson:
+        real_import = builtins.__import__
+
+        def fake_import(name, *args, **kwargs):
+            if name == "orjson":
+                raise ImportError(name)
+            return real_import(name, *args, **kwargs)
+
+        monkeypatch.setattr(builtins, "__import__", fake_import)
+    spec = importlib.util.spec_from_file_location("json_backend_copy", json_backend.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    module = load_backend(monkeypatch, without_orjson=request.param == "json")
+    assert module.BACKEND == request.param
+    return module
+
+
+def test_round_trip(backend):
+    encoded = backend.dumps(MESSAGE)
+    assert isinstance(encoded, str)
+    assert backend.loads(encoded) == MESSAGE
+    assert backend.loads(encoded.encode("utf-8")) == MESSAGE
+
+
+def test_backends_produce_identical_output(monkeypatch):
+    pytest.importorskip("orjson")
+    fast = load_backend(monkeypatch, without_orjson=False)
+    fallback = load_backend(monkeypatch, without_orjson=True)
+    # v5 подписывает тело запроса: строка не должна зависеть от установленного бэкенда
+    assert fast.dumps(MESSAGE) == fallback.dumps(MESSAGE)
+    assert fallback.dumps(MESSAGE) == '{"retCode":0,"result":{"list":[{"orderId":"o-1","price":"100.5","qty":2}]},"retMsg":"ок","ok":true,"extra":null}'
+
+
+def test_lazy_response_decodes_once(backend):
+    decoded = []
+    response = backend.LazyResponse(backend.dumps(MESSAGE).encode("utf-8"), decoded.append)
+    assert not decoded
+    assert response["retCode"] == 0
+    assert dict(response) == MESSAGE
+    assert len(response) == len(MESSAGE)
+    assert decoded == [MESSAGE]
+
+
+def test_malformed_body_raises_value_error(backend):
+    # _check клиента ловит ValueError, чтобы считать битый ответ временной ошибкой
+    with pytest.raises(ValueError):
+        backend.loads(b"<html>502 Bad Gateway</html>")
@@ -0,0 +1,58 @@
+# test_logger.py
+import pytest
+from src.service import logger as logger_module
+from src.service.logger import LogSampler, parse_levels
+
+
+@pytest.mark.parametrize("spec, expected", [
+    (None, {}),
+    ("", {}),
+    ("src.service.grid_worker=WARNING", {"src.service.grid_worker": "WARNING"}),
+    (" src.service.grid_worker = warning , src.service.bybit_client=debug ", {"src.service.grid_worker": "WARNING", "src.service.bybit_client": "DEBUG"}),
+    # Элементы без модуля или без уровня пропускаются
+    ("src.service.grid_worker,=DEBUG,src.service.stream=,,src.service.pnl=INFO", {"src.service.pnl": "INFO"}),
+    ("src.a=INFO,src.a=ERROR", {"src.a": "ERROR"}),
+])
+def test_parse_levels(spec, expected):
+    assert parse_levels(spec) == expected
+
+
+class Clock:
+    def __init__(self):
+        self.now = 5.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(logger_module, "time", clock)
+    return clock
+
+
+def test_sampler_allows_one_message_per_interval_and_key(clock):
+    sampler = LogSampler(interval=60)
+    # Первое сообщение проходит даже сразу после старта процесса
+    assert sampler.allow(("price", 1))
+    assert not sampler.allow(("price", 1))
+    assert sampler.allow(("price", 2))
+    clock.now += 59.9
+    assert not sampler.allow(("price", 1))
+    clock.now += 0.1
+    assert sampler.allow(("price", 1))
+    # Окно отсчитывается от последнего пропущенного сообщения, а не от отброшенных
+    clock.now += 30
+    assert not sampler.allow(("price", 1))
+    clock.now += 30
+    assert sampler.allow(("price", 1))
+
+
+def test_forgotten_key_is_allowed_again(clock):
+    sampler = LogSampler(interval=60)
+    assert sampler.allow("key")
+    sampler.forget("key")
+    sampler.forget("unknown")
+    assert sampler.allow("key")
+    assert sampler._last == {"key": clock.now}
@@ -0,0 +1,178 @@
+# test_manager.py
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from src.manage_accounts.models import AccountStatus
+from src.service import manager as manager_module
+from src.service.manager import AccountManager
+
+
+class FakeLeases:
+    def __init__(self, fail=False, lost=()):
+        self.fail = fail
+        self.lost = set(lost)
+        self.renewals = 0
+
+    async def renew(self, account_ids):
+        self.renewals += 1
+        if self.fail:
+            raise ConnectionError("database is down")
+        return set(account_ids) - self.lost
+
+
+@pytest.fixture(autouse=True)
+def short_leases(monkeypatch):
+    monkeypatch.setattr(manager_module, "LEASE_TTL", 0.3)
+    monkeypatch.setattr(manager_module, "LEASE_RENEW_INTERVAL", 0.1)
+
+
+def run_heartbeat(leases, account_ids, duration):
+    async def scenario():
+        manager = AccountManager()
+        manager.leases = leases
+        loop = asyncio.get_running_loop()
+        for acc_id in account_ids:
+            manager.tasks[acc_id] = asyncio.create_task(asyncio.sleep(60))
+            manager._leased_at[acc_id] = loop.time()
+        bots = dict(manager.tasks)
+        heartbeat = asyncio.create_task(manager._renew_leases())
+        await asyncio.sleep(duration)
+        heartbeat.cancel()
+        await asyncio.gather(heartbeat, return_exceptions=True)
+        running = set(manager.tasks)
+        for task in manager.tasks.values():
+            task.cancel()
+        await asyncio.gather(*manager.tasks.values(), return_exceptions=True)
+        return running, {acc_id: task.cancelled() for acc_id, task in bots.items()}
+
+    return asyncio.run(scenario())
+
+
+def test_renewed_bots_keep_running():
+    leases = FakeLeases()
+    running, cancelled = run_heartbeat(leases, [1, 2], 0.45)
+    assert running == {1, 2}
+    assert leases.renewals >= 3
+
+
+def test_lost_lease_stops_bot():
+    running, cancelled = run_heartbeat(FakeLeases(lost=[2]), [1, 2], 0.15)
+    assert running == {1}
+    assert cancelled[2]
+
+
+def test_bots_stop_before_lease_expires_when_renewal_fails():
+    leases = FakeLeases(fail=True)
+    running, cancelled = run_heartbeat(leases, [1, 2], 0.25)
+    # Первая неудача на 0.1 с: до истечения аренды (0.3 с) есть ещё попытка; вторая на 0.2 с — последний шанс остановиться
+    assert running == set()
+    assert all(cancelled.values())
+    assert leases.renewals == 2
+
+
+def test_single_failed_renewal_keeps_bots():
+    running, _ = run_heartbeat(FakeLeases(fail=True), [1, 2], 0.15)
+    assert running == {1, 2}
+
+
+class FakeResult:
+    def __init__(self, accounts):
+        self.accounts = accounts
+
+    def all(self):
+        return [(acc.id, acc.status, acc.updated_at) for acc in self.accounts]
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: self.accounts)
+
+
+class FakeSession:
+    def __init__(self, accounts, fail):
+        self.accounts = accounts
+        self.fail = fail
+
+    async def __aenter__(self):
+        if self.fail:
+            raise ConnectionError("database is down")
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query):
+        return FakeResult(self.accounts)
+
+
+class LeaseQueue(FakeLeases):
+    """
+    Аренда занята первые busy попыток захвата — например, старой арендой этого же узла до перезапуска.
+    """
+
+    def __init__(self, busy=0, **kwargs):
+        super().__init__(**kwargs)
+        self.busy = busy
+        self.acquired = 0
+
+    async def acquire(self, account_id):
+        if self.busy:
+            self.busy -= 1
+            return False
+        self.acquired += 1
+        return True
+
+
+def run_manager(monkeypatch, leases, duration, db_down=()):
+    account = SimpleNamespace(id=1, name="bot", api_key="key", status=AccountStatus.running, updated_at=datetime.now())
+    down = list(db_down)  # номера обращений к БД, которые падают
+
+    calls = []
+
+    def session():
+        calls.append(1)
+        return FakeSession([account], len(calls) in down)
+
+    async def bot(acc):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(manager_module, "async_session", session)
+    monkeypatch.setattr(manager_module, "run_grid_bot_for_account", bot)
+
+    async def scenario():
+        manager = AccountManager(reconcile_interval=60)
+        manager.leases = leases
+        manager._events = asyncio.Queue()
+        run = asyncio.create_task(manager._run())
+        await asyncio.sleep(duration)
+        running = set(manager.tasks)
+        run.cancel()
+        for task in manager.tasks.values():
+            task.cancel()
+        await asyncio.gather(run, *manager.tasks.values(), return_exceptions=True)
+        return running, manager._pending
+
+    return asyncio.run(scenario())
+
+
+def test_busy_lease_is_retried_without_account_change(monkeypatch):
+    leases = LeaseQueue(busy=2)
+    running, pending = run_manager(monkeypatch, leases, 0.35)
+    assert running == {1}
+    assert leases.acquired == 1
+    assert not pending
+
+
+def test_retry_survives_database_outage(monkeypatch):
+    # Сверка при старте видит аккаунт, но захват занят; первый повтор падает вместе с БД, следующий запускает бота
+    running, pending = run_manager(monkeypatch, LeaseQueue(busy=1), 0.35, db_down=[3])
+    assert running == {1}
+
+
+def test_stopped_bot_waits_for_lease(monkeypatch):
+    async def scenario():
+        manager = AccountManager()
+        manager.tasks[1] = asyncio.create_task(asyncio.sleep(60))
+        await manager._stop_bot(1)
+        return manager._pending
+
+    assert asyncio.run(scenario()) == {1}
@@ -0,0 +1,142 @@
+# test_market_data.py
+import asyncio
+import math
+import pytest
+from src.manage_accounts.models import Category, Exchange
+from src.service import market_data
+from src.service.market_data import VOLATILITY_HALF_LIFE, MarketDataHub
+
+
+class CountingHub(MarketDataHub):
+    def __init__(self, prices, interval=0.01):
+        super().__init__(interval)
+        self.prices = prices
+        self.fetches = {}
+
+    async def _fetch_price(self, exchange, symbol, category):
+        market = (exchange, symbol, category)
+        self.fetches[market] = self.fetches.get(market, 0) + 1
+        price = self.prices[market]
+        if isinstance(price, Exception):
+            raise price
+        return price
+
+
+LINEAR = (Exchange.bybit_v5, "BTCUSDT", Category.linear)
+SPOT = (Exchange.bybit_v5, "BTCUSDT", Category.spot)
+
+
+def test_one_poll_task_per_market():
+    async def scenario():
+        hub = CountingHub({LINEAR: 100.0, SPOT: 101.0})
+        for _ in range(3):
+            hub.subscribe("BTCUSDT", Exchange.bybit_v5, Category.linear)
+        hub.subscribe("BTCUSDT", Exchange.bybit_v5, Category.spot)
+        assert len(hub._feeds) == 2
+        await asyncio.sleep(0.035)
+        fetched = dict(hub.fetches)
+        linear = await hub.get_price("BTCUSDT", Exchange.bybit_v5, category=Category.linear)
+        spot = await hub.get_price("BTCUSDT", Exchange.bybit_v5, category=Category.spot)
+
+        # Поток живёт, пока есть хотя бы один подписчик
+        feed = hub._feeds[LINEAR]
+        for _ in range(2):
+            hub.unsubscribe("BTCUSDT", Exchange.bybit_v5, Category.linear)
+        assert hub._feeds[LINEAR] is feed
+        hub.unsubscribe("BTCUSDT", Exchange.bybit_v5, Category.linear)
+        await asyncio.sleep(0)
+        assert feed.cancelled() and LINEAR not in hub._quotes
+        stats = hub.stats()
+        await hub.close()
+        return fetched, linear, spot, stats
+
+    fetched, linear, spot, stats = asyncio.run(scenario())
+    # Три подписчика одного рынка не умножают запросы: по запросу на рынок за интервал
+    assert 3 <= fetched[LINEAR] <= 5
+    assert abs(fetched[LINEAR] - fetched[SPOT]) <= 1
+    assert (linear, spot) == (100.0, 101.0)
+    assert list(stats) == ["bybit_v5:spot:BTCUSDT"]
+
+
+def test_failed_fetch_is_retried_on_next_interval():
+    async def scenario():
+        hub = CountingHub({LINEAR: ConnectionError("timeout")})
+        hub.subscribe("BTCUSDT", Exchange.bybit_v5, Category.linear)
+        await asyncio.sleep(0.025)
+        hub.prices[LINEAR] = 100.0
+        quote = await hub.wait_update("BTCUSDT", Exchange.bybit_v5, timeout=1, category=Category.linear)
+        failures = hub.fetches[LINEAR]
+        await hub.close()
+        return quote, failures
+
+    quote, fetches = asyncio.run(scenario())
+    assert quote.price == 100.0
+    assert fetches >= 3
+
+
+def test_update_wakes_every_waiter_of_market_only():
+    async def scenario():
+        hub = MarketDataHub()
+        waiters = [asyncio.create_task(hub.wait_update("BTCUSD")) for _ in range(3)]
+        other = asyncio.create_task(hub.wait_update("ETHUSD"))
+        await asyncio.sleep(0)
+        await hub.publish("BTCUSD", 100.0)
+        quotes = await asyncio.gather(*waiters)
+        await asyncio.sleep(0)
+        other_waiting = not other.done()
+        other.cancel()
+        await asyncio.gather(other, return_exceptions=True)
+
+        # Свежая котировка отдаётся без ожидания, устаревшая — ждёт следующего обновления
+        cached = await hub.get_quote("BTCUSD", max_age=60)
+        stale = asyncio.create_task(hub.get_quote("BTCUSD", max_age=0))
+        await asyncio.sleep(0.001)
+        await hub.publish("BTCUSD", 101.0)
+        fresh = await stale
+        with pytest.raises(asyncio.TimeoutError):
+            await hub.wait_update("BTCUSD", timeout=0.01)
+        return quotes, other_waiting, cached, fresh
+
+    quotes, other_waiting, cached, fresh = asyncio.run(scenario())
+    assert [quote.price for quote in quotes] == [100.0] * 3
+    assert quotes[0] is quotes[1] is quotes[2]
+    assert other_waiting
+    assert cached.price == 100.0
+    assert fresh.price == 101.0
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_volatility_is_time_weighted_ewma(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(market_data, "time", clock)
+
+    async def scenario():
+        hub = MarketDataHub()
+        estimates = [hub.volatility("BTCUSD")]
+        await hub.publish("BTCUSD", 100.0)
+        estimates.append(hub.volatility("BTCUSD"))
+        clock.now += 4
+        await hub.publish("BTCUSD", 102.0)
+        estimates.append(hub.volatility("BTCUSD"))
+        # Два обновления в один момент времени оценку не меняют
+        await hub.publish("BTCUSD", 150.0)
+        estimates.append(hub.volatility("BTCUSD"))
+        clock.now += VOLATILITY_HALF_LIFE
+        await hub.publish("BTCUSD", 150.0)
+        estimates.append(hub.volatility("BTCUSD"))
+        return estimates
+
+    none_before, none_first, first, same_time, decayed = asyncio.run(scenario())
+    assert none_before is None and none_first is None
+    first_variance = math.log(1.02) ** 2 / 4
+    assert first == pytest.approx(math.sqrt(first_variance))
+    assert same_time == first
+    # Через период полураспада вес прошлой оценки — половина, нулевая доходность даёт нулевую выборку
+    assert decayed == pytest.approx(math.sqrt(first_variance / 2))
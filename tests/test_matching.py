@@ -0,0 +1,50 @@
+# test_matching.py
+from src.simulator.matching import MatchingEngine
+
+
+def make_engine(history_limit=3):
+    return MatchingEngine({"SIMUSD": 100.0, "OTHER": 10.0}, volatility=0, history_limit=history_limit)
+
+
+def test_closed_orders_are_evicted_per_owner_and_symbol():
+    engine = make_engine()
+    filled = [engine.place("alice", "SIMUSD", "Buy", "Market", 1) for _ in range(5)]
+    other = engine.place("bob", "SIMUSD", "Buy", "Market", 1)
+
+    history = engine.history("alice", "SIMUSD")
+    assert [order.order_id for order in history] == [order.order_id for order in reversed(filled[2:])]
+    # Вытесненные ордера забыты совсем, чужая история не тронута
+    assert engine.get("alice", filled[0].order_id) is None
+    assert engine.get("alice", filled[4].order_id) is filled[4]
+    assert engine.history("bob", "SIMUSD") == [other]
+    assert len(engine.orders) == 4
+
+
+def test_history_merges_open_and_closed_orders_newest_first():
+    engine = make_engine()
+    resting = engine.place("alice", "SIMUSD", "Buy", "Limit", 1, 90)
+    cancelled = engine.place("alice", "SIMUSD", "Buy", "Limit", 1, 80)
+    filled = engine.place("alice", "SIMUSD", "Sell", "Market", 1)
+    newest = engine.place("alice", "SIMUSD", "Sell", "Limit", 1, 110)
+    assert engine.cancel("alice", "SIMUSD", cancelled.order_id) is cancelled
+    engine.place("alice", "OTHER", "Buy", "Market", 1)
+
+    assert engine.history("alice", "SIMUSD") == [newest, filled, cancelled, resting]
+    assert engine.history("alice", "SIMUSD", limit=2) == [newest, filled]
+    assert engine.history("alice", "SIMUSD", "Filled") == [filled]
+    assert engine.history("alice", "SIMUSD", "Cancelled") == [cancelled]
+    assert engine.history("alice", "SIMUSD", "New") == [newest, resting]
+    assert engine.open_orders("alice", "SIMUSD") == [resting, newest]
+    assert engine.open_orders("bob", "SIMUSD") == []
+
+
+def test_cancel_is_limited_to_owner_and_filled_limit_leaves_book():
+    engine = make_engine()
+    order = engine.place("alice", "SIMUSD", "Buy", "Limit", 1, 99.5)
+    assert engine.cancel("bob", "SIMUSD", order.order_id) is None
+    engine.paths["SIMUSD"].price = 99
+    engine.tick()
+    assert order.status == "Filled" and order.fill_price == 99.5
+    assert engine.open_orders("alice", "SIMUSD") == []
+    assert engine.cancel("alice", "SIMUSD", order.order_id) is None
+    assert engine.history("alice", "SIMUSD") == [order]
@@ -0,0 +1,186 @@
+# test_middlewares.py
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+import src.middlewares as session_middlewares
+from src.admin.middlewares import AdminMiddleware
+from src.auth import middlewares as auth_middlewares
+from src.auth.middlewares import AuthMiddleware
+from src.auth.models import UserType
+from src.auth.principals import Principal
+from src.middlewares import LazySession, SQLAlchemySessionMiddleware
+
+EXPIRES = datetime.now() + timedelta(days=30)
+PRINCIPALS = {
+    "user-token": Principal(1, "user", UserType.user, 1, EXPIRES),
+    "admin-token": Principal(2, "admin", UserType.admin, 1, EXPIRES),
+}
+
+
+class FakeSession:
+    def __init__(self, sessions):
+        self.closed = False
+        sessions.append(self)
+
+    async def execute(self, query):
+        return query
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    sessions = []
+    monkeypatch.setattr(session_middlewares, "async_session", lambda: FakeSession(sessions))
+    return sessions
+
+
+def test_lazy_session_opens_on_first_use(sessions):
+    async def scenario():
+        lazy = LazySession()
+        await lazy.close()
+        assert sessions == []
+        assert await lazy.execute("select 1") == "select 1"
+        await lazy.execute("select 2")
+        assert len(sessions) == 1
+        await lazy.close()
+        assert sessions[0].closed
+        # После закрытия следующее обращение открывает новую сессию
+        await lazy.execute("select 3")
+        await lazy.close()
+
+    asyncio.run(scenario())
+    assert len(sessions) == 2
+
+
+def http_scope(headers=(), path="/"):
+    return {"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": [(k.encode(), v.encode()) for k, v in headers]}
+
+
+def websocket_scope(query_string=b"", headers=()):
+    return {"type": "websocket", "path": "/stream", "query_string": query_string, "headers": [(k.encode(), v.encode()) for k, v in headers]}
+
+
+async def call(app, scope):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent
+
+
+class Endpoint:
+    def __init__(self, fail=False, use_db=False):
+        self.fail = fail
+        self.use_db = use_db
+        self.scopes = []
+
+    async def __call__(self, scope, receive, send):
+        self.scopes.append(scope)
+        if self.use_db:
+            await scope["state"]["db"].execute("select 1")
+        if self.fail:
+            raise RuntimeError("handler failed")
+
+
+def test_session_is_closed_after_request_and_on_error(sessions):
+    endpoint = Endpoint(use_db=True)
+    app = SQLAlchemySessionMiddleware(endpoint)
+    asyncio.run(call(app, http_scope()))
+    assert isinstance(endpoint.scopes[0]["state"]["db"], LazySession)
+    assert len(sessions) == 1 and sessions[0].closed
+
+    app = SQLAlchemySessionMiddleware(Endpoint(fail=True, use_db=True))
+    with pytest.raises(RuntimeError):
+        asyncio.run(call(app, websocket_scope()))
+    assert len(sessions) == 2 and sessions[1].closed
+
+
+def test_session_is_not_opened_when_unused_or_for_lifespan(sessions):
+    endpoint = Endpoint()
+    app = SQLAlchemySessionMiddleware(endpoint)
+    asyncio.run(call(app, http_scope()))
+    lifespan = {"type": "lifespan"}
+    asyncio.run(call(app, lifespan))
+    assert sessions == []
+    assert "state" not in lifespan
+
+
+@pytest.fixture
+def authenticate(monkeypatch):
+    tokens = []
+
+    async def authenticate(token, db):
+        tokens.append(token)
+        return PRINCIPALS.get(token)
+
+    monkeypatch.setattr(auth_middlewares, "authenticate", authenticate)
+    return tokens
+
+
+def with_db(scope):
+    scope["state"] = {"db": object()}
+    return scope
+
+
+def response_status(sent):
+    return next(message["status"] for message in sent if message["type"] == "http.response.start")
+
+
+def test_http_bearer_token_sets_principal(authenticate):
+    endpoint = Endpoint()
+    sent = asyncio.run(call(AuthMiddleware(endpoint), with_db(http_scope([("authorization", "Bearer user-token")]))))
+    assert sent == []
+    assert endpoint.scopes[0]["state"]["user"] is PRINCIPALS["user-token"]
+    assert authenticate == ["user-token"]
+
+
+@pytest.mark.parametrize("headers", [[], [("authorization", "Bearer bad-token")], [("authorization", "user-token")]])
+def test_http_without_valid_token_is_unauthorized(authenticate, headers):
+    endpoint = Endpoint()
+    sent = asyncio.run(call(AuthMiddleware(endpoint), with_db(http_scope(headers))))
+    assert response_status(sent) == 401
+    assert endpoint.scopes == []
+
+
+def test_http_token_in_query_is_ignored(authenticate):
+    scope = with_db(http_scope())
+    scope["query_string"] = b"token=user-token"
+    sent = asyncio.run(call(AuthMiddleware(Endpoint()), scope))
+    assert response_status(sent) == 401
+    assert authenticate == []
+
+
+def test_websocket_accepts_query_token_and_closes_on_invalid(authenticate):
+    endpoint = Endpoint()
+    asyncio.run(call(AuthMiddleware(endpoint), with_db(websocket_scope(b"token=user-token"))))
+    assert endpoint.scopes[0]["state"]["user"] is PRINCIPALS["user-token"]
+
+    sent = asyncio.run(call(AuthMiddleware(endpoint), with_db(websocket_scope(b"token=bad-token"))))
+    assert sent == [{"type": "websocket.close", "code": 1008, "reason": ""}]
+    sent = asyncio.run(call(AuthMiddleware(endpoint), with_db(websocket_scope())))
+    assert sent[0]["type"] == "websocket.close"
+    assert len(endpoint.scopes) == 1
+
+
+def test_admin_routes_are_hidden_from_non_admins(authenticate):
+    endpoint = Endpoint()
+    user = asyncio.run(call(AdminMiddleware(endpoint), with_db(http_scope([("authorization", "Bearer user-token")]))))
+    anonymous = asyncio.run(call(AdminMiddleware(endpoint), with_db(http_scope())))
+    assert response_status(user) == response_status(anonymous) == 404
+    assert endpoint.scopes == []
+
+    asyncio.run(call(AdminMiddleware(endpoint), with_db(http_scope([("authorization", "Bearer admin-token")]))))
+    assert endpoint.scopes[0]["state"]["user"] is PRINCIPALS["admin-token"]
+
+
+def test_lifespan_passes_through_auth(authenticate):
+    endpoint = Endpoint()
+    asyncio.run(call(AdminMiddleware(endpoint), {"type": "lifespan"}))
+    assert endpoint.scopes == [{"type": "lifespan"}]
@@ -0,0 +1,36 @@
+# test_pagination.py
+import base64
+import json
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from src.manage_accounts.models import Trade
+from src.pagination import decode_cursor, encode_cursor
+
+KEY = [Trade.created_at, Trade.id]
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def test_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30)
+    assert decode_cursor(encode_cursor([created_at, 42]), KEY) == [created_at, 42]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    raw_cursor({"created_at": "2024-05-01T12:30:00", "id": 1}),
+    raw_cursor("2024-05-01T12:30:00"),
+    raw_cursor(["2024-05-01T12:30:00"]),
+    raw_cursor([123, 1]),
+    raw_cursor(["yesterday", 1]),
+    raw_cursor(["2024-05-01T12:30:00", [1]]),
+    raw_cursor(["2024-05-01T12:30:00", None]),
+])
+def test_malformed_cursor_is_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, KEY)
+    assert error.value.status_code == 400
@@ -0,0 +1,161 @@
+# test_pnl.py
+import asyncio
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.dialects import postgresql
+from src.service import pnl
+from src.service.grid_engine import BUY, SELL
+from src.service.pnl import PnLAggregator, PositionStats
+
+
+def test_round_trip_realizes_against_average_entry():
+    stats = PositionStats(deposit=1000)
+    stats.buy(100, 1)
+    stats.buy(90, 1)
+    assert stats.avg_entry == pytest.approx(95)
+    stats.sell(110, 1)
+    assert stats.realized_pnl == pytest.approx(15)
+    assert stats.position == pytest.approx(1)
+    # Частичное закрытие не меняет цену входа остатка
+    assert stats.avg_entry == pytest.approx(95)
+    stats.last_price = 100
+    assert stats.unrealized_pnl == pytest.approx(5)
+    assert stats.balance == pytest.approx(1020)
+    stats.sell(80, 1)
+    assert stats.realized_pnl == pytest.approx(0)
+    assert stats.position == 0 and stats.avg_entry == 0
+    assert stats.unrealized_pnl == 0
+    assert (stats.buy_fills, stats.sell_fills) == (2, 2)
+    assert stats.volume == pytest.approx(100 + 90 + 110 + 80)
+
+
+def test_sell_beyond_position_closes_only_bought_coins():
+    stats = PositionStats(deposit=1000)
+    # Исходная продажа уровня: монеты были на счёте до запуска, PnL не меняется
+    stats.sell(120, 2)
+    assert stats.realized_pnl == 0 and stats.position == 0
+    stats.buy(100, 1)
+    stats.sell(105, 3)
+    assert stats.realized_pnl == pytest.approx(5)
+    assert stats.position == 0
+    assert stats.unrealized_pnl == 0
+
+
+def test_fees_reduce_realized_pnl_on_both_sides():
+    aggregator = PnLAggregator(fee_rate=0.001)
+    aggregator._stats[1] = PositionStats(deposit=1000)
+    aggregator.record_fills(1, [BUY, BUY], [100.0, 90.0], [1.0, 2.0])
+    aggregator.record_fills(1, [SELL], [110.0], [3.0])
+    stats = aggregator.get(1)
+    fees = (100 + 180 + 330) * 0.001
+    assert stats.fees == pytest.approx(fees)
+    assert stats.realized_pnl == pytest.approx(330 - 280 - fees)
+    assert stats.position == 0
+    assert stats.balance == pytest.approx(1000 + 50 - fees)
+
+
+def test_fills_and_marks_of_unknown_accounts_are_ignored():
+    aggregator = PnLAggregator()
+    aggregator.record_fills(1, [BUY], [100.0], [1.0])
+    aggregator.mark(1, 100.0)
+    assert aggregator.stats() == {"accounts": 0, "dirty": 0}
+    aggregator._stats[2] = PositionStats(deposit=100)
+    aggregator.mark(2, 100.0)
+    aggregator.mark(2, 100.0)
+    assert aggregator.stats() == {"accounts": 1, "dirty": 1}
+
+
+class FakeConnection:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def execute(self, query, params):
+        self.calls.append((query, params))
+
+
+class FakeSession:
+    def __init__(self, db):
+        self.db = db
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query, params=None):
+        if self.db.down:
+            raise ConnectionError("database is down")
+        self.db.calls.append((query, params))
+        return SimpleNamespace(scalar=lambda: self.db.row)
+
+    async def connection(self):
+        return FakeConnection(self.db.calls)
+
+    async def commit(self):
+        self.db.commits += 1
+
+
+class FakeDatabase:
+    def __init__(self, row=None):
+        self.row = row
+        self.down = False
+        self.calls = []
+        self.commits = 0
+
+    def __call__(self):
+        return FakeSession(self)
+
+
+def test_snapshot_upserts_only_changed_accounts(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(pnl, "async_session", db)
+    aggregator = PnLAggregator(fee_rate=0.001)
+    aggregator._stats = {1: PositionStats(deposit=1000), 2: PositionStats(deposit=500)}
+    aggregator.record_fills(1, [BUY], [100.0], [2.0])
+    aggregator.mark(1, 110.0)
+
+    asyncio.run(aggregator.flush())
+    (upsert, snapshots), (balances, rows) = db.calls
+    sql = str(upsert.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (account_id) DO UPDATE" in sql
+    assert "realized_pnl = excluded.realized_pnl" in sql and "fees = excluded.fees" in sql
+    assert "balance" not in sql
+    assert [snapshot["account_id"] for snapshot in snapshots] == [1]
+    assert snapshots[0]["unrealized_pnl"] == pytest.approx(20)
+    assert snapshots[0]["fees"] == pytest.approx(0.2)
+    assert rows == [{"_id": 1, "_balance": pytest.approx(1000 - 0.2 + 20)}]
+    assert db.commits == 1
+
+    # Без изменений снимок не пишется
+    asyncio.run(aggregator.flush())
+    assert len(db.calls) == 2
+
+
+def test_failed_snapshot_is_retried(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(pnl, "async_session", db)
+    aggregator = PnLAggregator()
+    aggregator._stats[1] = PositionStats(deposit=1000)
+    aggregator.mark(1, 100.0)
+    db.down = True
+    asyncio.run(aggregator.flush())
+    assert aggregator.stats()["dirty"] == 1
+    db.down = False
+    asyncio.run(aggregator.release(1))
+    assert db.commits == 1
+    assert aggregator.stats() == {"accounts": 0, "dirty": 0}
+
+
+def test_load_continues_from_snapshot(monkeypatch):
+    row = SimpleNamespace(
+        position=1.5, avg_entry=95.0, realized_pnl=12.0, buy_fills=4, sell_fills=2, volume=600.0, last_price=101.0, fees=0.6,
+    )
+    monkeypatch.setattr(pnl, "async_session", FakeDatabase(row))
+    aggregator = PnLAggregator()
+    stats = asyncio.run(aggregator.load(SimpleNamespace(id=7, deposit=1000)))
+    assert aggregator.get(7) is stats
+    assert stats.as_dict() == {
+        "position": 1.5, "avg_entry": 95.0, "realized_pnl": 12.0, "unrealized_pnl": pytest.approx(9.0),
+        "buy_fills": 4, "sell_fills": 2, "volume": 600.0, "last_price": 101.0, "fees": 0.6, "balance": pytest.approx(1021.0),
+    }
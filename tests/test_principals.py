@@ -0,0 +1,146 @@
+# test_principals.py
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from src.admin import routes as admin_routes
+from src.admin.schemas import UserData
+from src.auth import middlewares, principals
+from src.auth.models import UserType
+from src.auth.principals import Principal, PrincipalCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(principals, "time", clock)
+    return clock
+
+
+def make_principal(user_id, expired_at=None):
+    return Principal(user_id, f"user{user_id}", UserType.user, 1, expired_at or datetime.now() + timedelta(days=30))
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = PrincipalCache(ttl=60)
+    principal = make_principal(1)
+    cache.put("token", principal, token_exp=clock.now + 3600)
+    clock.now += 59
+    assert cache.get("token") is principal
+    clock.now += 2
+    assert cache.get("token") is None
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 1}
+
+
+def test_lifetime_is_capped_by_token_expiry(clock):
+    cache = PrincipalCache(ttl=60)
+    cache.put("short", make_principal(1), token_exp=clock.now + 10)
+    cache.put("expired", make_principal(2), token_exp=clock.now - 1)
+    clock.now += 11
+    assert cache.get("short") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PrincipalCache(ttl=60, max_size=2)
+    exp = datetime.now().timestamp() + 3600
+    first, second, third = make_principal(1), make_principal(2), make_principal(3)
+    cache.put("a", first, exp)
+    cache.put("b", second, exp)
+    assert cache.get("a") is first
+    cache.put("c", third, exp)
+    assert cache.get("b") is None
+    assert cache.get("a") is first and cache.get("c") is third
+    # Вытесненный токен не остаётся в индексе пользователя
+    assert 2 not in cache._tokens
+
+
+def test_invalidate_user_drops_all_tokens_of_user():
+    cache = PrincipalCache(ttl=60)
+    exp = datetime.now().timestamp() + 3600
+    cache.put("a", make_principal(1), exp)
+    cache.put("b", make_principal(1), exp)
+    cache.put("c", make_principal(2), exp)
+    cache.invalidate_user(1)
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") is not None
+    cache.invalidate_user(42)
+    assert cache.stats()["size"] == 1
+
+
+class FakeDb:
+    def __init__(self, user):
+        self.user = user
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        return SimpleNamespace(scalar=lambda: self.user)
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, user):
+        pass
+
+
+def make_user():
+    return SimpleNamespace(
+        id=1, username="user1", key="key", type="user", max_accounts_count=1,
+        expired_at=datetime.now() + timedelta(days=30), created_at=0, deleted=False,
+    )
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = PrincipalCache(ttl=60)
+    monkeypatch.setattr(middlewares, "principal_cache", cache)
+    monkeypatch.setattr(admin_routes, "principal_cache", cache)
+    token_exp = datetime.now().timestamp() + 3600
+    monkeypatch.setattr(middlewares, "decode_token", lambda token: {"username": "user1", "id": 1, "exp": token_exp})
+    return cache
+
+
+def test_admin_delete_revokes_cached_principal(cache):
+    user = make_user()
+    db = FakeDb(user)
+
+    async def scenario():
+        assert await middlewares.authenticate("token", db) is not None
+        assert await middlewares.authenticate("token", db) is not None
+        assert db.queries == 1
+        await admin_routes.delete_user(1, SimpleNamespace(state=SimpleNamespace(db=db)))
+        return await middlewares.authenticate("token", db)
+
+    assert asyncio.run(scenario()) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_admin_update_refreshes_cached_principal(cache):
+    user = make_user()
+    db = FakeDb(user)
+
+    async def scenario():
+        before = await middlewares.authenticate("token", db)
+        payload = UserData(id=1, username="user1", key="key", type="user", max_accounts_count=5, expired_at=0, created_at=0)
+        await admin_routes.update_user(payload, SimpleNamespace(state=SimpleNamespace(db=db)))
+        # Поле срока действия в схеме админки — число; для проверки кэша восстанавливаем дату
+        user.expired_at = datetime.now() + timedelta(days=30)
+        after = await middlewares.authenticate("token", db)
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    assert before.max_accounts_count == 1
+    assert after.max_accounts_count == 5
+    assert db.queries == 3  # две авторизации мимо кэша и запрос пользователя в update_user
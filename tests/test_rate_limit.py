@@ -0,0 +1,94 @@
+# test_rate_limit.py
+import asyncio
+import time
+from src.service.rate_limit import Priority, RequestScheduler
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    async def scenario():
+        scheduler = RequestScheduler(rate=1000, capacity=10, max_concurrency=1)
+        order = []
+
+        async def request(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        # Первый запрос занимает единственный слот, остальные встают в очередь
+        first = asyncio.create_task(request("first", Priority.low))
+        await asyncio.sleep(0)
+        tasks = [
+            asyncio.create_task(request(name, priority)) for name, priority in [
+                ("grid", Priority.normal), ("reconcile", Priority.low), ("cancel", Priority.critical),
+                ("grid-2", Priority.normal), ("stop", Priority.critical),
+            ]
+        ]
+        await asyncio.gather(first, *tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["first", "cancel", "stop", "grid", "grid-2", "reconcile"]
+
+
+def test_bucket_refills_at_rate():
+    async def scenario():
+        scheduler = RequestScheduler(rate=20, capacity=2, max_concurrency=10)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        granted = []
+        for _ in range(4):
+            async with scheduler.slot():
+                granted.append(loop.time() - started)
+        return granted, scheduler.stats()
+
+    granted, stats = asyncio.run(scenario())
+    # Два запроса из запаса сразу, дальше по токену в 1/rate секунды
+    assert granted[1] < 0.02
+    assert 0.04 <= granted[2] < 0.1
+    assert 0.09 <= granted[3] < 0.15
+    assert stats["active"] == 0 and stats["waiting"] == 0
+
+
+def test_header_sync_is_per_endpoint_and_keeps_capacity():
+    async def scenario():
+        scheduler = RequestScheduler(rate=100, capacity=10, max_concurrency=10)
+        reset_ms = int((time.time() + 0.1) * 1000)
+        scheduler.update_from_headers(
+            {"X-Bapi-Limit-Status": "0", "X-Bapi-Limit-Reset-Timestamp": str(reset_ms), "X-Bapi-Limit": "2"},
+            group="/v5/order/create",
+        )
+        assert scheduler.capacity == 10
+        assert scheduler.stats()["exhausted_groups"] == 1
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        granted = {}
+
+        async def request(group):
+            async with scheduler.slot(Priority.critical if group == "/v5/order/create" else Priority.low, group):
+                granted[group] = loop.time() - started
+
+        # Исчерпанный эндпоинт стоит в очереди первым, но не задерживает запрос к другому
+        await asyncio.gather(request("/v5/order/create"), request("/v5/order/cancel"))
+        return granted, scheduler
+
+    granted, scheduler = asyncio.run(scenario())
+    assert granted["/v5/order/cancel"] < 0.05
+    assert 0.05 <= granted["/v5/order/create"] < 0.5
+    assert scheduler.stats()["exhausted_groups"] == 0
+
+
+def test_remaining_quota_counts_down_within_window():
+    async def scenario():
+        scheduler = RequestScheduler(rate=1000, capacity=10, max_concurrency=10)
+        scheduler.update("/v2/private/order/create", remaining=2, reset_ms=int((time.time() + 0.1) * 1000), limit=100)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        granted = []
+        for _ in range(3):
+            async with scheduler.slot(group="/v2/private/order/create"):
+                granted.append(loop.time() - started)
+        return granted
+
+    granted = asyncio.run(scenario())
+    # Третий запрос окна ждёт его сброса
+    assert granted[1] < 0.05
+    assert granted[2] >= 0.05
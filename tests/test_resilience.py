@@ -0,0 +1,203 @@
+# test_resilience.py
+import asyncio
+import pytest
+from src.service import resilience
+from src.service.bybit_client import AsyncBybitClient
+from src.service.connectors.bybit_v2 import BybitV2Connector
+from src.service.metrics import exchange_request_seconds, exchange_scheduler_wait_seconds
+from src.service.rate_limit import RequestScheduler
+from src.service.resilience import (
+    AuthError, CircuitBreaker, CircuitOpenError, InvalidRequestError, RateLimitError, TransientError,
+    backoff_delay, classify, classify_http,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker("endpoint", failure_threshold=3, reset_timeout=10)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.closed
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.open
+    assert not breaker.allow()
+    clock.now += 4
+    assert breaker.retry_after() == pytest.approx(6)
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("endpoint", failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.closed
+
+
+def test_half_open_allows_single_probe(clock):
+    breaker = CircuitBreaker("account", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.half_open
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.closed
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker("account", failure_threshold=5, reset_timeout=10)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 11
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.open
+    assert not breaker.allow()
+    assert breaker.retry_after() == pytest.approx(10)
+
+
+def test_lost_probe_is_replaced_after_timeout(clock):
+    breaker = CircuitBreaker("account", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    clock.now += 5
+    assert not breaker.allow()
+    clock.now += 5
+    assert breaker.allow()
+
+
+def test_classification():
+    assert classify(10003) is AuthError
+    assert classify(10006) is RateLimitError
+    assert classify(10016) is TransientError
+    assert classify(110007) is InvalidRequestError
+    assert classify_http(503) is TransientError
+    assert classify_http(429) is RateLimitError
+    assert classify_http(401) is AuthError
+    assert classify_http(404) is InvalidRequestError
+
+
+def test_backoff_is_capped():
+    for attempt in range(20):
+        assert 0 <= backoff_delay(attempt, base=0.5, cap=3) <= min(3, 0.5 * 2 ** attempt)
+
+
+def batch_client(responses):
+    client = AsyncBybitClient("key", "secret", session=object())
+    chunks = []
+
+    async def request_v5(path, body, priority=None, idempotent=False, method="POST"):
+        chunks.append(len(body["request"]))
+        response = responses[len(chunks) - 1]
+        if isinstance(response, BaseException):
+            raise response
+        return response
+
+    client._request_v5 = request_v5
+    return client, chunks
+
+
+def ok_chunk(ids):
+    return {
+        "retCode": 0,
+        "result": {"list": [{"orderId": order_id} for order_id in ids]},
+        "retExtInfo": {"list": [{"code": 0, "msg": "OK"} for _ in ids]},
+    }
+
+
+ORDERS = [{"side": "Buy", "qty": 1, "price": 100 + i} for i in range(25)]
+PATH = "/v5/order/create-batch"
+
+
+def place(responses):
+    client, chunks = batch_client(responses)
+    results = asyncio.run(BybitV2Connector(client).place_orders("BTCUSD", ORDERS))
+    assert chunks == [20, 5]
+    return results
+
+
+def test_batch_rejected_chunk_returns_rejections():
+    results = place([ok_chunk([f"o{i}" for i in range(20)]), InvalidRequestError(PATH, 10001, "bad params")])
+    assert all(result.ok for result in results[:20])
+    assert not any(result.ok or result.unknown for result in results[20:])
+    assert results[20].code == 10001
+
+
+def test_batch_failed_chunk_is_unknown():
+    results = place([TransientError(PATH, None, "timeout"), ok_chunk([f"o{i}" for i in range(5)])])
+    assert all(result.unknown and not result.ok for result in results[:20])
+    assert [result.order_id for result in results[20:]] == [f"o{i}" for i in range(5)]
+
+
+def test_batch_all_rejected_raises_classified_error():
+    with pytest.raises(AuthError):
+        place([AuthError(PATH, 10003, "invalid key"), CircuitOpenError(PATH, 5, "account circuit is open")])
+
+
+def test_batch_all_failed_is_unknown_not_raised():
+    results = place([TransientError(PATH, None, "timeout"), CircuitOpenError(PATH, 5, "endpoint circuit is open")])
+    assert all(result.unknown for result in results[:20])
+    assert not any(result.unknown for result in results[20:])
+
+
+def test_batch_unexpected_error_propagates():
+    with pytest.raises(ZeroDivisionError):
+        place([ok_chunk(["a"] * 20), ZeroDivisionError()])
+
+
+class SlowResponse:
+    status = 200
+    headers = {}
+
+    async def __aenter__(self):
+        await asyncio.sleep(0.05)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self):
+        return b'{"retCode":0,"result":{}}'
+
+
+class SlowSession:
+    def post(self, url, data=None, headers=None):
+        return SlowResponse()
+
+
+def test_request_latency_excludes_scheduler_wait():
+    path = "/v5/test/latency"
+    client = AsyncBybitClient("key", "secret", session=SlowSession(), scheduler=RequestScheduler(rate=10, capacity=1, max_concurrency=1))
+
+    async def scenario():
+        await asyncio.gather(*(client._request_v5(path, {"category": "inverse"}, idempotent=True) for _ in range(2)))
+
+    asyncio.run(scenario())
+    latency = exchange_request_seconds._values[(path,)]
+    wait = exchange_scheduler_wait_seconds._values[(path,)]
+    # Второй запрос ждёт слот, пока идёт первый и пока не пополнится токен; в задержку биржи это не входит
+    assert sum(latency[:-1]) == sum(wait[:-1]) == 2
+    assert latency[-1] < 0.18
+    assert wait[-1] >= 0.08
+
+
+def test_query_string_is_sorted_and_encoded():
+    params = {"symbol": "BTCUSD", "order_link_id": "grid 1&side=Sell", "qty": 1, "price": 100.5}
+    assert AsyncBybitClient._query_string(params) == "order_link_id=grid+1%26side%3DSell&price=100.5&qty=1&symbol=BTCUSD"
@@ -0,0 +1,116 @@
+# test_scheduler.py
+import asyncio
+import pytest
+from src.service.executions import ExecutionStream
+from src.service.scheduler import TimerWheel, next_check_delay, timer_wheel
+
+
+def advance_until_fired(wheel, fired, limit):
+    for ticks in range(1, limit + 1):
+        wheel._advance()
+        if fired:
+            return ticks
+    return None
+
+
+@pytest.mark.parametrize("delay, expected", [
+    (0, 1),
+    (0.001, 1),
+    (0.1, 1),
+    (0.15, 2),
+    (0.8, 8),
+    (1.0, 10),  # ровно оборот колеса
+    (1.1, 11),
+    (2.0, 20),  # ровно два оборота
+    (2.05, 21),
+])
+def test_timer_fires_on_expected_tick(delay, expected):
+    wheel = TimerWheel(tick=0.1, slots=10)
+    fired = []
+    # Курсор в произвольной позиции: смещение считается от него
+    for _ in range(3):
+        wheel._advance()
+    wheel.start = lambda: None
+    wheel.call_later(delay, fired.append, True)
+    assert advance_until_fired(wheel, fired, 100) == expected
+
+
+def test_cancelled_timer_does_not_fire():
+    wheel = TimerWheel(tick=0.1, slots=10)
+    wheel.start = lambda: None
+    fired = []
+    handle = wheel.call_later(0.3, fired.append, True)
+    handle.cancel()
+    assert advance_until_fired(wheel, fired, 30) is None
+    assert wheel.stats()["pending"] == 0
+
+
+def test_wheel_runs_in_loop():
+    async def scenario():
+        wheel = TimerWheel(tick=0.01, slots=8)
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        started = loop.time()
+        wheel.call_later(0.1, done.set_result, None)
+        await asyncio.wait_for(done, 1)
+        elapsed = loop.time() - started
+        await wheel.close()
+        return elapsed
+
+    assert 0.09 <= asyncio.run(scenario()) < 0.5
+
+
+def test_sleep_wakes_on_wheel_and_cancels_its_timer():
+    async def scenario():
+        wheel = TimerWheel(tick=0.01, slots=8)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await wheel.sleep(0.05)
+        elapsed = loop.time() - started
+        sleeper = asyncio.create_task(wheel.sleep(10))
+        await asyncio.sleep(0.02)
+        sleeper.cancel()
+        await asyncio.gather(sleeper, return_exceptions=True)
+        pending = sum(not handle.cancelled for slot in wheel._slots for handle in slot)
+        await wheel.close()
+        return elapsed, pending
+
+    elapsed, pending = asyncio.run(scenario())
+    assert 0.04 <= elapsed < 0.5
+    assert pending == 0
+
+
+class QueueStream(ExecutionStream):
+    async def _run(self):
+        await asyncio.Future()
+
+
+def test_stale_timeout_sentinel_is_ignored():
+    async def scenario():
+        stream = QueueStream(account=None)
+        # Таймаут прошлого ожидания сработал одновременно с исполнением
+        stream._fills.put_nowait(None)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        filled = await stream.wait_fills(0.2)
+        elapsed = loop.time() - started
+        stream._fills.put_nowait("a")
+        stream._fills.put_nowait(None)
+        stream._fills.put_nowait("b")
+        more = await stream.wait_fills(0.2)
+        await timer_wheel.close()
+        return filled, elapsed, more
+
+    filled, elapsed, more = asyncio.run(scenario())
+    assert filled == set()
+    assert elapsed >= 0.15
+    assert more == {"a", "b"}
+
+
+def test_next_check_delay_bounds():
+    assert next_check_delay(100, [], 0.001, max_delay=30) <= 30
+    near = next_check_delay(100, [100.01], 0.001)
+    far = next_check_delay(100, [150], 0.001)
+    assert 0.4 <= near <= 0.5
+    assert 24 <= far <= 30
+    assert 4 <= next_check_delay(100, [101], None) <= 5
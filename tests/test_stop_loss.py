@@ -0,0 +1,59 @@
+# test_stop_loss.py
+import asyncio
+from types import SimpleNamespace
+from src.manage_accounts.models import Category, Exchange
+from src.service.stop_loss import StopLossWatcher
+
+
+def make_account(account_id, stop_loss):
+    return SimpleNamespace(id=account_id, exchange=Exchange.bybit_v2, symbol="BTCUSD", category=Category.inverse, stop_loss=stop_loss)
+
+
+def test_fires_on_crossing_and_rearms_after_recovery():
+    fired = []
+
+    def handler(account_id):
+        async def run(price):
+            fired.append((account_id, price))
+        return run
+
+    async def scenario():
+        watcher = StopLossWatcher()
+        watcher.register(make_account(1, 90.0), handler(1))
+        watcher.register(make_account(2, 80.0), handler(2))
+        watcher.on_price(Exchange.bybit_v2, "BTCUSD", 95.0)
+        watcher.on_price(Exchange.bybit_v2, "BTCUSD", 85.0)
+        await asyncio.sleep(0)
+        assert fired == [(1, 85.0)]
+
+        # Пока цена ниже порога, повторных срабатываний нет
+        watcher.on_price(Exchange.bybit_v2, "BTCUSD", 84.0)
+        await asyncio.sleep(0)
+        assert fired == [(1, 85.0)]
+
+        watcher.on_price(Exchange.bybit_v2, "BTCUSD", 90.0)
+        watcher.on_price(Exchange.bybit_v2, "BTCUSD", 70.0)
+        await asyncio.sleep(0)
+        assert sorted(fired[1:]) == [(1, 70.0), (2, 70.0)]
+        assert watcher.stats()["armed"] == 0
+        await watcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_unregister_removes_account():
+    fired = []
+
+    async def handler(price):
+        fired.append(price)
+
+    async def scenario():
+        watcher = StopLossWatcher()
+        watcher.register(make_account(1, 90.0), handler)
+        watcher.unregister(1)
+        watcher.on_price(Exchange.bybit_v2, "BTCUSD", 50.0)
+        await asyncio.sleep(0)
+        assert not fired and watcher.stats()["accounts"] == 0
+        await watcher.close()
+
+    asyncio.run(scenario())
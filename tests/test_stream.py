@@ -0,0 +1,147 @@
+# test_stream.py
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+from src.manage_accounts.models import AccountStatus, Category, Exchange
+from src.service import events, grid_worker, stream
+from src.service.events import AccountEvent, FillEvent, account_events, fill_events, status_events
+from src.service.stream import Outbox, StreamHub
+
+MARKET = (Exchange.bybit_v2, "BTCUSD", Category.inverse)
+OTHER_MARKET = (Exchange.bybit_v5, "ETHUSDT", Category.linear)
+
+
+def test_keyed_messages_are_coalesced():
+    async def scenario():
+        outbox = Outbox(maxsize=10)
+        outbox.put(("price", "BTCUSD"), {"price": 1})
+        outbox.put(None, {"fill": 1})
+        outbox.put(("price", "BTCUSD"), {"price": 2})
+        outbox.put(None, {"fill": 2})
+        return outbox, await outbox.get_batch()
+
+    outbox, batch = asyncio.run(scenario())
+    # Схлопнутое сообщение остаётся на месте первого, но с последним значением
+    assert batch == [{"price": 2}, {"fill": 1}, {"fill": 2}]
+    assert outbox.coalesced == 1 and outbox.dropped == 0
+
+
+def test_full_outbox_drops_oldest_and_reports_it():
+    async def scenario():
+        outbox = Outbox(maxsize=3)
+        for i in range(5):
+            outbox.put(None, {"fill": i})
+        first = await outbox.get_batch()
+        outbox.put(None, {"fill": 5})
+        second = await outbox.get_batch()
+        return outbox, first, second
+
+    outbox, first, second = asyncio.run(scenario())
+    assert first == [{"fill": 2}, {"fill": 3}, {"fill": 4}, {"type": "dropped", "count": 2}]
+    assert second == [{"fill": 5}]
+    assert outbox.dropped == 2
+
+
+class FakeMarketData:
+    def __init__(self):
+        self.subscribed = []
+        self.updates = {}
+
+    def subscribe(self, symbol, exchange, category):
+        self.subscribed.append((exchange, symbol, category))
+
+    def unsubscribe(self, symbol, exchange, category):
+        self.subscribed.remove((exchange, symbol, category))
+
+    async def wait_update(self, symbol, exchange, category):
+        return await self.updates.setdefault((exchange, symbol, category), asyncio.Queue()).get()
+
+
+@pytest.fixture
+def market_data(monkeypatch):
+    market_data = FakeMarketData()
+    monkeypatch.setattr(stream, "market_data_hub", market_data)
+    return market_data
+
+
+def test_hub_fans_out_events_to_connections_of_account(market_data):
+    async def scenario():
+        hub = StreamHub()
+        both = hub.connect({1: MARKET, 2: OTHER_MARKET})
+        first = hub.connect({1: MARKET})
+        second = hub.connect({2: OTHER_MARKET})
+        # Один поток цен на рынок, сколько бы подключений его ни ждало
+        assert sorted(market_data.subscribed, key=str) == sorted([MARKET, OTHER_MARKET], key=str)
+        await asyncio.sleep(0)
+
+        account_events.publish(AccountEvent(account_id=1, status=AccountStatus.stopped))
+        fill_events.publish(FillEvent(account_id=2, side="buy", price=100.0, quantity=1.0))
+        market_data.updates[MARKET].put_nowait(SimpleNamespace(price=101.0))
+        await asyncio.sleep(0.01)
+        batches = [await outbox.get_batch() for outbox in (both, first, second)]
+
+        hub.disconnect(first, {1: MARKET})
+        assert hub.stats() == {"accounts": 2, "markets": 2}
+        hub.disconnect(both, {1: MARKET, 2: OTHER_MARKET})
+        hub.disconnect(second, {2: OTHER_MARKET})
+        stats = hub.stats()
+        for pump in hub._pumps:
+            pump.cancel()
+        await asyncio.gather(*hub._pumps, return_exceptions=True)
+        return batches, stats
+
+    (both, first, second), stats = asyncio.run(scenario())
+    status = {"type": "status", "account_id": 1, "status": "stopped"}
+    fill = {"type": "fill", "account_id": 2, "side": "buy", "price": 100.0, "quantity": 1.0}
+    price = {"type": "price", "exchange": "bybit_v2", "category": "inverse", "symbol": "BTCUSD", "price": 101.0}
+    assert both == [status, fill, price]
+    assert first == [status, price]
+    assert second == [fill]
+    assert stats == {"accounts": 0, "markets": 0}
+    assert market_data.subscribed == []
+
+
+class FakeConnection:
+    def __init__(self, notified):
+        self.notified = notified
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query, params=None):
+        self.notified.append(params)
+
+    async def commit(self):
+        pass
+
+
+def test_worker_status_change_is_forwarded_to_api(monkeypatch):
+    notified, updates = [], []
+    monkeypatch.setattr(events, "engine", SimpleNamespace(begin=lambda: FakeConnection(notified)))
+    monkeypatch.setattr(grid_worker, "async_session", lambda: FakeConnection(updates))
+
+    async def scenario():
+        local = account_events.subscribe()
+        forwarder = asyncio.create_task(events.forward_to_postgres(status_events, events.STATUS_CHANNEL))
+        await asyncio.sleep(0)
+        # Событие, полученное воркером от API, назад не пересылается
+        account_events.publish(AccountEvent(account_id=5, status=AccountStatus.running))
+        await grid_worker.disable_account(SimpleNamespace(id=7, name="test"), "invalid api key")
+        await asyncio.sleep(0.01)
+        forwarder.cancel()
+        await asyncio.gather(forwarder, return_exceptions=True)
+        account_events.unsubscribe(local)
+        return [local.get_nowait() for _ in range(local.qsize())]
+
+    local = asyncio.run(scenario())
+    # Локальный менеджер видит статус сразу, API — через NOTIFY
+    assert local[-1] == AccountEvent(account_id=7, status=AccountStatus.error)
+    assert len(updates) == 1
+    assert [params["channel"] for params in notified] == ["status_events"]
+    payload = notified[0]["payload"]
+    assert json.loads(payload)["status"] == "error"
+    assert events.decode_event(payload) == AccountEvent(account_id=7, status=AccountStatus.error)
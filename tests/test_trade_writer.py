@@ -0,0 +1,112 @@
+# test_trade_writer.py
+import asyncio
+import pytest
+from src.service import trade_writer as trade_writer_module
+from src.service.trade_writer import TradeWriter
+
+
+class FakeSession:
+    def __init__(self, db):
+        self.db = db
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, query, rows):
+        if self.db.failures:
+            self.db.failures -= 1
+            raise ConnectionError("database is down")
+        self.db.rows.extend(rows)
+
+    async def commit(self):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.rows = []
+
+    def __call__(self):
+        return FakeSession(self)
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(trade_writer_module, "FLUSH_RETRY_DELAY", 0)
+
+
+def test_failed_batch_is_kept_for_next_flush(monkeypatch):
+    db = FakeDatabase(failures=trade_writer_module.FLUSH_RETRIES)
+    monkeypatch.setattr(trade_writer_module, "async_session", db)
+
+    async def scenario():
+        writer = TradeWriter(flush_interval=0.5)
+        await writer.put({"id": 1})
+        while not writer.stats()["spilled"]:
+            await asyncio.sleep(0.01)
+        await writer.put({"id": 2})
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [row["id"] for row in db.rows] == [1, 2]
+    assert writer.stats() == {"queued": 0, "spilled": 0, "written": 2, "dropped": 0}
+
+
+def test_spill_is_retried_without_new_trades(monkeypatch):
+    db = FakeDatabase(failures=trade_writer_module.FLUSH_RETRIES)
+    monkeypatch.setattr(trade_writer_module, "async_session", db)
+
+    async def scenario():
+        writer = TradeWriter(flush_interval=0.01)
+        await writer.put({"id": 1})
+        await asyncio.sleep(0.1)
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [row["id"] for row in db.rows] == [1]
+    assert writer.dropped == 0
+
+
+def test_unwritable_trades_are_logged_on_close(monkeypatch):
+    db = FakeDatabase(failures=1000)
+    monkeypatch.setattr(trade_writer_module, "async_session", db)
+    logged = []
+    monkeypatch.setattr(trade_writer_module.logger, "error", logged.append)
+
+    async def scenario():
+        writer = TradeWriter(flush_interval=0.01, max_spill=1)
+        await writer.put({"id": 1})
+        await writer.put({"id": 2})
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert writer.dropped == 2
+    dropped = [message for message in logged if "dropped trade" in message]
+    assert len(dropped) == 2
+    assert "'id': 1" in dropped[0] and "'id': 2" in dropped[1]
+
+
+def test_batch_window_starts_with_first_trade(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(trade_writer_module, "async_session", db)
+
+    async def scenario():
+        writer = TradeWriter(batch_size=10, flush_interval=0.2)
+        collect = asyncio.create_task(writer._collect())
+        # Долгий простой перед первой сделкой не должен съедать окно пачки
+        await asyncio.sleep(0.3)
+        await writer._queue.put({"id": 1})
+        await asyncio.sleep(0.05)
+        await writer._queue.put({"id": 2})
+        return await collect
+
+    batch, stop = asyncio.run(scenario())
+    assert [row["id"] for row in batch] == [1, 2]
+    assert not stop